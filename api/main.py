@@ -4,21 +4,33 @@ Endpoints pour les prix, indicateurs, prédictions et sentiment.
 
 Lancer avec: uvicorn api.main:app --reload --port 8000
 Docs Swagger: http://localhost:8000/docs
+
+Démarrage à froid (Vercel) : la couche données (pandas, NumPy, indicateurs,
+client Binance) et Prophet sont importés au premier usage — /health ne les
+charge jamais. Hors serverless, config.PRELOAD les charge en tâche de fond
+au démarrage. Profil des imports : python scripts/import_profile.py
 """
+import asyncio
 import os
 import sys
+import time
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 
 # Path setup
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, ROOT_DIR)
 
 import config
-from data.binance_client import get_historical_data, get_latest_price
-from data.indicators import add_all_indicators, get_indicator_summary
+import telemetry
+from telemetry import cache_lookup, timed
+from api.scheduler import PrecomputeScheduler, ReadStore
+from api.serialization import FastJSONResponse, frame_to_json
+from api.streaming import StreamHub
+from data.cache import flight as _flight
 #Sentiment removed
 
 # ── App ──────────────────────────────────────────────
@@ -39,6 +51,56 @@ app.add_middleware(
 )
 
 
+# ── Instrumentation ──────────────────────────────────
+_request_seconds = telemetry.REGISTRY.histogram(
+    "http_request_duration_seconds", "Durée des requêtes HTTP par route",
+    labels=("method", "route", "status"))
+
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    """Durée par route (/metrics) et, si config.SERVER_TIMING, en-tête Server-Timing."""
+    timings, token = telemetry.collect_timings() if config.SERVER_TIMING else (None, None)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        if token is not None:
+            telemetry.reset_timings(token)
+    elapsed = time.perf_counter() - start
+    
+    route = request.scope.get("route")
+    _request_seconds.observe(elapsed, method=request.method,
+                             route=route.path if route is not None else "unmatched",
+                             status=str(response.status_code))
+    if timings is not None:
+        response.headers["Server-Timing"] = telemetry.server_timing_header(timings, elapsed)
+    return response
+
+
+# Résultats pré-calculés en tâche de fond (voir startup_event)
+_precomputed = ReadStore(max_age=2 * config.AUTO_REFRESH_SECONDS)
+
+
+async def _read_or_compute(key, func, *args):
+    """Lit le résultat pré-calculé s'il existe, sinon calcule (single-flight)."""
+    payload = _precomputed.get(key)
+    cache_lookup("precomputed", payload is not None)
+    if payload is None:
+        payload = await _flight.run(key, func, *args)
+    return payload
+
+# Format des séries retournées : liste de bougies ou dict de colonnes
+LAYOUT_QUERY = Query("records", pattern="^(records|columns)$",
+                     description="Format des séries: records (liste de bougies) ou columns (dict de listes)")
+
+PRICES_INDICATORS = ['RSI', 'MACD', 'MACD_signal', 'MACD_hist',
+                     'BB_upper', 'BB_middle', 'BB_lower',
+                     'EMA_20', 'EMA_50', 'EMA_200', 'ATR']
+DASHBOARD_INDICATORS = ['RSI', 'MACD', 'MACD_signal', 'BB_upper', 'BB_middle', 'BB_lower',
+                        'EMA_20', 'EMA_50']
+
+
 # ── Health ───────────────────────────────────────────
 @app.get("/health", tags=["System"])
 async def health_check():
@@ -47,15 +109,36 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "version": "1.0.0",
+        "precompute": {"enabled": config.PRECOMPUTE_ENABLED, "last_run": _scheduler.last_run},
+        "stream_subscribers": _hub.subscribers,
+        "live": _live_status(),
     }
 
 
+def _live_status() -> dict:
+    """État du flux websocket — data.live n'est pas importé s'il est désactivé."""
+    if not config.LIVE_ENABLED:
+        return {"enabled": False}
+    from data import live
+    return {"enabled": True, **live.feed.status()}
+
+
+@app.get("/metrics", tags=["System"], response_class=PlainTextResponse)
+async def metrics():
+    """
+    Métriques au format texte Prometheus : durées par étape et par route
+    (histogrammes → p50/p99 via histogram_quantile) et hits/misses des caches.
+    """
+    return PlainTextResponse(telemetry.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 # ── Prices ───────────────────────────────────────────
 @app.get("/api/prices/{symbol}", tags=["Market Data"])
 async def get_prices(
     symbol: str,
     interval: str = Query("1d", description="Intervalle: 1h, 4h, 1d"),
     lookback: str = Query("90 days ago UTC", description="Période de lookback"),
+    layout: str = LAYOUT_QUERY,
 ):
     """
     Récupère les données historiques OHLCV avec indicateurs techniques.
@@ -63,46 +146,39 @@ async def get_prices(
     - **symbol**: BTC ou ETH
     - **interval**: 1h, 4h, ou 1d
     - **lookback**: Période (ex: '90 days ago UTC')
+    - **layout**: records (défaut) ou columns
     """
     symbol = symbol.upper()
     if symbol not in config.SYMBOLS:
         raise HTTPException(status_code=400, detail=f"Symbole invalide: {symbol}. Utilisez BTC ou ETH.")
+    if interval not in config.INTERVALS:
+        raise HTTPException(status_code=400, detail=f"Intervalle invalide: {interval}")
     
-    binance_symbol = config.SYMBOLS[symbol]
-    df = get_historical_data(binance_symbol, interval, lookback)
-    df = add_all_indicators(df)
-    
-    # Convertir en JSON
-    records = []
-    for idx, row in df.iterrows():
-        record = {
-            "timestamp": idx.isoformat(),
-            "open": round(row['open'], 2),
-            "high": round(row['high'], 2),
-            "low": round(row['low'], 2),
-            "close": round(row['close'], 2),
-            "volume": round(row['volume'], 2),
-        }
-        # Ajouter les indicateurs
-        for col in ['RSI', 'MACD', 'MACD_signal', 'MACD_hist',
-                     'BB_upper', 'BB_middle', 'BB_lower',
-                     'EMA_20', 'EMA_50', 'EMA_200', 'ATR']:
-            if col in row.index and not (isinstance(row[col], float) and str(row[col]) == 'nan'):
-                try:
-                    record[col.lower()] = round(float(row[col]), 4)
-                except (ValueError, TypeError):
-                    pass
-        records.append(record)
+    payload = await _read_or_compute(("prices", symbol, interval, lookback, layout),
+                                     _compute_prices, symbol, interval, lookback, layout)
+    return FastJSONResponse(payload)
+
+
+async def _compute_prices(symbol: str, interval: str, lookback: str, layout: str) -> dict:
+    from data.cache import get_cached_indicators_async
+    df = await get_cached_indicators_async(config.SYMBOLS[symbol], interval, lookback)
+    return await run_in_threadpool(_prices_payload, symbol, interval, df, layout)
+
+
+def _prices_payload(symbol: str, interval: str, df, layout: str = "records") -> dict:
+    from data.indicators import get_indicator_summary
     
-    summary = get_indicator_summary(df)
+    with timed("summary"):
+        summary = get_indicator_summary(df)
     
     return {
         "symbol": symbol,
         "interval": interval,
-        "data_points": len(records),
-        "latest_price": records[-1]['close'] if records else None,
+        "data_points": len(df),
+        "latest_price": round(float(df['close'].iloc[-1]), 2) if len(df) else None,
         "summary": summary,
-        "data": records[-200:],  # Limiter à 200 points pour la perf
+        # Limiter à 200 points pour la perf — découpage avant sérialisation
+        "data": frame_to_json(df.iloc[-200:], PRICES_INDICATORS, layout),
     }
 
 
@@ -113,93 +189,134 @@ async def get_price_latest(symbol: str):
     if symbol not in config.SYMBOLS:
         raise HTTPException(status_code=400, detail=f"Symbole invalide: {symbol}")
     
-    return get_latest_price(config.SYMBOLS[symbol])
+    from data.binance_client import get_latest_price_async
+    return await get_latest_price_async(config.SYMBOLS[symbol])
 
 
 # ── Predictions ──────────────────────────────────────
 @app.get("/api/predict/{symbol}", tags=["Predictions"])
 async def get_predictions(
     symbol: str,
-    model: str = Query("prophet", description="Modèle: prophet"),
+    model: str = Query("prophet", description="Modèle: prophet, holt, drift ou ar"),
     days: int = Query(7, description="Jours de prédiction (1-30)", ge=1, le=30),
 ):
     """
     Lance une prédiction de prix pour le symbole spécifié.
     
     - **symbol**: BTC ou ETH
-    - **model**: prophet uniquement
+    - **model**: prophet, ou holt / drift / ar (NumPy, ajustés en quelques ms à chaque requête)
     - **days**: Nombre de jours à prédire (1-30)
     """
     symbol = symbol.upper()
     if symbol not in config.SYMBOLS:
         raise HTTPException(status_code=400, detail=f"Symbole invalide: {symbol}")
+    if model not in config.PREDICTION_MODELS:
+        names = ", ".join(f"'{name}'" for name in config.PREDICTION_MODELS)
+        raise HTTPException(status_code=400, detail=f"Modèle invalide. Utilisez {names}.")
+    
+    return await _read_or_compute(("predict", symbol, model, days), _compute_prediction, symbol, model, days)
+
+
+async def _compute_prediction(symbol: str, model: str, days: int) -> dict:
+    from data.cache import get_cached_history_async
     
     binance_symbol = config.SYMBOLS[symbol]
     # OPTIMIZATION: Use 90 days instead of default (365) for faster training on Serverless
-    df = get_historical_data(binance_symbol, "1d", "90 days ago UTC")
-    df = add_all_indicators(df)
+    # Prophet n'utilise que le close : pas besoin des indicateurs
+    df = await get_cached_history_async(binance_symbol, "1d", "90 days ago UTC")
     
     try:
         if model == "prophet":
             from models.prophet_model import train_prophet
-            result = train_prophet(df, symbol, days)
-        else:
-            raise HTTPException(status_code=400, detail="Modèle invalide. Utilisez 'prophet'.")
-        
-        return result
+            return await run_in_threadpool(train_prophet, df, symbol, days)
+        from models.forecast import train_forecast
+        return await run_in_threadpool(train_forecast, df, symbol, days, model=model)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur de prédiction: {str(e)}")
 
 
 
+# ── Dashboard Data ───────────────────────────────────
+@app.get("/api/dashboard", tags=["Dashboard"])
+async def get_dashboard_batch(
+    symbols: str = Query(None, description="Symboles séparés par des virgules (défaut: tous)"),
+    layout: str = LAYOUT_QUERY,
+):
+    """
+    Dashboard multi-symboles en un seul appel.
+    Les symboles sont calculés en parallèle ; une erreur sur un symbole
+    n'empêche pas de retourner les autres.
+    
+    - **symbols**: ex. 'BTC,ETH,SOL,XRP'
+    - **layout**: records (défaut) ou columns
+    """
+    requested = [s.strip().upper() for s in symbols.split(",") if s.strip()] if symbols else list(config.SYMBOLS)
+    requested = list(dict.fromkeys(requested))  # Dédoublonnage, ordre conservé
+    
+    valid = [s for s in requested if s in config.SYMBOLS]
+    errors = {s: f"Symbole invalide: {s}" for s in requested if s not in config.SYMBOLS}
+    
+    outcomes = await asyncio.gather(
+        *[_read_or_compute(("dashboard", s, layout), _compute_dashboard, s, layout) for s in valid],
+        return_exceptions=True,
+    )
+    
+    results = {}
+    for sym, outcome in zip(valid, outcomes):
+        if isinstance(outcome, HTTPException):
+            errors[sym] = outcome.detail
+        elif isinstance(outcome, Exception):
+            errors[sym] = str(outcome)
+        else:
+            results[sym] = outcome
+    
+    return FastJSONResponse({
+        "symbols": requested,
+        "results": results,
+        "errors": errors,
+        "timestamp": datetime.now().isoformat(),
+    })
 
 
-
-# ── Dashboard Data ───────────────────────────────────
 @app.get("/api/dashboard/{symbol}", tags=["Dashboard"])
-async def get_dashboard_data(symbol: str):
+async def get_dashboard_data(symbol: str, layout: str = LAYOUT_QUERY):
     """
     Endpoint agrégé pour le dashboard.
     Retourne prix + indicateurs + sentiment en un seul appel.
+    
+    - **layout**: records (défaut) ou columns
     """
     symbol = symbol.upper()
     if symbol not in config.SYMBOLS:
         raise HTTPException(status_code=400, detail=f"Symbole invalide: {symbol}")
     
+    payload = await _read_or_compute(("dashboard", symbol, layout), _compute_dashboard, symbol, layout)
+    return FastJSONResponse(payload)
+
+
+async def _compute_dashboard(symbol: str, layout: str = "records") -> dict:
+    from data.cache import get_cached_indicators_async
+    
     binance_symbol = config.SYMBOLS[symbol]
     
     # Données de marché + indicateurs
-    df = get_historical_data(binance_symbol, "1d", "90 days ago UTC")
-    df = add_all_indicators(df)
+    df = await get_cached_indicators_async(binance_symbol, "1d", "90 days ago UTC")
+    return await run_in_threadpool(_dashboard_payload, symbol, df, layout)
+
+
+def _dashboard_payload(symbol: str, df, layout: str = "records") -> dict:
+    from data.indicators import get_indicator_summary
     
     # Sentiment
     sentiment = None
     
     # Summary
-    summary = get_indicator_summary(df)
+    with timed("summary"):
+        summary = get_indicator_summary(df)
     
     # Dernières données pour les graphiques
-    chart_data = []
-    for idx, row in df.tail(90).iterrows():
-        record = {
-            "timestamp": idx.isoformat(),
-            "open": round(row['open'], 2),
-            "high": round(row['high'], 2),
-            "low": round(row['low'], 2),
-            "close": round(row['close'], 2),
-            "volume": round(row['volume'], 2),
-        }
-        for col in ['RSI', 'MACD', 'MACD_signal', 'BB_upper', 'BB_middle', 'BB_lower',
-                     'EMA_20', 'EMA_50']:
-            if col in row.index:
-                try:
-                    val = float(row[col])
-                    if not (val != val):  # NaN check
-                        record[col.lower()] = round(val, 4)
-                except (ValueError, TypeError):
-                    pass
-        chart_data.append(record)
+    chart_data = frame_to_json(df.tail(90), DASHBOARD_INDICATORS, layout)
     
     return {
         "symbol": symbol,
@@ -211,7 +328,77 @@ async def get_dashboard_data(symbol: str):
     }
 
 
+# ── Streaming ────────────────────────────────────────
+_hub = StreamHub()
+
+
+@app.get("/api/stream", tags=["Streaming"])
+async def stream(
+    symbols: str = Query(None, description="Symboles séparés par des virgules (défaut: tous)"),
+    interval: str = Query("1d", description="Intervalle: 1h, 4h, 1d"),
+):
+    """
+    Flux Server-Sent Events : snapshot à l'abonnement, puis uniquement les
+    deltas (bougie en cours, bougie clôturée + indicateurs, changement de signal).
+    Un seul calcul par tick et par symbole, partagé par tous les clients.
+    
+    - **symbols**: ex. 'BTC,ETH'
+    - **interval**: 1h, 4h, ou 1d
+    """
+    requested = [s.strip().upper() for s in symbols.split(",") if s.strip()] if symbols else list(config.SYMBOLS)
+    requested = list(dict.fromkeys(requested))
+    invalid = [s for s in requested if s not in config.SYMBOLS]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Symbole invalide: {', '.join(invalid)}")
+    if interval not in config.INTERVALS:
+        raise HTTPException(status_code=400, detail=f"Intervalle invalide: {interval}")
+    
+    return StreamingResponse(
+        _hub.events(requested, interval),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # Pas de buffering proxy
+    )
+
+
+# ── Pré-calcul ───────────────────────────────────────
+def _precompute_jobs() -> list:
+    """
+    Requêtes par défaut du frontend, pour chaque symbole : dashboard, prix
+    et prédiction Prophet. Les clés sont celles des endpoints : une requête
+    identique lit directement le résultat publié.
+    """
+    jobs = []
+    for symbol in config.SYMBOLS:
+        for key, func, args in [
+            (("dashboard", symbol, "records"), _compute_dashboard, (symbol, "records")),
+            (("prices", symbol, config.DEFAULT_INTERVAL, config.DEFAULT_LOOKBACK, "records"),
+             _compute_prices, (symbol, config.DEFAULT_INTERVAL, config.DEFAULT_LOOKBACK, "records")),
+            (("predict", symbol, "prophet", config.PREDICTION_DAYS),
+             _compute_prediction, (symbol, "prophet", config.PREDICTION_DAYS)),
+        ]:
+            # Via _flight : une requête concurrente identique partage le calcul
+            jobs.append((key, _flight.run, (key, func, *args)))
+    return jobs
+
+
+_scheduler = PrecomputeScheduler(_precomputed, _precompute_jobs(), config.AUTO_REFRESH_SECONDS)
+
+
 # ── Startup ──────────────────────────────────────────
+_preload_task = None
+
+
+def _preload() -> None:
+    """Importe la couche données puis Prophet et son backend Stan (thread dédié)."""
+    try:
+        with timed("preload"):
+            import data.cache, data.indicators  # noqa: F401 — pandas, NumPy, client Binance
+            from models.prophet_model import preload
+            preload()
+    except Exception as e:
+        print(f"⚠️ Préchargement: {e}")
+
+
 @app.on_event("startup")
 async def startup_event():
     print("\n" + "=" * 50)
@@ -219,7 +406,30 @@ async def startup_event():
     print("=" * 50)
     print(f"  📡 Swagger UI: http://localhost:{config.API_PORT}/docs")
     print(f"  📡 ReDoc:      http://localhost:{config.API_PORT}/redoc")
+    if config.PRECOMPUTE_ENABLED:
+        print(f"  🔄 Pré-calcul: toutes les {config.AUTO_REFRESH_SECONDS}s")
     print("=" * 50 + "\n")
+    
+    global _preload_task
+    if config.PRELOAD:
+        _preload_task = asyncio.ensure_future(run_in_threadpool(_preload))
+    if config.LIVE_ENABLED:
+        from data import live
+        live.feed.start()
+    if config.PRECOMPUTE_ENABLED:
+        _scheduler.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await _scheduler.stop()
+    await _hub.close()
+    if config.LIVE_ENABLED:
+        from data import live
+        await live.feed.stop()
+    if "data.binance_client" in sys.modules:  # Session aiohttp ouverte seulement si le client a servi
+        from data.binance_client import close_async_session
+        await close_async_session()
 
 
 if __name__ == "__main__":
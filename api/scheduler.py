@@ -0,0 +1,90 @@
+"""
+Pré-calcul en tâche de fond — dashboards, prix et prédictions par défaut.
+Toutes les config.AUTO_REFRESH_SECONDS, chaque tâche est recalculée et
+publiée dans un store en lecture : les endpoints y lisent d'abord et ne
+calculent eux-mêmes qu'en cas d'absence (ou de résultat trop ancien).
+"""
+import asyncio
+import time
+from datetime import datetime
+
+
+class ReadStore:
+    """
+    Résultats publiés par le scheduler, par clé de requête.
+    Un résultat plus vieux que max_age secondes est ignoré (scheduler
+    bloqué ou en erreur) : l'endpoint recalcule alors lui-même.
+    """
+
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self._entries = {}
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.max_age:
+            return None
+        return entry[1]
+
+    def publish(self, key, value) -> None:
+        self._entries[key] = (time.monotonic(), value)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class PrecomputeScheduler:
+    """
+    Boucle asyncio liée au cycle de vie de l'app (start/stop).
+    jobs : liste de (clé, fonction async, args) — la clé est celle sous
+    laquelle le résultat est publié dans le store.
+    """
+
+    def __init__(self, store: ReadStore, jobs: list, period: float):
+        self.store = store
+        self.jobs = jobs
+        self.period = period
+        self.last_run = None
+        self._task = None
+
+    async def run_once(self) -> dict:
+        """Exécute toutes les tâches en parallèle ; retourne les erreurs par clé."""
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(
+            *[func(*args) for _, func, args in self.jobs],
+            return_exceptions=True,
+        )
+        errors = {}
+        for (key, _, _), outcome in zip(self.jobs, outcomes):
+            if isinstance(outcome, Exception):
+                errors[key] = outcome
+            else:
+                self.store.publish(key, outcome)
+
+        self.last_run = datetime.now().isoformat()
+        elapsed = time.perf_counter() - start
+        print(f"🔄 Pré-calcul: {len(self.jobs) - len(errors)}/{len(self.jobs)} tâches en {elapsed:.1f}s")
+        for key, err in errors.items():
+            print(f"⚠️ Pré-calcul {key}: {getattr(err, 'detail', err)}")
+        return errors
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"❌ Erreur scheduler: {e}")
+            await asyncio.sleep(self.period)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,108 @@
+"""
+Sérialisation JSON des DataFrames OHLCV + indicateurs.
+Le DataFrame est découpé AVANT la conversion, puis chaque colonne est
+arrondie et masquée (NaN) en une seule opération NumPy — plus de iterrows().
+
+NumPy n'est importé qu'au premier appel (démarrage à froid de l'API).
+
+Deux formats de sortie :
+- "records" : liste de dicts par bougie (format historique, clés NaN omises)
+- "columns" : dict de listes par colonne ({"timestamp": [...], "close": [...]}),
+              NaN → null
+"""
+import json
+import os
+import sys
+
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telemetry import timed_function
+
+try:
+    import orjson
+except ImportError:  # Dépendance optionnelle : repli sur json de la stdlib
+    orjson = None
+
+
+LAYOUTS = ("records", "columns")
+
+# Colonnes OHLCV : 2 décimales
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+PRICE_DECIMALS = 2
+INDICATOR_DECIMALS = 4
+
+
+def _timestamps(index) -> list:
+    """Index datetime → chaînes ISO 8601 (équivalent de Timestamp.isoformat())."""
+    import numpy as np
+
+    values = np.asarray(index, dtype='datetime64[ns]')
+    unit = 's' if not (values.astype(np.int64) % 1_000_000_000).any() else 'us'
+    return np.datetime_as_string(values, unit=unit).tolist()
+
+
+def _column(df, col: str, decimals: int):
+    """Colonne arrondie (float64) et masque des valeurs valides (non-NaN)."""
+    import numpy as np
+
+    values = np.round(df[col].to_numpy(dtype=np.float64, na_value=np.nan), decimals)
+    return values, ~np.isnan(values)
+
+
+@timed_function("serialize.frame")
+def frame_to_json(df, indicators: list, layout: str = "records"):
+    """
+    Convertit un DataFrame (déjà découpé) dans le format demandé.
+    Les indicateurs absents du DataFrame sont ignorés ; leur nom est mis
+    en minuscules dans la sortie.
+    """
+    import numpy as np
+
+    if layout not in LAYOUTS:
+        raise ValueError(f"Format invalide: {layout}. Utilisez {' ou '.join(LAYOUTS)}.")
+
+    columns = {"timestamp": _timestamps(df.index)}
+    masks = {}
+    for col in PRICE_COLUMNS:
+        columns[col], _ = _column(df, col, PRICE_DECIMALS)
+    for col in indicators:
+        if col in df.columns:
+            columns[col.lower()], masks[col.lower()] = _column(df, col, INDICATOR_DECIMALS)
+
+    if layout == "columns":
+        out = {}
+        for key, values in columns.items():
+            if key in masks and not masks[key].all():
+                values = np.where(masks[key], values, None)
+            out[key] = values if isinstance(values, list) else values.tolist()
+        return out
+
+    # records : une ligne par bougie, les indicateurs NaN sont omis
+    keys = list(columns)
+    rows = zip(*[v if isinstance(v, list) else v.tolist() for v in columns.values()])
+    records = [dict(zip(keys, row)) for row in rows]
+    for key, mask in masks.items():
+        if not mask.all():
+            for i in np.flatnonzero(~mask).tolist():
+                del records[i][key]
+    return records
+
+
+@timed_function("serialize.dumps")
+def dumps(content) -> bytes:
+    """Encodage JSON rapide (orjson si installé, sinon json de la stdlib)."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encodée via dumps() — à retourner directement depuis un
+    endpoint pour court-circuiter jsonable_encoder sur les gros payloads.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
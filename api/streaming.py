@@ -0,0 +1,229 @@
+"""
+Flux temps réel (Server-Sent Events) — bougies, indicateurs et signaux.
+Un canal par (symbole, intervalle) : à chaque tick, la bougie en cours est
+rafraîchie une seule fois, les indicateurs mis à jour en O(1)
+(data/incremental.py), et les événements encodés une seule fois puis
+diffusés à tous les abonnés du canal.
+
+Événements (seuls les deltas sont envoyés) :
+  - snapshot : à l'abonnement — bougie en cours avec ses indicateurs + résumé
+  - candle   : bougie en cours modifiée (OHLCV)
+  - closed   : bougie clôturée avec sa ligne d'indicateurs complète
+  - signal   : signal / règles actives de get_indicator_summary modifiés
+"""
+import asyncio
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import telemetry
+from api.serialization import INDICATOR_DECIMALS, PRICE_COLUMNS, PRICE_DECIMALS, dumps
+from telemetry import timed
+
+# Clés de get_indicator_summary dont un changement déclenche un événement `signal`
+SIGNAL_KEYS = ("signal", "active_rules")
+
+_events = telemetry.REGISTRY.counter(
+    "stream_events_total", "Événements diffusés par type (une fois par canal, pas par client)",
+    labels=("event",))
+_dropped = telemetry.REGISTRY.counter(
+    "stream_dropped_subscribers_total", "Clients déconnectés car trop lents (file pleine)")
+
+
+def _round(key: str, value):
+    if isinstance(value, str):
+        return value
+    value = float(value)
+    if math.isnan(value):
+        return None
+    return round(value, PRICE_DECIMALS if key in PRICE_COLUMNS else INDICATOR_DECIMALS)
+
+
+def _row_json(row: dict, keys=None) -> dict:
+    """Ligne du moteur incrémental → dict JSON (mêmes noms et arrondis que frame_to_json)."""
+    out = {"timestamp": row['timestamp'].isoformat()}
+    for key in keys or row:
+        if key != 'timestamp':
+            out[key if key in PRICE_COLUMNS else key.lower()] = _round(key, row[key])
+    return out
+
+
+def _frame(event: str, data: dict) -> bytes:
+    """Trame SSE encodée une fois, partagée par tous les abonnés."""
+    _events.inc(event=event)
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+class _Channel:
+    """État d'un (symbole, intervalle) : moteur d'indicateurs, abonnés, dernier snapshot."""
+
+    def __init__(self, symbol: str, interval: str, pair: str):
+        self.symbol, self.interval, self.pair = symbol, interval, pair
+        self.subscribers = set()
+        self.engine = None
+        self.snapshot = None        # Trame `snapshot` à jour (envoyée aux nouveaux abonnés)
+        self.task = None
+        self._ohlcv = None          # Dernière bougie en cours diffusée
+        self._signal = None
+
+    def _header(self) -> dict:
+        return {"symbol": self.symbol, "interval": self.interval}
+
+    def start(self, df) -> None:
+        """Initialise le moteur sur l'historique (la dernière bougie est la bougie en cours)."""
+        from data.incremental import IncrementalIndicators
+        self.engine = IncrementalIndicators.from_frame(df)
+        self._ohlcv = tuple(self.engine.last_row[k] for k in PRICE_COLUMNS)
+        self._refresh(emit_signal=False)
+
+    def _refresh(self, emit_signal: bool = True) -> list:
+        """Recalcule le résumé ; retourne [trame signal] si le signal a changé."""
+        import pandas as pd
+        from data.indicators import get_indicator_summary
+
+        rows = [r for r in (self.engine.previous_row, self.engine.last_row) if r is not None]
+        with timed("summary"):
+            summary = get_indicator_summary(pd.DataFrame(rows))
+        self.snapshot = _frame("snapshot", {**self._header(), "candle": _row_json(self.engine.last_row),
+                                            "summary": summary})
+        # Changement = signal ou règles actives (nom, sens) ; le 3e champ des
+        # règles porte des valeurs formatées (« ADX = 23.7 ») qui bougent à chaque tick
+        key = (summary.get("signal"),
+               tuple((name, direction) for name, direction, *_ in summary.get("active_rules") or ()))
+        changed = emit_signal and key != self._signal
+        self._signal = key
+        if not changed:
+            return []
+        signal = {k: summary.get(k) for k in SIGNAL_KEYS}
+        return [_frame("signal", {**self._header(), **signal, "score": summary.get("score")})]
+
+    def apply(self, klines) -> list:
+        """
+        Applique les bougies reçues depuis la bougie en cours (incluse).
+        Toutes sauf la dernière sont clôturées ; retourne les trames à diffuser.
+        """
+        import pandas as pd
+
+        frames = []
+        last = self.engine.last_timestamp
+        for i, k in enumerate(klines):
+            ts = pd.Timestamp(int(k['open_time']), unit='ms')
+            if ts < last:
+                continue
+            row = self.engine.update({'timestamp': ts, **{col: float(k[col]) for col in PRICE_COLUMNS}})
+            if i < len(klines) - 1:
+                frames.append(_frame("closed", {**self._header(), "candle": _row_json(row)}))
+                self._ohlcv = None
+                continue
+            ohlcv = tuple(row[col] for col in PRICE_COLUMNS)
+            if ohlcv != self._ohlcv:
+                self._ohlcv = ohlcv
+                frames.append(_frame("candle", {**self._header(),
+                                                "candle": _row_json(row, ['timestamp', *PRICE_COLUMNS])}))
+        if frames:
+            frames += self._refresh()
+        return frames
+
+
+class StreamHub:
+    """
+    Canaux actifs et leurs abonnés. Un canal démarre (historique + tâche de
+    tick) au premier abonné et s'arrête au départ du dernier ; un client trop
+    lent est déconnecté (EventSource se reconnecte et reçoit un snapshot).
+    """
+
+    def __init__(self, poll_seconds: float = None, lookback: str = None, queue_size: int = None):
+        self.poll_seconds = poll_seconds or config.STREAM_POLL_SECONDS
+        self.lookback = lookback or config.DEFAULT_LOOKBACK
+        self.queue_size = queue_size or config.STREAM_QUEUE_SIZE
+        self._channels = {}
+
+    @property
+    def subscribers(self) -> int:
+        return len({q for channel in self._channels.values() for q in channel.subscribers})
+
+    def subscribe(self, symbols: list, interval: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        for symbol in symbols:
+            key = (symbol, interval)
+            channel = self._channels.get(key)
+            if channel is None:
+                channel = self._channels[key] = _Channel(symbol, interval, config.SYMBOLS[symbol])
+                channel.task = asyncio.create_task(self._run(channel))
+            channel.subscribers.add(queue)
+            if channel.snapshot is not None:
+                queue.put_nowait(channel.snapshot)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, symbols: list, interval: str) -> None:
+        for symbol in symbols:
+            channel = self._channels.get((symbol, interval))
+            if channel is None:
+                continue
+            channel.subscribers.discard(queue)
+            if not channel.subscribers:
+                channel.task.cancel()
+                del self._channels[(symbol, interval)]
+
+    def _broadcast(self, channel: _Channel, frames: list) -> None:
+        for queue in list(channel.subscribers):
+            try:
+                for frame in frames:
+                    queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Client trop lent : on vide sa file et on clôt son flux
+                _dropped.inc()
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+                channel.subscribers.discard(queue)
+
+    async def _run(self, channel: _Channel) -> None:
+        from data.binance_client import get_klines_since_async
+        from data.cache import get_cached_history_async
+
+        while channel.engine is None:
+            try:
+                df = await get_cached_history_async(channel.pair, channel.interval, self.lookback)
+                await asyncio.to_thread(channel.start, df)
+                self._broadcast(channel, [channel.snapshot])
+            except Exception as e:
+                print(f"⚠️ Flux {channel.symbol} {channel.interval}: {e}")
+                await asyncio.sleep(self.poll_seconds)
+
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                since = int(channel.engine.last_timestamp.value // 1_000_000)
+                klines = await get_klines_since_async(channel.pair, channel.interval, since)
+                with timed("stream.tick"):
+                    frames = await asyncio.to_thread(channel.apply, klines)
+            except Exception as e:
+                print(f"⚠️ Flux {channel.symbol} {channel.interval}: {e}")
+                continue
+            if frames:
+                self._broadcast(channel, frames)
+
+    async def events(self, symbols: list, interval: str):
+        """Générateur de trames SSE pour un client (keep-alive si inactif)."""
+        queue = self.subscribe(symbols, interval)
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), config.STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    frame = b": keep-alive\n\n"
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self.unsubscribe(queue, symbols, interval)
+
+    async def close(self) -> None:
+        tasks = [channel.task for channel in self._channels.values()]
+        self._channels.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
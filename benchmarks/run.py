@@ -0,0 +1,222 @@
+"""
+Benchmarks hors ligne du chemin de requête, sur des bougies synthétiques
+déterministes (data/synthetic.py) — aucun appel réseau.
+
+Mesure pour chaque étape et chaque taille : temps (médiane et min sur
+--repeat exécutions) et pic mémoire (tracemalloc, exécution séparée).
+Les résultats sont sauvegardés en JSON pour comparer deux versions.
+
+Usage:
+    python benchmarks/run.py                                   # 90, 1k, 10k, 100k bougies
+    python benchmarks/run.py --sizes 90 1000 --stages add_rsi add_all_indicators
+    python benchmarks/run.py --output avant.json
+    python benchmarks/run.py --compare avant.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import numpy as np
+import pandas as pd
+
+from data import indicators as ind
+from data.synthetic import synthetic_ohlcv
+
+DEFAULT_SIZES = [90, 1_000, 10_000, 100_000]
+RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+
+# Colonnes produites par le pipeline de signaux (retirées avant de le re-mesurer)
+_SIGNAL_COLUMNS = ['Score', 'Signal_strength', 'Signal']
+
+
+# ── Étapes mesurées ──────────────────────────────────
+# nom → (préparation(raw, full) → argument, fonction mesurée, taille max ou None)
+def _stages() -> dict:
+    from api.main import _dashboard_payload, _prices_payload
+    from api.serialization import dumps
+
+    raw = lambda raw, full: raw.copy()
+    stages = {
+        name: (raw, getattr(ind, name), None)
+        for name in ['add_rsi', 'add_macd', 'add_bollinger_bands', 'add_ema', 'add_atr',
+                     'add_volume_analysis', 'add_stochastic', 'add_fibonacci_levels',
+                     'add_pivot_points', 'add_ichimoku', 'add_adx', 'add_vwap']
+    }
+    stages.update({
+        'detect_divergences': (lambda raw, full: ind.add_rsi(raw.copy()), ind.detect_divergences, None),
+        'compute_trading_signals': (lambda raw, full: full.drop(columns=_SIGNAL_COLUMNS),
+                                    ind.compute_trading_signals, None),
+        'add_all_indicators': (raw, ind.add_all_indicators, None),
+        'compute_indicators_float32': (raw, lambda df: ind.compute_indicators(df, dtype=np.float32), None),
+        'get_indicator_summary': (lambda raw, full: full, ind.get_indicator_summary, None),
+        'prices_payload': (lambda raw, full: full, lambda df: dumps(_prices_payload("BTC", "1h", df)), None),
+        'prices_payload_columns': (lambda raw, full: full,
+                                   lambda df: dumps(_prices_payload("BTC", "1h", df, "columns")), None),
+        'dashboard_payload': (lambda raw, full: full, lambda df: dumps(_dashboard_payload("BTC", df)), None),
+        # Prophet : ré-entraînement complet, puis prévision avec le modèle en cache
+        'train_prophet_fit': (raw, lambda df: _prophet(df, refit=True), 10_000),
+        'train_prophet_cached': (raw, lambda df: _prophet(df, refit=False), 10_000),
+        # Modèles NumPy (models/forecast.py) : ajustement complet à chaque appel
+        **{f'train_forecast_{model}': (raw, lambda df, model=model: _forecast(df, model), 10_000)
+           for model in ['holt', 'drift', 'ar']},
+    })
+    return stages
+
+
+def _forecast(df, model: str):
+    from models.forecast import train_forecast
+    return train_forecast(df, "BENCH", 7, interval="1h", model=model)
+
+
+def _prophet(df, refit: bool):
+    from models.prophet_model import train_prophet
+    return train_prophet(df, "BENCH", 7, refit=refit, interval="1h")
+
+
+def _prophet_available() -> bool:
+    try:
+        import prophet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+# ── Mesures ──────────────────────────────────────────
+def _time(prepare, func, raw, full, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        arg = prepare(raw, full)  # Hors chronomètre : copie / prérequis
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _peak_memory(prepare, func, raw, full) -> float:
+    """Pic d'allocations (Mo) pendant un appel — entrées préparées exclues."""
+    arg = prepare(raw, full)
+    tracemalloc.start()
+    try:
+        func(arg)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def run(sizes: list, names: list = None, repeat: int = 5, seed: int = 42) -> list:
+    stages = _stages()
+    if names:
+        unknown = set(names) - set(stages)
+        if unknown:
+            raise KeyError(f"Étapes inconnues: {', '.join(sorted(unknown))}")
+        stages = {name: stages[name] for name in names}
+    if not _prophet_available():
+        skipped = [name for name in stages if name.startswith('train_prophet')]
+        if skipped:
+            print(f"⚠️ Prophet non installé — étapes ignorées: {', '.join(skipped)}")
+        stages = {name: spec for name, spec in stages.items() if name not in skipped}
+
+    results = []
+    for size in sizes:
+        raw = synthetic_ohlcv(size, seed=seed, interval="1h")
+        full = ind.add_all_indicators(raw)
+        print(f"\n📊 {size:,} bougies")
+        for name, (prepare, func, max_size) in stages.items():
+            if max_size is not None and size > max_size:
+                continue
+            func(prepare(raw, full))  # Échauffement (imports, caches)
+            timings = _time(prepare, func, raw, full, repeat)
+            peak = _peak_memory(prepare, func, raw, full)
+            result = {
+                "stage": name,
+                "size": size,
+                "median_ms": float(np.median(timings)) * 1000,
+                "min_ms": min(timings) * 1000,
+                "peak_mb": peak,
+            }
+            results.append(result)
+            print(f"  {name:<28}{result['median_ms']:>10.2f} ms  (min {result['min_ms']:.2f})"
+                  f"{peak:>10.2f} Mo")
+    return results
+
+
+def _metadata(repeat: int, seed: int) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+        "seed": seed,
+    }
+
+
+def compare(results: list, baseline_path: str, threshold: float) -> int:
+    """Compare aux résultats de référence ; retourne le nombre de régressions."""
+    with open(baseline_path) as f:
+        baseline = {(r["stage"], r["size"]): r for r in json.load(f)["results"]}
+
+    print(f"\n{'=' * 78}")
+    print(f"📏 Comparaison avec {baseline_path} (seuil {threshold:.0%})")
+    print("=" * 78)
+    print(f"{'Étape':<28}{'Taille':>8}{'Avant':>11}{'Après':>11}{'Ratio':>8}{'Mémoire':>12}")
+    regressions = 0
+    for r in results:
+        ref = baseline.get((r["stage"], r["size"]))
+        if ref is None:
+            continue
+        ratio = r["median_ms"] / ref["median_ms"] if ref["median_ms"] else float("inf")
+        mem_ratio = r["peak_mb"] / ref["peak_mb"] if ref["peak_mb"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold or mem_ratio > 1 + threshold:
+            regressions += 1
+            flag = " ⚠️"
+        print(f"{r['stage']:<28}{r['size']:>8,}{ref['median_ms']:>9.2f}ms{r['median_ms']:>9.2f}ms"
+              f"{ratio:>7.2f}x{mem_ratio:>11.2f}x{flag}")
+    print(f"\n{'⚠️' if regressions else '✅'} {regressions} régression(s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="⏱️ Benchmarks hors ligne (données synthétiques)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Nombres de bougies")
+    parser.add_argument("--stages", nargs="+", help="Étapes à mesurer (défaut: toutes)")
+    parser.add_argument("--repeat", type=int, default=5, help="Exécutions chronométrées par mesure")
+    parser.add_argument("--seed", type=int, default=42, help="Graine des données synthétiques")
+    parser.add_argument("--output", help="Fichier JSON (défaut: benchmarks/results/<date>.json)")
+    parser.add_argument("--compare", help="Fichier JSON de référence")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Ralentissement toléré avant de signaler une régression (0.2 = +20%%)")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.stages, args.repeat, args.seed)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"meta": _metadata(args.repeat, args.seed), "results": results}, f, indent=2)
+    print(f"\n💾 Résultats: {output}")
+
+    if args.compare:
+        sys.exit(1 if compare(results, args.compare, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,32 @@ Configuration centralisée du projet Crypto Prediction.
 4 cryptos : Bitcoin, Ethereum, Solana, XRP
 """
 import os
-from dotenv import load_dotenv
+import pathlib
+import tempfile
+
+
+def _load_dotenv() -> None:
+    """
+    Charge le premier .env trouvé (répertoire du projet puis parents, comme
+    find_dotenv) — python-dotenv n'est importé que si le fichier existe.
+    """
+    here = pathlib.Path(__file__).resolve().parent
+    for folder in (here, *here.parents):
+        if (folder / ".env").is_file():
+            from dotenv import load_dotenv
+            load_dotenv(folder / ".env")
+            return
 
-load_dotenv()
+
+_load_dotenv()
 
 # ── Binance ──────────────────────────────────────────
 BINANCE_API_KEY = os.getenv("BINANCE_API_KEY", "")
 BINANCE_API_SECRET = os.getenv("BINANCE_API_SECRET", "")
+BINANCE_BASE_URL = os.getenv("BINANCE_BASE_URL", "https://api.binance.com")
+BINANCE_TIMEOUT = float(os.getenv("BINANCE_TIMEOUT", "10"))      # Secondes par requête
+BINANCE_POOL_SIZE = int(os.getenv("BINANCE_POOL_SIZE", "100"))   # Connexions HTTP max (client async)
+BINANCE_WS_URL = os.getenv("BINANCE_WS_URL", "wss://stream.binance.com:9443")  # Flux klines (data/live.py)
 
 # 4 Cryptos à tracker
 SYMBOLS = {
@@ -39,27 +58,55 @@ DEFAULT_LOOKBACK = "90 days ago UTC"
 
 # ── Modèles ──────────────────────────────────────────
 PREDICTION_DAYS = 7
+# /api/predict?model=… — prophet (models/prophet_model.py) ou modèles NumPy (models/forecast.py)
+PREDICTION_MODELS = ["prophet", "holt", "drift", "ar"]
 LSTM_EPOCHS = 50
 LSTM_BATCH_SIZE = 32
 LSTM_SEQUENCE_LENGTH = 60
 
+# ── Backtest ─────────────────────────────────────────
+BACKTEST_FEE = 0.001        # Frais par transaction (0.1% — Binance spot)
+BACKTEST_SLIPPAGE = 0.0005  # Slippage estimé par transaction
+
 # ── API ──────────────────────────────────────────────
 API_HOST = "0.0.0.0"
 API_PORT = 8000
+# En-tête Server-Timing (durées par étape) sur chaque réponse — /metrics est toujours actif
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+# ── Cache mémoire ────────────────────────────────────
+CACHE_MAX_ENTRIES = 64          # Entrées (symbole, intervalle, lookback) max
+CACHE_OPEN_CANDLE_TTL = 30      # Secondes avant de rafraîchir la bougie en cours
 
 # ── Auto-refresh ─────────────────────────────────────
 AUTO_REFRESH_SECONDS = 600  # 10 minutes
+# Pré-calcul en tâche de fond (api/scheduler.py) — désactivé par défaut sur Vercel (serverless)
+PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE_ENABLED", "0" if os.getenv("VERCEL") else "1") == "1"
 
-# ── Paths ────────────────────────────────────────────
-import pathlib
-import tempfile
+# ── Démarrage ────────────────────────────────────────
+# api.main n'importe pandas/NumPy/Prophet qu'au premier usage (démarrage à froid
+# serverless). PRELOAD : les charger en tâche de fond dès le démarrage, backend
+# Stan de Prophet compris — désactivé par défaut sur Vercel (le préchargement
+# prendrait le CPU de la première requête)
+PRELOAD = os.getenv("PRELOAD", "0" if os.getenv("VERCEL") else "1") == "1"
+
+# ── Flux temps réel (websocket → buffers mémoire) ──
+# Désactivé par défaut sur Vercel (pas de connexion persistante en serverless)
+LIVE_ENABLED = os.getenv("LIVE_ENABLED", "0" if os.getenv("VERCEL") else "1") == "1"
+LIVE_BUFFER_CAPACITY = 3000     # Bougies par (symbole, intervalle) — couvre 90 jours en 1h
+LIVE_STALE_SECONDS = 30         # Sans message depuis ce délai → repli sur le REST
 
+# ── Streaming (SSE) ──────────────────────────────────
+STREAM_POLL_SECONDS = 2         # Période de rafraîchissement de la bougie en cours
+STREAM_QUEUE_SIZE = 100         # Événements en attente par client avant déconnexion
+STREAM_KEEPALIVE_SECONDS = 15   # Commentaire SSE envoyé si aucun événement
+
+# ── Paths ────────────────────────────────────────────
 BASE_DIR = pathlib.Path(__file__).parent
 # Use /tmp (tempfile) for Vercel/Serverless read-only filesystem compatibility
 TEMP_DIR = pathlib.Path(tempfile.gettempdir())
 
-DATA_DIR = TEMP_DIR / "crypto_cache"
+# Stockage OHLCV local (data/store.py) — répertoire séparé pour un serveur de rejeu (data/replay_server.py)
+DATA_DIR = pathlib.Path(os.getenv("DATA_DIR", TEMP_DIR / "crypto_cache"))
 MODEL_DIR = TEMP_DIR / "crypto_models"
-
-DATA_DIR.mkdir(parents=True, exist_ok=True)
-MODEL_DIR.mkdir(parents=True, exist_ok=True)
+# Répertoires créés à la première écriture (store.save_klines, ProphetRegistry._save)
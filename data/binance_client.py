@@ -1,63 +1,275 @@
 """
 Module de récupération des données — API publique Binance.
 Pas de clé API nécessaire pour les données OHLCV historiques.
-Pas de cache fichier : Streamlit gère le cache en mémoire.
+Les bougies sont persistées localement (data/store.py) : chaque appel
+ne télécharge que les bougies postérieures à la dernière bougie stockée.
+Chaque fonction a une variante asyncio (suffixe _async) qui partage une
+session aiohttp poolée — l'URL de base est configurable (config.BINANCE_BASE_URL).
+Quand le flux websocket (data/live.py) est actif et à jour, historique
+récent et dernier prix sont lus en mémoire, sans requête.
 """
+import asyncio
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
+import re
 import sys
+import threading
+import time
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from data import live, store
+from telemetry import record, timed
+
+KLINES_LIMIT = 1000  # Maximum Binance par requête
+
+_client = None
+_client_lock = threading.Lock()
+_session = None
+_session_loop = None
+
+_LOOKBACK_RE = re.compile(r"^\s*(\d+)\s+(minute|hour|day|week)s?\s+ago\s+UTC\s*$", re.IGNORECASE)
+_UNIT_MS = {"minute": 60_000, "hour": 3_600_000, "day": 86_400_000, "week": 604_800_000}
+
+
+def _get_client():
+    """Client Binance partagé (session HTTP réutilisée, pas de ping au démarrage)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from binance.client import Client
+                client = Client("", "", requests_params={"timeout": config.BINANCE_TIMEOUT},
+                                ping=False)  # Pas de clé = API publique
+                client.API_URL = config.BINANCE_BASE_URL.rstrip("/") + "/api"
+                _client = client
+    return _client
+
+
+async def _get_session():
+    """Session aiohttp partagée (pool de connexions TCP/TLS), une par event loop."""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        import aiohttp
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=config.BINANCE_POOL_SIZE, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=config.BINANCE_TIMEOUT),
+        )
+        _session_loop = loop
+    return _session
+
+
+async def close_async_session() -> None:
+    """Ferme la session partagée (à appeler à l'arrêt de l'application)."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def _get_json(path: str, params: dict):
+    session = await _get_session()
+    url = config.BINANCE_BASE_URL.rstrip("/") + path
+    async with session.get(url, params=params) as resp:
+        payload = await resp.json(content_type=None)
+        if resp.status >= 400:
+            msg = payload.get("msg") if isinstance(payload, dict) else payload
+            raise ValueError(f"HTTP {resp.status}: {msg}")
+        return payload
+
+
+def _lookback_to_ms(lookback) -> int:
+    """Convertit '90 days ago UTC' (ou un timestamp ms) en timestamp ms."""
+    if isinstance(lookback, (int, np.integer)):
+        return int(lookback)
+    match = _LOOKBACK_RE.match(lookback)
+    if match:
+        return int(time.time() * 1000) - int(match.group(1)) * _UNIT_MS[match.group(2).lower()]
+    from binance.helpers import date_to_milliseconds
+    return date_to_milliseconds(lookback)
+
+
+def _fetch_klines(client, symbol: str, interval: str, start_ms: int, end_ms: int = None) -> list:
+    """Télécharge les klines à partir de start_ms, par pages de 1000."""
+    output = []
+    while True:
+        params = {"symbol": symbol, "interval": interval, "startTime": start_ms, "limit": KLINES_LIMIT}
+        if end_ms is not None:
+            params["endTime"] = end_ms
+        batch = client.get_klines(**params)
+        output += batch
+        if len(batch) < KLINES_LIMIT:
+            return output
+        start_ms = batch[-1][0] + 1
+
+
+async def _fetch_klines_async(symbol: str, interval: str, start_ms: int) -> list:
+    """Variante async de _fetch_klines (endpoint /api/v3/klines)."""
+    output = []
+    while True:
+        batch = await _get_json("/api/v3/klines", {
+            "symbol": symbol, "interval": interval, "startTime": start_ms, "limit": KLINES_LIMIT,
+        })
+        output += batch
+        if len(batch) < KLINES_LIMIT:
+            return output
+        start_ms = batch[-1][0] + 1
+
+
+def _store_since(symbol: str, interval: str, start_ms: int):
+    """
+    Détermine quoi télécharger à partir du stockage local.
+    - Historique couvrant start_ms → fetch incrémental depuis la dernière bougie
+      (re-télécharge la bougie encore ouverte + les nouvelles)
+    - Sinon → téléchargement complet depuis start_ms
+    Retourne (stored, covered_from, since) — since=None pour un fetch complet.
+    """
+    stored, covered_from = store.load_klines(symbol, interval)
+    if len(stored) and covered_from is not None and covered_from <= start_ms:
+        return stored, covered_from, int(stored['open_time'][-1])
+    return stored, covered_from, None
+
+
+def _store_update(symbol: str, interval: str, start_ms: int, stored, covered_from, since, raw: list) -> np.ndarray:
+    """Fusionne les klines téléchargées, sauvegarde et retourne l'historique complet."""
+    new = store.klines_to_array(raw)
+    if since is not None:
+        klines = store.merge_klines(stored, new)
+    else:
+        if len(stored) and len(new) and stored['open_time'][-1] >= new['open_time'][0]:
+            klines = store.merge_klines(stored, new)
+            covered_from = start_ms if covered_from is None else min(covered_from, start_ms)
+        else:
+            # Trou entre le stockage et la nouvelle fenêtre : on repart de zéro
+            klines = new
+            covered_from = start_ms
+    if len(new):
+        store.save_klines(symbol, interval, klines, covered_from)
+    return klines
+
+
+def _history_frame(symbol: str, interval: str, klines: np.ndarray, start_ms: int) -> pd.DataFrame:
+    return _checked_frame(symbol, interval, store.klines_to_frame(store.window(klines, start_ms)))
+
+
+def _checked_frame(symbol: str, interval: str, df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty:
+        raise ValueError(f"Aucune donnée retournée pour {symbol}")
+    
+    # La dernière bougie peut être incomplète (en cours)
+    # On la garde pour avoir le prix le plus récent
+    
+    latest_date = df.index[-1].strftime('%Y-%m-%d %H:%M')
+    print(f"✅ {len(df)} bougies {symbol} ({interval}) — dernière: {latest_date}")
+    return df
+
+
+def _live_frame(symbol: str, interval: str, start_ms: int):
+    """
+    Fenêtre servie par les buffers du flux websocket, ou None (repli REST).
+    Seuls les hits sont chronométrés ("live.frame") : un miss n'ajoute pas
+    d'échantillon quasi nul à l'étape "frame" du chemin REST.
+    """
+    start = time.perf_counter()
+    df = live.feed.frame(symbol, interval, start_ms)
+    if df is None:
+        return None
+    df = _checked_frame(symbol, interval, df)
+    record("live.frame", time.perf_counter() - start)
+    return df
 
 
 def get_historical_data(symbol: str = "BTCUSDT", interval: str = "1d", lookback: str = "365 days ago UTC") -> pd.DataFrame:
     """
     Récupère les données historiques OHLCV depuis l'API publique Binance.
-    Toujours en temps réel — pas de cache fichier.
+    En régime établi, une seule petite requête (bougie en cours + nouvelles
+    bougies) ; la fenêtre demandée est ensuite servie depuis le stockage local.
+    Flux websocket chaud couvrant la fenêtre → aucune requête.
     """
     try:
-        from binance.client import Client
-        client = Client("", "")  # Pas de clé = API publique
-        
-        klines = client.get_historical_klines(symbol, interval, lookback)
-        
-        if not klines:
-            raise ValueError(f"Aucune donnée retournée pour {symbol}")
-        
-        df = pd.DataFrame(klines, columns=[
-            'timestamp', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_volume', 'trades',
-            'taker_buy_base', 'taker_buy_quote', 'ignore'
-        ])
-        
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            df[col] = df[col].astype(float)
-        
-        df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
-        df.set_index('timestamp', inplace=True)
+        start_ms = _lookback_to_ms(lookback)
+        df = _live_frame(symbol, interval, start_ms)
+        if df is not None:
+            return df
+        with timed("store.load"):
+            stored, covered_from, since = _store_since(symbol, interval, start_ms)
+        with timed("fetch"):
+            raw = _fetch_klines(_get_client(), symbol, interval, start_ms if since is None else since)
+        with timed("store.update"):
+            klines = _store_update(symbol, interval, start_ms, stored, covered_from, since, raw)
+        with timed("frame"):
+            return _history_frame(symbol, interval, klines, start_ms)
         
-        # La dernière bougie peut être incomplète (en cours)
-        # On la garde pour avoir le prix le plus récent
-        
-        latest_date = df.index[-1].strftime('%Y-%m-%d %H:%M')
-        print(f"✅ {len(df)} bougies {symbol} ({interval}) — dernière: {latest_date}")
-        return df
+    except Exception as e:
+        print(f"❌ Erreur Binance {symbol}: {e}")
+        raise ValueError(f"Impossible de récupérer les données pour {symbol}: {e}")
+
+
+async def get_historical_data_async(symbol: str = "BTCUSDT", interval: str = "1d", lookback: str = "365 days ago UTC") -> pd.DataFrame:
+    """Variante non bloquante de get_historical_data (session aiohttp partagée)."""
+    try:
+        start_ms = _lookback_to_ms(lookback)
+        df = _live_frame(symbol, interval, start_ms)
+        if df is not None:
+            return df
+        # Seul l'I/O aiohttp reste sur la boucle : lecture/écriture .npz et
+        # construction du DataFrame passent par un thread
+        with timed("store.load"):
+            stored, covered_from, since = await asyncio.to_thread(_store_since, symbol, interval, start_ms)
+        with timed("fetch"):
+            raw = await _fetch_klines_async(symbol, interval, start_ms if since is None else since)
+        with timed("store.update"):
+            klines = await asyncio.to_thread(_store_update, symbol, interval, start_ms,
+                                             stored, covered_from, since, raw)
+        with timed("frame"):
+            return await asyncio.to_thread(_history_frame, symbol, interval, klines, start_ms)
         
     except Exception as e:
         print(f"❌ Erreur Binance {symbol}: {e}")
         raise ValueError(f"Impossible de récupérer les données pour {symbol}: {e}")
 
 
+async def get_klines_since_async(symbol: str, interval: str, start_ms: int) -> np.ndarray:
+    """
+    Bougies ouvertes à partir de start_ms (la dernière est en cours), sans
+    passer par le stockage local — tick des flux temps réel (api/streaming.py).
+    """
+    klines = live.feed.window(symbol, interval, start_ms)
+    if klines is not None:
+        return klines
+    with timed("fetch"):
+        raw = await _fetch_klines_async(symbol, interval, start_ms)
+    return store.klines_to_array(raw)
+
+
 def get_latest_price(symbol: str = "BTCUSDT") -> dict:
     """Récupère le dernier prix en temps réel."""
+    price = live.feed.latest_price(symbol)
+    if price is not None:
+        return {"symbol": symbol, "price": price, "timestamp": datetime.now().isoformat()}
+    try:
+        with timed("fetch.ticker"):
+            ticker = _get_client().get_symbol_ticker(symbol=symbol)
+        return {
+            "symbol": symbol,
+            "price": float(ticker['price']),
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        return {"symbol": symbol, "price": 0, "error": str(e)}
+
+
+async def get_latest_price_async(symbol: str = "BTCUSDT") -> dict:
+    """Variante non bloquante de get_latest_price."""
+    price = live.feed.latest_price(symbol)
+    if price is not None:
+        return {"symbol": symbol, "price": price, "timestamp": datetime.now().isoformat()}
     try:
-        from binance.client import Client
-        client = Client("", "")
-        ticker = client.get_symbol_ticker(symbol=symbol)
+        with timed("fetch.ticker"):
+            ticker = await _get_json("/api/v3/ticker/price", {"symbol": symbol})
         return {
             "symbol": symbol,
             "price": float(ticker['price']),
@@ -0,0 +1,191 @@
+"""
+Cache mémoire des données de marché — partagé par tout le processus.
+Clé (symbole, intervalle, lookback), éviction LRU bornée.
+Une entrée expire à la clôture de la bougie en cours (prochaine frontière
+1h/4h/1d) ou après un court TTL, pour rafraîchir le prix de la bougie ouverte.
+Les DataFrames retournés sont partagés : ne pas les modifier en place.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from telemetry import cache_lookup
+
+# Intervalles Binance de durée fixe ("1M", mois calendaire, n'en fait pas partie)
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def interval_seconds(interval: str) -> int:
+    """'4h' → 14400. ValueError si l'intervalle n'a pas de durée fixe."""
+    unit = _UNIT_SECONDS.get(interval[-1:])
+    if unit is None or not interval[:-1].isdigit():
+        raise ValueError(f"Intervalle non supporté: {interval}")
+    return int(interval[:-1]) * unit
+
+
+def next_candle_close(interval: str, now: float = None) -> float:
+    """Timestamp (s) de la prochaine clôture de bougie — bougies alignées sur l'epoch UTC."""
+    now = time.time() if now is None else now
+    step = interval_seconds(interval)
+    return (now // step + 1) * step
+
+
+def candle_expiry(interval: str, now: float = None) -> float:
+    """Expiration d'une entrée : clôture de la bougie ou TTL de la bougie ouverte."""
+    now = time.time() if now is None else now
+    return min(next_candle_close(interval, now), now + config.CACHE_OPEN_CANDLE_TTL)
+
+
+class CandleCache:
+    """Cache LRU thread-safe avec date d'expiration par entrée."""
+
+    def __init__(self, max_entries: int = None, name: str = "market"):
+        self.max_entries = max_entries or config.CACHE_MAX_ENTRIES
+        self.name = name  # Label des compteurs hit/miss (/metrics)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_entry(self, key):
+        """(valeur, expiration) ou None si absente/expirée."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                entry = None
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        cache_lookup(self._label(key), entry is not None)
+        return entry
+
+    def _label(self, key) -> str:
+        """'market.raw', 'market.indicators' : type d'entrée = 1er élément de la clé."""
+        return f"{self.name}.{key[0]}" if isinstance(key, tuple) else self.name
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return None if entry is None else entry[0]
+
+    def set(self, key, value, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+market_cache = CandleCache()
+
+
+def _history_entry(symbol: str, interval: str, lookback: str):
+    key = ("raw", symbol, interval, lookback)
+    entry = market_cache.get_entry(key)
+    if entry is None:
+        from data.binance_client import get_historical_data
+        entry = (get_historical_data(symbol, interval, lookback), candle_expiry(interval))
+        market_cache.set(key, *entry)
+    return entry
+
+
+def get_cached_history(symbol: str, interval: str = "1d", lookback: str = config.DEFAULT_LOOKBACK):
+    """get_historical_data avec cache (DataFrame OHLCV brut)."""
+    return _history_entry(symbol, interval, lookback)[0]
+
+
+def get_cached_indicators(symbol: str, interval: str = "1d", lookback: str = config.DEFAULT_LOOKBACK):
+    """
+    add_all_indicators(get_historical_data(...)) avec cache.
+    Expire en même temps que le DataFrame brut dont il est dérivé.
+    """
+    key = ("indicators", symbol, interval, lookback)
+    df = market_cache.get(key)
+    if df is None:
+        from data.indicators import add_all_indicators
+        raw, expires_at = _history_entry(symbol, interval, lookback)
+        df = add_all_indicators(raw)
+        market_cache.set(key, df, expires_at)
+    return df
+
+
+# ── Variantes asyncio (client aiohttp, indicateurs dans un thread) ──
+
+class SingleFlight:
+    """
+    Regroupe les requêtes concurrentes identiques (single-flight).
+    Le premier appel pour une clé lance le calcul (coroutine, ou fonction
+    synchrone dans un thread) ; les appels suivants attendent le même
+    résultat (ou la même exception).
+    """
+
+    def __init__(self):
+        self._inflight = {}
+
+    async def run(self, key, func, *args):
+        future = self._inflight.get(key)
+        if future is None:
+            if asyncio.iscoroutinefunction(func):
+                future = asyncio.ensure_future(func(*args))
+            else:
+                future = asyncio.ensure_future(asyncio.to_thread(func, *args))
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+        # shield : un client qui se déconnecte n'annule pas le calcul partagé
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+
+# Calculs en cours, partagés par tout le processus : des miss concurrents sur
+# la même clé (requêtes, pré-calcul, payloads de l'API) attendent le même calcul
+flight = SingleFlight()
+
+
+async def _history_entry_async(symbol: str, interval: str, lookback: str):
+    key = ("raw", symbol, interval, lookback)
+    entry = market_cache.get_entry(key)
+    if entry is None:
+        async def fetch():
+            from data.binance_client import get_historical_data_async
+            fetched = (await get_historical_data_async(symbol, interval, lookback), candle_expiry(interval))
+            market_cache.set(key, *fetched)
+            return fetched
+        entry = await flight.run(key, fetch)
+    return entry
+
+
+async def get_cached_history_async(symbol: str, interval: str = "1d", lookback: str = config.DEFAULT_LOOKBACK):
+    """Variante non bloquante de get_cached_history."""
+    return (await _history_entry_async(symbol, interval, lookback))[0]
+
+
+async def get_cached_indicators_async(symbol: str, interval: str = "1d", lookback: str = config.DEFAULT_LOOKBACK):
+    """Variante non bloquante de get_cached_indicators (calcul pandas hors event loop)."""
+    key = ("indicators", symbol, interval, lookback)
+    df = market_cache.get(key)
+    if df is None:
+        async def compute():
+            from data.indicators import add_all_indicators
+            raw, expires_at = await _history_entry_async(symbol, interval, lookback)
+            computed = await asyncio.to_thread(add_all_indicators, raw)
+            market_cache.set(key, computed, expires_at)
+            return computed
+        df = await flight.run(key, compute)
+    return df
@@ -0,0 +1,394 @@
+"""
+Moteur d'indicateurs incrémental — mise à jour O(1) par bougie.
+Conserve l'état courant de chaque indicateur de data/indicators.py
+(accumulateurs EMA, fenêtres glissantes, deques min/max monotones,
+sommes cumulées VWAP/OBV) et produit la ligne d'indicateurs de la
+nouvelle bougie sans relancer le pipeline pandas.
+
+La dernière ligne émise est identique à la dernière ligne de
+add_all_indicators() calculée sur le même historique.
+"""
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+NAN = float('nan')
+
+
+def _div(a: float, b: float) -> float:
+    """Division IEEE (x/0 → ±inf, 0/0 → NaN) comme pandas/NumPy."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(a) / np.float64(b))
+
+
+# ═══════════════════════════════════════════════════════
+# COMPOSANTS D'ÉTAT
+# ═══════════════════════════════════════════════════════
+
+class _Window:
+    """Fenêtre glissante de taille fixe — moyenne/écart-type façon pandas.rolling."""
+    __slots__ = ('values', 'size')
+
+    def __init__(self, size: int, values=None):
+        self.size = size
+        self.values = deque(values or (), maxlen=size)
+
+    def copy(self):
+        return _Window(self.size, self.values)
+
+    def push(self, x: float) -> None:
+        self.values.append(x)
+
+    def _full(self) -> bool:
+        # min_periods = window : NaN tant que la fenêtre n'est pas pleine de valeurs valides
+        return len(self.values) == self.size and not any(v != v for v in self.values)
+
+    def mean(self) -> float:
+        if not self._full():
+            return NAN
+        return math.fsum(self.values) / self.size
+
+    def std(self) -> float:
+        if not self._full():
+            return NAN
+        m = math.fsum(self.values) / self.size
+        return math.sqrt(math.fsum((v - m) ** 2 for v in self.values) / (self.size - 1))
+
+
+class _Extreme:
+    """Max (ou min) glissant par deque monotone — O(1) amorti."""
+    __slots__ = ('size', 'sign', 'items', 'count')
+
+    def __init__(self, size: int, maximum: bool = True, items=None, count: int = 0):
+        self.size = size
+        self.sign = 1.0 if maximum else -1.0
+        self.items = deque(items or ())
+        self.count = count
+
+    def copy(self):
+        return _Extreme(self.size, self.sign > 0, self.items, self.count)
+
+    def push(self, x: float) -> None:
+        key = self.sign * x
+        while self.items and self.items[-1][1] <= key:
+            self.items.pop()
+        self.items.append((self.count, key))
+        if self.items[0][0] <= self.count - self.size:
+            self.items.popleft()
+        self.count += 1
+
+    def value(self, min_periods: int = None) -> float:
+        min_periods = self.size if min_periods is None else min_periods
+        if min(self.count, self.size) < min_periods:
+            return NAN
+        return self.sign * self.items[0][1]
+
+
+class _EMA:
+    """EMA récursive (pandas ewm(span, adjust=False))."""
+    __slots__ = ('alpha', 'value')
+
+    def __init__(self, span: int, value: float = None):
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = value
+
+    def copy(self):
+        copy = _EMA(1, self.value)
+        copy.alpha = self.alpha
+        return copy
+
+    def push(self, x: float) -> float:
+        if self.value is None:
+            self.value = x
+        else:
+            # Même formule que l'implémentation pandas (division par la somme des poids)
+            old_wt, new_wt = 1.0 - self.alpha, self.alpha
+            self.value = (old_wt * self.value + new_wt * x) / (old_wt + new_wt)
+        return self.value
+
+
+# ═══════════════════════════════════════════════════════
+# MOTEUR
+# ═══════════════════════════════════════════════════════
+
+class _State:
+    """État complet après la dernière bougie validée."""
+
+    def __init__(self):
+        self.count = 0
+        self.prev = None                # Ligne (dict) de la bougie précédente
+        self.rsi_gain = _Window(14)
+        self.rsi_loss = _Window(14)
+        self.ema = {p: _EMA(p) for p in (12, 26, 9, 21, 50, 200)}
+        self.macd_signal = _EMA(9)
+        self.bb = _Window(20)
+        self.bb_width = _Window(20)
+        self.tr = _Window(14)
+        self.vol = _Window(20)
+        self.obv = 0.0
+        self.stoch_low = _Extreme(14, maximum=False)
+        self.stoch_high = _Extreme(14)
+        self.stoch_k = _Window(3)
+        self.fib_high = _Extreme(50)
+        self.fib_low = _Extreme(50, maximum=False)
+        self.ichi = {p: (_Extreme(p), _Extreme(p, maximum=False)) for p in (9, 26, 52)}
+        self.senkou_a = deque([NAN] * 26, maxlen=27)
+        self.senkou_b = deque([NAN] * 26, maxlen=27)
+        self.plus_dm = _Window(14)
+        self.minus_dm = _Window(14)
+        self.dx = _Window(14)
+        self.vwap_pv = 0.0
+        self.vwap_v = 0.0
+        self.div = deque(maxlen=6)      # (close, RSI) des lookback+1 dernières bougies
+        self.score = _Window(3)         # Scores des 3 dernières bougies (Signal_strength)
+
+    def copy(self):
+        new = _State.__new__(_State)
+        for name, value in self.__dict__.items():
+            if isinstance(value, (_Window, _Extreme, _EMA)):
+                value = value.copy()
+            elif isinstance(value, deque):
+                value = deque(value, maxlen=value.maxlen)
+            elif isinstance(value, dict) and name == 'ema':
+                value = {k: v.copy() for k, v in value.items()}
+            elif isinstance(value, dict) and name == 'ichi':
+                value = {k: (h.copy(), l.copy()) for k, (h, l) in value.items()}
+            new.__dict__[name] = value
+        return new
+
+
+class IncrementalIndicators:
+    """
+    Calcule les indicateurs bougie par bougie.
+
+    - update(candle) avec un nouvel open_time → nouvelle bougie
+    - update(candle) avec le même open_time → mise à jour de la bougie en cours
+      (l'état est restauré depuis l'instantané pris avant cette bougie)
+
+    candle : dict avec timestamp, open, high, low, close, volume.
+    """
+
+    DIVERGENCE_LOOKBACK = 5
+
+    def __init__(self):
+        self._state = _State()
+        self._before_last = None        # Instantané avant la dernière bougie
+        self._last_timestamp = None
+        self.last_row = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "IncrementalIndicators":
+        """Initialise le moteur en rejouant un historique OHLCV (O(n), une seule fois)."""
+        engine = cls()
+        for ts, o, h, l, c, v in zip(df.index, df['open'].to_numpy(), df['high'].to_numpy(),
+                                     df['low'].to_numpy(), df['close'].to_numpy(), df['volume'].to_numpy()):
+            engine.update({'timestamp': ts, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v})
+        return engine
+
+    @property
+    def last_timestamp(self):
+        return self._last_timestamp
+
+    @property
+    def previous_row(self):
+        """Ligne de la bougie précédant la dernière (None avant 2 bougies)."""
+        return None if self._before_last is None else self._before_last.prev
+
+    def update(self, candle: dict) -> dict:
+        """Applique une bougie (nouvelle ou mise à jour) et retourne la ligne d'indicateurs."""
+        ts = candle['timestamp']
+        if self._last_timestamp is not None and ts == self._last_timestamp:
+            self._state = self._before_last.copy()
+        elif self._last_timestamp is not None and ts < self._last_timestamp:
+            raise ValueError(f"Bougie antérieure à la dernière reçue: {ts} < {self._last_timestamp}")
+        else:
+            self._before_last = self._state.copy()
+        self._last_timestamp = ts
+        self.last_row = self._step(self._state, candle)
+        return dict(self.last_row)
+
+    # ── Calcul d'une ligne ──
+    def _step(self, st: _State, candle: dict) -> dict:
+        o, h, l, c, v = (float(candle[k]) for k in ('open', 'high', 'low', 'close', 'volume'))
+        prev = st.prev
+        pc = prev['close'] if prev else NAN
+        row = {'timestamp': candle['timestamp'], 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+
+        # RSI — gain/perte de la 1re bougie = 0 (delta NaN remplacé par where)
+        delta = c - pc
+        st.rsi_gain.push(delta if delta > 0 else 0.0)
+        st.rsi_loss.push(-delta if delta < 0 else 0.0)
+        rs = _div(st.rsi_gain.mean(), st.rsi_loss.mean())
+        row['RSI'] = 100 - _div(100, 1 + rs)
+
+        # MACD
+        macd = st.ema[12].push(c) - st.ema[26].push(c)
+        row['MACD'] = macd
+        row['MACD_signal'] = st.macd_signal.push(macd)
+        row['MACD_hist'] = macd - row['MACD_signal']
+
+        # Bollinger
+        st.bb.push(c)
+        sma, std = st.bb.mean(), st.bb.std()
+        row['BB_upper'] = sma + std * 2.0
+        row['BB_middle'] = sma
+        row['BB_lower'] = sma - std * 2.0
+        row['BB_width'] = _div(row['BB_upper'] - row['BB_lower'], sma)
+        row['BB_percent'] = _div(c - row['BB_lower'], row['BB_upper'] - row['BB_lower'])
+
+        # EMA
+        for p in (9, 21, 50, 200):
+            row[f'EMA_{p}'] = st.ema[p].push(c)
+
+        # ATR — True Range (max en ignorant les NaN de la 1re bougie)
+        tr = max(x for x in (h - l, abs(h - pc), abs(l - pc)) if x == x)
+        st.tr.push(tr)
+        atr = st.tr.mean()
+        row['ATR'] = atr
+        row['ATR_pct'] = _div(atr, c) * 100
+
+        # Volume & OBV
+        st.vol.push(v)
+        row['Volume_SMA'] = st.vol.mean()
+        row['Volume_ratio'] = _div(v, row['Volume_SMA'])
+        if prev:
+            st.obv += float(np.sign(delta)) * v
+        row['OBV'] = st.obv
+
+        # Stochastique
+        st.stoch_low.push(l)
+        st.stoch_high.push(h)
+        low_min, high_max = st.stoch_low.value(), st.stoch_high.value()
+        row['Stoch_K'] = _div(100 * (c - low_min), high_max - low_min)
+        st.stoch_k.push(row['Stoch_K'])
+        row['Stoch_D'] = st.stoch_k.mean()
+
+        # Fibonacci — swing des 50 dernières bougies
+        st.fib_high.push(h)
+        st.fib_low.push(l)
+        fib_high, fib_low = st.fib_high.value(min_periods=1), st.fib_low.value(min_periods=1)
+        diff = fib_high - fib_low
+        row['Fib_0'] = fib_high
+        for name, ratio in (('Fib_236', 0.236), ('Fib_382', 0.382), ('Fib_500', 0.500),
+                            ('Fib_618', 0.618), ('Fib_786', 0.786)):
+            row[name] = fib_high - diff * ratio
+        row['Fib_100'] = fib_low
+
+        # Pivots — bougie précédente
+        ph, pl = (prev['high'], prev['low']) if prev else (NAN, NAN)
+        pp = (ph + pl + pc) / 3
+        row['Pivot'] = pp
+        row['R1'] = 2 * pp - pl
+        row['S1'] = 2 * pp - ph
+        row['R2'] = pp + (ph - pl)
+        row['S2'] = pp - (ph - pl)
+        row['R3'] = ph + 2 * (pp - pl)
+        row['S3'] = pl - 2 * (ph - pp)
+
+        # Ichimoku
+        mids = {}
+        for p, (hi, lo) in st.ichi.items():
+            hi.push(h)
+            lo.push(l)
+            mids[p] = (hi.value() + lo.value()) / 2
+        row['Ichimoku_tenkan'] = mids[9]
+        row['Ichimoku_kijun'] = mids[26]
+        st.senkou_a.append((mids[9] + mids[26]) / 2)
+        st.senkou_b.append(mids[52])
+        row['Ichimoku_senkou_a'] = st.senkou_a[0]
+        row['Ichimoku_senkou_b'] = st.senkou_b[0]
+
+        # ADX — même séquence que add_adx (minus_dm comparé au plus_dm filtré)
+        plus_dm = h - ph
+        minus_dm = -(l - pl)
+        plus_dm = plus_dm if (plus_dm > minus_dm and plus_dm > 0) else 0.0
+        minus_dm = minus_dm if (minus_dm > plus_dm and minus_dm > 0) else 0.0
+        st.plus_dm.push(plus_dm)
+        st.minus_dm.push(minus_dm)
+        plus_di = 100 * _div(st.plus_dm.mean(), atr)
+        minus_di = 100 * _div(st.minus_dm.mean(), atr)
+        st.dx.push(_div(100 * abs(plus_di - minus_di), plus_di + minus_di))
+        row['ADX'] = st.dx.mean()
+        row['DI_plus'] = plus_di
+        row['DI_minus'] = minus_di
+
+        # VWAP
+        st.vwap_pv += (h + l + c) / 3 * v
+        st.vwap_v += v
+        row['VWAP'] = _div(st.vwap_pv, st.vwap_v)
+
+        # Divergences RSI
+        lb = self.DIVERGENCE_LOOKBACK
+        st.div.append((c, row['RSI']))
+        row['Divergence'] = 'NONE'
+        if st.count >= lb * 2:
+            past_c, past_rsi = st.div[0]
+            if c < past_c and row['RSI'] > past_rsi:
+                row['Divergence'] = 'BULLISH_DIV'
+            elif c > past_c and row['RSI'] < past_rsi:
+                row['Divergence'] = 'BEARISH_DIV'
+
+        self._score(st, row, prev)
+
+        st.prev = row
+        st.count += 1
+        return row
+
+    @staticmethod
+    def _score(st: _State, row: dict, prev: dict) -> None:
+        """Règles 1 à 10 de compute_trading_signals appliquées à une seule ligne."""
+        prev = prev or {}
+        p = lambda key: prev.get(key, NAN)
+        score = 0.0
+
+        rsi = row['RSI']
+        score += 2 * (rsi < 20) + (rsi < 30) - 2 * (rsi > 80) - (rsi > 70)
+
+        macd, sig = row['MACD'], row['MACD_signal']
+        score += 2 * (macd > sig and p('MACD') <= p('MACD_signal'))
+        score -= 2 * (macd < sig and p('MACD') >= p('MACD_signal'))
+        score += 0.5 * (row['MACD_hist'] > 0) - 0.5 * (row['MACD_hist'] < 0)
+
+        e9, e21 = row['EMA_9'], row['EMA_21']
+        score += 2 * (e9 > e21 and p('EMA_9') <= p('EMA_21'))
+        score -= 2 * (e9 < e21 and p('EMA_9') >= p('EMA_21'))
+        score += (row['EMA_50'] > row['EMA_200']) - (row['EMA_50'] < row['EMA_200'])
+
+        score += 1.5 * (row['BB_percent'] < 0) - 1.5 * (row['BB_percent'] > 1)
+        st.bb_width.push(row['BB_width'])
+        score += 0.5 * (row['BB_width'] < st.bb_width.mean() * 0.5)
+
+        k, d = row['Stoch_K'], row['Stoch_D']
+        score += 2 * (k > d and p('Stoch_K') <= p('Stoch_D') and k < 20)
+        score -= 2 * (k < d and p('Stoch_K') >= p('Stoch_D') and k > 80)
+
+        if row['ADX'] > 25:
+            score += (row['DI_plus'] > row['DI_minus']) - (row['DI_plus'] < row['DI_minus'])
+
+        if row['Volume_ratio'] > 1.5:
+            score += (row['close'] > p('close')) - (row['close'] < p('close'))
+
+        score += 2 * (row['Divergence'] == 'BULLISH_DIV') - 2 * (row['Divergence'] == 'BEARISH_DIV')
+
+        c = row['close']
+        score += 0.5 * (c > row['R1']) + 0.5 * (c > row['R2'])
+        score -= 0.5 * (c < row['S1']) + 0.5 * (c < row['S2'])
+
+        score += 1 * (abs(c - row['Fib_618']) / c < 0.01) + 0.5 * (abs(c - row['Fib_382']) / c < 0.01)
+
+        row['Score'] = float(score)
+        st.score.push(row['Score'])
+        strength = st.score.mean()
+        row['Signal_strength'] = strength
+        if strength > 3:
+            row['Signal'] = 'STRONG_BUY'
+        elif strength > 1:
+            row['Signal'] = 'BUY'
+        elif strength < -3:
+            row['Signal'] = 'STRONG_SELL'
+        elif strength < -1:
+            row['Signal'] = 'SELL'
+        else:
+            row['Signal'] = 'NEUTRAL'
@@ -2,106 +2,338 @@
 Indicateurs techniques et règles d'analyse mathématique avancées.
 Inclut : RSI, MACD, Bollinger, EMA, ATR, Stochastic, Fibonacci,
 Pivot Points, Ichimoku Cloud, divergences, et signaux composites.
+
+Chaque indicateur est déclaré dans un registre (entrées → sorties) :
+compute_indicators(df, columns=[...]) n'exécute que le sous-graphe
+nécessaire, avec les intermédiaires communs (true range, OHLC décalés)
+calculés une seule fois.
+
+Le cœur travaille sur des tableaux NumPy float64 contigus extraits une
+seule fois du DataFrame ; les sorties sont écrites dans un buffer 2-D
+préalloué, transformé en DataFrame uniquement à la fin.
+
+Toutes les fonctions publiques acceptent aussi un OHLCVRingBuffer
+(data/ringbuffer.py) : ses colonnes sont lues sans copie et le résultat
+est un nouveau DataFrame indexé par timestamp.
 """
+import os
+import sys
+
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.ringbuffer import OHLCVRingBuffer
+from telemetry import timed
+
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+_CHUNK = 16384  # Lignes par bloc pour les fenêtres glissantes (borne la mémoire temporaire)
+
+
+# ═══════════════════════════════════════════════════════
+# NOYAUX NUMPY
+# ═══════════════════════════════════════════════════════
+
+def _shift(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    if periods < len(x):
+        out[periods:] = x[:len(x) - periods]
+    return out
+
+
+def _diff(x: np.ndarray) -> np.ndarray:
+    return x - _shift(x)
+
+
+def _rolling(x: np.ndarray, window: int, reducer) -> np.ndarray:
+    """
+    Fenêtre glissante équivalente à pandas.rolling(window) (min_periods=window) :
+    NaN tant que la fenêtre n'est pas complète ou contient un NaN.
+    """
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        view = sliding_window_view(x, window)
+        for start in range(0, len(view), _CHUNK):
+            block = view[start:start + _CHUNK]
+            out[window - 1 + start:window - 1 + start + len(block)] = reducer(block)
+    return out
+
+
+def _rolling_mean(x, window):
+    return _rolling(x, window, lambda v: v.mean(axis=1))
+
+
+def _rolling_std(x, window):
+    return _rolling(x, window, lambda v: v.std(axis=1, ddof=1))
+
+
+def _rolling_extreme(x: np.ndarray, window: int, ufunc, identity: float,
+                     partial: bool = False) -> np.ndarray:
+    """
+    Max/min glissant en O(n) (van Herk / Gil-Werman) : cumuls préfixe et suffixe
+    par blocs de `window`, chaque fenêtre chevauchant au plus deux blocs.
+    partial=True : fenêtres incomplètes en début de série (min_periods=1).
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    if partial:
+        out[:window - 1] = ufunc.accumulate(x[:window - 1])
+    if n >= window:
+        blocks = np.concatenate([x, np.full(-n % window, identity)]).reshape(-1, window)
+        prefix = ufunc.accumulate(blocks, axis=1).ravel()
+        suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+        out[window - 1:] = ufunc(suffix[:n - window + 1], prefix[window - 1:n])
+    return out
+
+
+def _rolling_max(x, window, partial: bool = False):
+    return _rolling_extreme(x, window, np.maximum, -np.inf, partial)
+
+
+def _rolling_min(x, window, partial: bool = False):
+    return _rolling_extreme(x, window, np.minimum, np.inf, partial)
+
+
+def _nan_rolling_extreme(x, window, rolling, identity: float) -> np.ndarray:
+    """Max/min glissant ignorant les NaN (fenêtres partielles acceptées)."""
+    out = rolling(np.where(np.isnan(x), identity, x), window, partial=True)
+    out[out == identity] = np.nan  # Fenêtre sans aucune valeur
+    return out
+
+
+def _ewm(x: np.ndarray, span: int) -> np.ndarray:
+    """EMA récursive (adjust=False) — boucle Cython de pandas, sans index ni alignement."""
+    return pd.Series(x, copy=False).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def _label_mask(values, label: str) -> np.ndarray:
+    """values == label, sans matérialiser les chaînes pour un Categorical."""
+    if isinstance(values, pd.Categorical):
+        return values.codes == values.categories.get_loc(label)
+    return np.asarray(values) == label
+
+
+# ═══════════════════════════════════════════════════════
+# INTERMÉDIAIRES PARTAGÉS
+# ═══════════════════════════════════════════════════════
+
+_INTERMEDIATES = {
+    'prev_high': lambda c: _shift(c['high']),
+    'prev_low': lambda c: _shift(c['low']),
+    'prev_close': lambda c: _shift(c['close']),
+    # True Range = max(H-L, |H-Cprev|, |L-Cprev|) — utilisé par ATR et ADX
+    'true_range': lambda c: np.fmax(
+        c['high'] - c['low'],
+        np.fmax(np.abs(c['high'] - c['prev_close']), np.abs(c['low'] - c['prev_close'])),
+    ),
+}
+
+
+class _Arrays(dict):
+    """
+    Colonnes sous forme de tableaux NumPy, extraites du DataFrame à la demande
+    (vues directes pour un OHLCVRingBuffer) ; les intermédiaires sont calculés
+    à la demande, une seule fois.
+    """
+
+    def __init__(self, df):
+        super().__init__()
+        if isinstance(df, OHLCVRingBuffer):
+            self.update(df.arrays())
+            df = None
+        self._df = df
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or (self._df is not None and key in self._df.columns)
+
+    def __missing__(self, key):
+        if self._df is not None and key in self._df.columns:
+            values = self._df[key]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.array
+            elif values.dtype.kind in 'fiub':
+                values = np.ascontiguousarray(values.to_numpy(dtype=np.float64))
+            else:
+                values = values.to_numpy()
+        elif key in _INTERMEDIATES:
+            values = _INTERMEDIATES[key](self)
+        else:
+            raise KeyError(key)
+        self[key] = values
+        return values
+
+
+def _apply(df: pd.DataFrame, func, *args) -> pd.DataFrame:
+    """
+    Exécute une étape sur le DataFrame et y ajoute ses colonnes (API historique).
+    Un OHLCVRingBuffer donne un nouveau DataFrame (copie de ses bougies).
+    """
+    cols = _Arrays(df)
+    if isinstance(df, OHLCVRingBuffer):
+        df = df.to_frame(copy=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = func(cols, *args)
+    for col, values in result.items():
+        df[col] = values
+    return df
 
 
 # ═══════════════════════════════════════════════════════
 # INDICATEURS DE BASE
 # ═══════════════════════════════════════════════════════
 
+def _rsi(c, period: int = 14) -> dict:
+    delta = _diff(c['close'])
+    # La 1re variation (NaN) compte comme 0, comme delta.where(...)
+    gain = _rolling_mean(np.where(delta > 0, delta, 0.0), period)
+    loss = _rolling_mean(np.where(delta < 0, -delta, 0.0), period)
+    rs = gain / loss
+    return {'RSI': 100 - (100 / (1 + rs))}
+
+
 def add_rsi(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
     """RSI (Relative Strength Index) — Wilder's smoothing."""
-    delta = df['close'].diff()
-    gain = delta.where(delta > 0, 0).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
-    return df
+    return _apply(df, _rsi, period)
+
+
+def _macd(c, fast: int = 12, slow: int = 26, signal: int = 9) -> dict:
+    macd = _ewm(c['close'], fast) - _ewm(c['close'], slow)
+    macd_signal = _ewm(macd, signal)
+    return {'MACD': macd, 'MACD_signal': macd_signal, 'MACD_hist': macd - macd_signal}
 
 
 def add_macd(df: pd.DataFrame, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame:
     """MACD (Moving Average Convergence Divergence)."""
-    ema_fast = df['close'].ewm(span=fast, adjust=False).mean()
-    ema_slow = df['close'].ewm(span=slow, adjust=False).mean()
-    df['MACD'] = ema_fast - ema_slow
-    df['MACD_signal'] = df['MACD'].ewm(span=signal, adjust=False).mean()
-    df['MACD_hist'] = df['MACD'] - df['MACD_signal']
-    return df
+    return _apply(df, _macd, fast, slow, signal)
+
+
+def _bollinger(c, period: int = 20, std_dev: float = 2.0) -> dict:
+    sma = _rolling_mean(c['close'], period)
+    std = _rolling_std(c['close'], period)
+    upper = sma + (std * std_dev)
+    lower = sma - (std * std_dev)
+    return {
+        'BB_upper': upper,
+        'BB_middle': sma,
+        'BB_lower': lower,
+        'BB_width': (upper - lower) / sma,
+        'BB_percent': (c['close'] - lower) / (upper - lower),
+    }
 
 
 def add_bollinger_bands(df: pd.DataFrame, period: int = 20, std_dev: float = 2.0) -> pd.DataFrame:
     """Bandes de Bollinger."""
-    sma = df['close'].rolling(window=period).mean()
-    std = df['close'].rolling(window=period).std()
-    df['BB_upper'] = sma + (std * std_dev)
-    df['BB_middle'] = sma
-    df['BB_lower'] = sma - (std * std_dev)
-    df['BB_width'] = (df['BB_upper'] - df['BB_lower']) / df['BB_middle']
-    df['BB_percent'] = (df['close'] - df['BB_lower']) / (df['BB_upper'] - df['BB_lower'])
-    return df
+    return _apply(df, _bollinger, period, std_dev)
+
+
+def _ema(c, periods: list = [9, 21, 50, 200]) -> dict:
+    return {f'EMA_{period}': _ewm(c['close'], period) for period in periods}
 
 
 def add_ema(df: pd.DataFrame, periods: list = [9, 21, 50, 200]) -> pd.DataFrame:
     """EMA (Exponential Moving Averages) — 9, 21, 50, 200."""
-    for period in periods:
-        df[f'EMA_{period}'] = df['close'].ewm(span=period, adjust=False).mean()
-    return df
+    return _apply(df, _ema, periods)
+
+
+def _atr(c, period: int = 14) -> dict:
+    atr = _rolling_mean(c['true_range'], period)
+    return {'ATR': atr, 'ATR_pct': (atr / c['close']) * 100}
 
 
 def add_atr(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
     """ATR (Average True Range) — mesure de volatilité."""
-    high_low = df['high'] - df['low']
-    high_close = np.abs(df['high'] - df['close'].shift())
-    low_close = np.abs(df['low'] - df['close'].shift())
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    df['ATR'] = tr.rolling(window=period).mean()
-    df['ATR_pct'] = (df['ATR'] / df['close']) * 100
-    return df
+    return _apply(df, _atr, period)
+
+
+def _volume(c, period: int = 20) -> dict:
+    volume_sma = _rolling_mean(c['volume'], period)
+    # OBV (On-Balance Volume)
+    obv = np.sign(_diff(c['close'])) * c['volume']
+    obv[np.isnan(obv)] = 0
+    return {
+        'Volume_SMA': volume_sma,
+        'Volume_ratio': c['volume'] / volume_sma,
+        'OBV': np.cumsum(obv),
+    }
 
 
 def add_volume_analysis(df: pd.DataFrame, period: int = 20) -> pd.DataFrame:
     """Analyse du volume avec ratio et OBV."""
-    df['Volume_SMA'] = df['volume'].rolling(window=period).mean()
-    df['Volume_ratio'] = df['volume'] / df['Volume_SMA']
-    # OBV (On-Balance Volume)
-    df['OBV'] = (np.sign(df['close'].diff()) * df['volume']).fillna(0).cumsum()
-    return df
+    return _apply(df, _volume, period)
+
+
+def _stochastic(c, k_period: int = 14, d_period: int = 3) -> dict:
+    low_min = _rolling_min(c['low'], k_period)
+    high_max = _rolling_max(c['high'], k_period)
+    stoch_k = 100 * (c['close'] - low_min) / (high_max - low_min)
+    return {'Stoch_K': stoch_k, 'Stoch_D': _rolling_mean(stoch_k, d_period)}
 
 
 def add_stochastic(df: pd.DataFrame, k_period: int = 14, d_period: int = 3) -> pd.DataFrame:
     """Oscillateur Stochastique %K et %D."""
-    low_min = df['low'].rolling(window=k_period).min()
-    high_max = df['high'].rolling(window=k_period).max()
-    df['Stoch_K'] = 100 * (df['close'] - low_min) / (high_max - low_min)
-    df['Stoch_D'] = df['Stoch_K'].rolling(window=d_period).mean()
-    return df
+    return _apply(df, _stochastic, k_period, d_period)
 
 
 # ═══════════════════════════════════════════════════════
 # INDICATEURS AVANCÉS
 # ═══════════════════════════════════════════════════════
 
-def add_fibonacci_levels(df: pd.DataFrame, lookback: int = 50) -> pd.DataFrame:
+FIBONACCI_MODES = ('rolling', 'latest')
+
+
+def _fibonacci(c, lookback: int = 50, mode: str = 'rolling') -> dict:
+    if mode == 'rolling':
+        # Chaque ligne ne voit que les `lookback` dernières bougies (pas de look-ahead)
+        high = _nan_rolling_extreme(c['high'], lookback, _rolling_max, -np.inf)
+        low = _nan_rolling_extreme(c['low'], lookback, _rolling_min, np.inf)
+    elif mode == 'latest':
+        # Dernier swing, diffusé sur tout l'historique
+        if len(c['high']) == 0:
+            high = low = np.nan
+        else:
+            high = np.nanmax(c['high'][-lookback:])
+            low = np.nanmin(c['low'][-lookback:])
+    else:
+        raise ValueError(f"Mode Fibonacci invalide: {mode}. Utilisez {' ou '.join(FIBONACCI_MODES)}.")
+    diff = high - low
+    return {
+        'Fib_0': high,                          # 0% (résistance)
+        'Fib_236': high - diff * 0.236,         # 23.6%
+        'Fib_382': high - diff * 0.382,         # 38.2%
+        'Fib_500': high - diff * 0.500,         # 50%
+        'Fib_618': high - diff * 0.618,         # 61.8% (Golden ratio)
+        'Fib_786': high - diff * 0.786,         # 78.6%
+        'Fib_100': low,                         # 100% (support)
+    }
+
+
+def add_fibonacci_levels(df: pd.DataFrame, lookback: int = 50, mode: str = 'rolling') -> pd.DataFrame:
     """
-    Niveaux de Fibonacci basés sur le dernier swing high/low.
+    Niveaux de Fibonacci basés sur le swing high/low des `lookback` dernières bougies.
     Ratios: 0%, 23.6%, 38.2%, 50%, 61.8%, 78.6%, 100%
-    """
-    recent = df.tail(lookback)
-    high = recent['high'].max()
-    low = recent['low'].min()
-    diff = high - low
-    
-    df['Fib_0'] = high                          # 0% (résistance)
-    df['Fib_236'] = high - diff * 0.236         # 23.6%
-    df['Fib_382'] = high - diff * 0.382         # 38.2%
-    df['Fib_500'] = high - diff * 0.500         # 50%
-    df['Fib_618'] = high - diff * 0.618         # 61.8% (Golden ratio)
-    df['Fib_786'] = high - diff * 0.786         # 78.6%
-    df['Fib_100'] = low                         # 100% (support)
     
-    return df
+    - mode='rolling' : niveaux point-in-time, chaque ligne calculée sur sa
+      propre fenêtre glissante — valide pour les signaux historiques/backtests
+    - mode='latest'  : niveaux du dernier swing diffusés sur toutes les lignes
+    La dernière ligne est identique dans les deux modes.
+    """
+    return _apply(df, _fibonacci, lookback, mode)
+
+
+def _pivots(c) -> dict:
+    high, low, close = c['prev_high'], c['prev_low'], c['prev_close']
+    pp = (high + low + close) / 3
+    return {
+        'Pivot': pp,
+        'R1': 2 * pp - low,
+        'S1': 2 * pp - high,
+        'R2': pp + (high - low),
+        'S2': pp - (high - low),
+        'R3': high + 2 * (pp - low),
+        'S3': low - 2 * (high - pp),
+    }
 
 
 def add_pivot_points(df: pd.DataFrame) -> pd.DataFrame:
@@ -111,15 +343,27 @@ def add_pivot_points(df: pd.DataFrame) -> pd.DataFrame:
     R1 = 2*PP - Low, S1 = 2*PP - High
     R2 = PP + (High - Low), S2 = PP - (High - Low)
     """
-    pp = (df['high'].shift(1) + df['low'].shift(1) + df['close'].shift(1)) / 3
-    df['Pivot'] = pp
-    df['R1'] = 2 * pp - df['low'].shift(1)
-    df['S1'] = 2 * pp - df['high'].shift(1)
-    df['R2'] = pp + (df['high'].shift(1) - df['low'].shift(1))
-    df['S2'] = pp - (df['high'].shift(1) - df['low'].shift(1))
-    df['R3'] = df['high'].shift(1) + 2 * (pp - df['low'].shift(1))
-    df['S3'] = df['low'].shift(1) - 2 * (df['high'].shift(1) - pp)
-    return df
+    return _apply(df, _pivots)
+
+
+def _ichimoku(c) -> dict:
+    # Tenkan-sen (ligne de conversion) — 9 périodes
+    tenkan = (_rolling_max(c['high'], 9) + _rolling_min(c['low'], 9)) / 2
+    
+    # Kijun-sen (ligne de base) — 26 périodes
+    kijun = (_rolling_max(c['high'], 26) + _rolling_min(c['low'], 26)) / 2
+    
+    # Senkou Span B (leading) — 52 périodes, projetée 26 périodes
+    high_52 = _rolling_max(c['high'], 52)
+    low_52 = _rolling_min(c['low'], 52)
+    
+    return {
+        'Ichimoku_tenkan': tenkan,
+        'Ichimoku_kijun': kijun,
+        # Senkou Span A (leading) — moyenne des deux lignes, projetée 26 périodes
+        'Ichimoku_senkou_a': _shift((tenkan + kijun) / 2, 26),
+        'Ichimoku_senkou_b': _shift((high_52 + low_52) / 2, 26),
+    }
 
 
 def add_ichimoku(df: pd.DataFrame) -> pd.DataFrame:
@@ -127,25 +371,22 @@ def add_ichimoku(df: pd.DataFrame) -> pd.DataFrame:
     Ichimoku Cloud (Kumo) — système complet d'analyse.
     Tenkan-sen (conversion), Kijun-sen (base), Senkou Span A/B, Chikou Span.
     """
-    # Tenkan-sen (ligne de conversion) — 9 périodes
-    high_9 = df['high'].rolling(window=9).max()
-    low_9 = df['low'].rolling(window=9).min()
-    df['Ichimoku_tenkan'] = (high_9 + low_9) / 2
-    
-    # Kijun-sen (ligne de base) — 26 périodes
-    high_26 = df['high'].rolling(window=26).max()
-    low_26 = df['low'].rolling(window=26).min()
-    df['Ichimoku_kijun'] = (high_26 + low_26) / 2
+    return _apply(df, _ichimoku)
+
+
+def _adx(c, period: int = 14) -> dict:
+    plus_dm = c['high'] - c['prev_high']
+    minus_dm = -(c['low'] - c['prev_low'])
+    plus_dm = np.where((plus_dm > minus_dm) & (plus_dm > 0), plus_dm, 0.0)
+    minus_dm = np.where((minus_dm > plus_dm) & (minus_dm > 0), minus_dm, 0.0)
     
-    # Senkou Span A (leading) — moyenne des deux lignes, projetée 26 périodes
-    df['Ichimoku_senkou_a'] = ((df['Ichimoku_tenkan'] + df['Ichimoku_kijun']) / 2).shift(26)
+    atr = _rolling_mean(c['true_range'], period)
     
-    # Senkou Span B (leading) — 52 périodes, projetée 26 périodes
-    high_52 = df['high'].rolling(window=52).max()
-    low_52 = df['low'].rolling(window=52).min()
-    df['Ichimoku_senkou_b'] = ((high_52 + low_52) / 2).shift(26)
+    plus_di = 100 * (_rolling_mean(plus_dm, period) / atr)
+    minus_di = 100 * (_rolling_mean(minus_dm, period) / atr)
     
-    return df
+    dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    return {'ADX': _rolling_mean(dx, period), 'DI_plus': plus_di, 'DI_minus': minus_di}
 
 
 def add_adx(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
@@ -153,187 +394,284 @@ def add_adx(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
     ADX (Average Directional Index) — force de la tendance.
     ADX > 25 = tendance forte, ADX < 20 = range/consolidation.
     """
-    plus_dm = df['high'].diff()
-    minus_dm = -df['low'].diff()
-    plus_dm = plus_dm.where((plus_dm > minus_dm) & (plus_dm > 0), 0)
-    minus_dm = minus_dm.where((minus_dm > plus_dm) & (minus_dm > 0), 0)
-    
-    atr = pd.concat([
-        df['high'] - df['low'],
-        np.abs(df['high'] - df['close'].shift()),
-        np.abs(df['low'] - df['close'].shift())
-    ], axis=1).max(axis=1).rolling(window=period).mean()
-    
-    plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
-    minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
-    
-    dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
-    df['ADX'] = dx.rolling(window=period).mean()
-    df['DI_plus'] = plus_di
-    df['DI_minus'] = minus_di
-    return df
+    return _apply(df, _adx, period)
+
+
+def _vwap(c) -> dict:
+    typical_price = (c['high'] + c['low'] + c['close']) / 3
+    return {'VWAP': np.cumsum(typical_price * c['volume']) / np.cumsum(c['volume'])}
 
 
 def add_vwap(df: pd.DataFrame) -> pd.DataFrame:
     """VWAP (Volume Weighted Average Price) — rolling."""
-    typical_price = (df['high'] + df['low'] + df['close']) / 3
-    df['VWAP'] = (typical_price * df['volume']).cumsum() / df['volume'].cumsum()
-    return df
+    return _apply(df, _vwap)
 
 
 # ═══════════════════════════════════════════════════════
 # RÈGLES DE TRADING MATHÉMATIQUES
 # ═══════════════════════════════════════════════════════
 
-def detect_divergences(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Détecte les divergences RSI haussières et baissières.
-    - Divergence haussière : prix fait un lower low, RSI fait un higher low → signal d'achat
-    - Divergence baissière : prix fait un higher high, RSI fait un lower high → signal de vente
-    """
-    lookback = 5
-    df['Divergence'] = 'NONE'
-    
-    if 'RSI' not in df.columns or len(df) < lookback * 2:
-        return df
+DIVERGENCE_LABELS = ['NONE', 'BULLISH_DIV', 'BEARISH_DIV']
+SIGNAL_LABELS = ['NEUTRAL', 'STRONG_BUY', 'BUY', 'STRONG_SELL', 'SELL']
+
+
+def _divergences(c, lookback: int = 5) -> dict:
+    n = len(c['close'])
+    codes = np.zeros(n, dtype=np.int8)
     
-    for i in range(lookback * 2, len(df)):
-        # Vérifier divergence haussière
-        price_window = df['close'].iloc[i-lookback:i+1]
-        rsi_window = df['RSI'].iloc[i-lookback:i+1]
+    if 'RSI' in c and n >= lookback * 2:
+        close, rsi = c['close'], c['RSI']
+        now, past = slice(lookback * 2, None), slice(lookback, n - lookback)
         
-        if price_window.iloc[-1] < price_window.iloc[0] and rsi_window.iloc[-1] > rsi_window.iloc[0]:
-            df.iloc[i, df.columns.get_loc('Divergence')] = 'BULLISH_DIV'
-        elif price_window.iloc[-1] > price_window.iloc[0] and rsi_window.iloc[-1] < rsi_window.iloc[0]:
-            df.iloc[i, df.columns.get_loc('Divergence')] = 'BEARISH_DIV'
+        bullish = (close[now] < close[past]) & (rsi[now] > rsi[past])
+        bearish = (close[now] > close[past]) & (rsi[now] < rsi[past])
+        codes[now] = np.where(bullish, 1, np.where(bearish, 2, 0))
     
-    return df
+    return {'Divergence': pd.Categorical.from_codes(codes, categories=DIVERGENCE_LABELS)}
 
 
-def compute_trading_signals(df: pd.DataFrame) -> pd.DataFrame:
+def detect_divergences(df: pd.DataFrame, lookback: int = 5) -> pd.DataFrame:
     """
-    Système de signaux composites basé sur des règles mathématiques rigoureuses.
-    Chaque règle génère un score de -2 à +2.
-    Score total détermine le signal global.
+    Détecte les divergences RSI haussières et baissières.
+    - Divergence haussière : prix fait un lower low, RSI fait un higher low → signal d'achat
+    - Divergence baissière : prix fait un higher high, RSI fait un lower high → signal de vente
+    Compare chaque bougie à celle d'il y a `lookback` périodes (vectorisé).
+    Colonne catégorielle : NONE / BULLISH_DIV / BEARISH_DIV.
     """
-    df['Score'] = 0.0
+    return _apply(df, _divergences, lookback)
+
+
+def _signals(c) -> dict:
+    close = c['close']
+    score = np.zeros(len(close))
     
     # ── Règle 1 : RSI Zones ──
-    if 'RSI' in df.columns:
-        df.loc[df['RSI'] < 20, 'Score'] += 2      # Très survendu → fort achat
-        df.loc[df['RSI'] < 30, 'Score'] += 1       # Survendu → achat
-        df.loc[df['RSI'] > 80, 'Score'] -= 2       # Très suracheté → forte vente
-        df.loc[df['RSI'] > 70, 'Score'] -= 1       # Suracheté → vente
+    if 'RSI' in c:
+        rsi = c['RSI']
+        score += 2 * (rsi < 20)      # Très survendu → fort achat
+        score += 1 * (rsi < 30)      # Survendu → achat
+        score -= 2 * (rsi > 80)      # Très suracheté → forte vente
+        score -= 1 * (rsi > 70)      # Suracheté → vente
     
     # ── Règle 2 : MACD Crossover ──
-    if 'MACD' in df.columns and 'MACD_signal' in df.columns:
+    if 'MACD' in c and 'MACD_signal' in c:
+        macd, macd_signal = c['MACD'], c['MACD_signal']
         # Gold cross : MACD passe au-dessus du signal
-        macd_cross_up = (df['MACD'] > df['MACD_signal']) & (df['MACD'].shift(1) <= df['MACD_signal'].shift(1))
+        macd_cross_up = (macd > macd_signal) & (_shift(macd) <= _shift(macd_signal))
         # Death cross : MACD passe en-dessous du signal
-        macd_cross_down = (df['MACD'] < df['MACD_signal']) & (df['MACD'].shift(1) >= df['MACD_signal'].shift(1))
-        df.loc[macd_cross_up, 'Score'] += 2
-        df.loc[macd_cross_down, 'Score'] -= 2
+        macd_cross_down = (macd < macd_signal) & (_shift(macd) >= _shift(macd_signal))
+        score += 2 * macd_cross_up
+        score -= 2 * macd_cross_down
         # MACD histogramme croissant/décroissant
-        df.loc[df['MACD_hist'] > 0, 'Score'] += 0.5
-        df.loc[df['MACD_hist'] < 0, 'Score'] -= 0.5
+        score += 0.5 * (c['MACD_hist'] > 0)
+        score -= 0.5 * (c['MACD_hist'] < 0)
     
     # ── Règle 3 : EMA Crossovers (Golden/Death Cross) ──
-    if 'EMA_9' in df.columns and 'EMA_21' in df.columns:
-        golden_cross = (df['EMA_9'] > df['EMA_21']) & (df['EMA_9'].shift(1) <= df['EMA_21'].shift(1))
-        death_cross = (df['EMA_9'] < df['EMA_21']) & (df['EMA_9'].shift(1) >= df['EMA_21'].shift(1))
-        df.loc[golden_cross, 'Score'] += 2
-        df.loc[death_cross, 'Score'] -= 2
-    
-    if 'EMA_50' in df.columns and 'EMA_200' in df.columns:
+    if 'EMA_9' in c and 'EMA_21' in c:
+        ema_9, ema_21 = c['EMA_9'], c['EMA_21']
+        golden_cross = (ema_9 > ema_21) & (_shift(ema_9) <= _shift(ema_21))
+        death_cross = (ema_9 < ema_21) & (_shift(ema_9) >= _shift(ema_21))
+        score += 2 * golden_cross
+        score -= 2 * death_cross
+    
+    if 'EMA_50' in c and 'EMA_200' in c:
         # EMA 50/200 — trend direction
-        df.loc[df['EMA_50'] > df['EMA_200'], 'Score'] += 1
-        df.loc[df['EMA_50'] < df['EMA_200'], 'Score'] -= 1
+        score += 1 * (c['EMA_50'] > c['EMA_200'])
+        score -= 1 * (c['EMA_50'] < c['EMA_200'])
     
     # ── Règle 4 : Bollinger Bands Squeeze & Bounce ──
-    if 'BB_percent' in df.columns:
-        df.loc[df['BB_percent'] < 0, 'Score'] += 1.5     # Sous la bande basse → achat
-        df.loc[df['BB_percent'] > 1, 'Score'] -= 1.5     # Au-dessus de la bande haute → vente
+    if 'BB_percent' in c:
+        score += 1.5 * (c['BB_percent'] < 0)     # Sous la bande basse → achat
+        score -= 1.5 * (c['BB_percent'] > 1)     # Au-dessus de la bande haute → vente
         # Squeeze (faible volatilité → breakout imminent)
-        if 'BB_width' in df.columns:
-            bb_width_mean = df['BB_width'].rolling(20).mean()
-            df.loc[df['BB_width'] < bb_width_mean * 0.5, 'Score'] += 0.5  # Squeeze détecté
+        if 'BB_width' in c:
+            bb_width_mean = _rolling_mean(c['BB_width'], 20)
+            score += 0.5 * (c['BB_width'] < bb_width_mean * 0.5)  # Squeeze détecté
     
     # ── Règle 5 : Stochastic ──
-    if 'Stoch_K' in df.columns and 'Stoch_D' in df.columns:
-        stoch_cross_up = (df['Stoch_K'] > df['Stoch_D']) & (df['Stoch_K'].shift(1) <= df['Stoch_D'].shift(1)) & (df['Stoch_K'] < 20)
-        stoch_cross_down = (df['Stoch_K'] < df['Stoch_D']) & (df['Stoch_K'].shift(1) >= df['Stoch_D'].shift(1)) & (df['Stoch_K'] > 80)
-        df.loc[stoch_cross_up, 'Score'] += 2
-        df.loc[stoch_cross_down, 'Score'] -= 2
+    if 'Stoch_K' in c and 'Stoch_D' in c:
+        stoch_k, stoch_d = c['Stoch_K'], c['Stoch_D']
+        stoch_cross_up = (stoch_k > stoch_d) & (_shift(stoch_k) <= _shift(stoch_d)) & (stoch_k < 20)
+        stoch_cross_down = (stoch_k < stoch_d) & (_shift(stoch_k) >= _shift(stoch_d)) & (stoch_k > 80)
+        score += 2 * stoch_cross_up
+        score -= 2 * stoch_cross_down
     
     # ── Règle 6 : ADX Trend Strength ──
-    if 'ADX' in df.columns:
+    if 'ADX' in c:
         # ADX > 25 confirme la tendance
-        strong_trend = df['ADX'] > 25
-        if 'DI_plus' in df.columns and 'DI_minus' in df.columns:
-            df.loc[strong_trend & (df['DI_plus'] > df['DI_minus']), 'Score'] += 1
-            df.loc[strong_trend & (df['DI_plus'] < df['DI_minus']), 'Score'] -= 1
+        strong_trend = c['ADX'] > 25
+        if 'DI_plus' in c and 'DI_minus' in c:
+            score += 1 * (strong_trend & (c['DI_plus'] > c['DI_minus']))
+            score -= 1 * (strong_trend & (c['DI_plus'] < c['DI_minus']))
     
     # ── Règle 7 : Volume Confirmation ──
-    if 'Volume_ratio' in df.columns:
-        high_vol = df['Volume_ratio'] > 1.5
-        price_up = df['close'] > df['close'].shift(1)
-        price_down = df['close'] < df['close'].shift(1)
-        df.loc[high_vol & price_up, 'Score'] += 1  # Volume confirme hausse
-        df.loc[high_vol & price_down, 'Score'] -= 1  # Volume confirme baisse
+    if 'Volume_ratio' in c:
+        high_vol = c['Volume_ratio'] > 1.5
+        score += 1 * (high_vol & (close > c['prev_close']))  # Volume confirme hausse
+        score -= 1 * (high_vol & (close < c['prev_close']))  # Volume confirme baisse
     
     # ── Règle 8 : Divergences RSI ──
-    if 'Divergence' in df.columns:
-        df.loc[df['Divergence'] == 'BULLISH_DIV', 'Score'] += 2
-        df.loc[df['Divergence'] == 'BEARISH_DIV', 'Score'] -= 2
+    if 'Divergence' in c:
+        score += 2 * _label_mask(c['Divergence'], 'BULLISH_DIV')
+        score -= 2 * _label_mask(c['Divergence'], 'BEARISH_DIV')
     
     # ── Règle 9 : Fibonacci Support/Resistance ──
-    if 'Fib_618' in df.columns:
-        near_fib_618 = np.abs(df['close'] - df['Fib_618']) / df['close'] < 0.01
-        near_fib_382 = np.abs(df['close'] - df['Fib_382']) / df['close'] < 0.01
-        df.loc[near_fib_618, 'Score'] += 1  # Rebond potentiel au golden ratio
-        df.loc[near_fib_382, 'Score'] += 0.5
+    if 'Fib_618' in c:
+        score += 1 * (np.abs(close - c['Fib_618']) / close < 0.01)    # Rebond potentiel au golden ratio
+        score += 0.5 * (np.abs(close - c['Fib_382']) / close < 0.01)
     
     # ── Règle 10 : Pivot Points ──
-    if 'Pivot' in df.columns:
-        df.loc[df['close'] > df['R1'], 'Score'] += 0.5   # Au-dessus de R1 = bullish
-        df.loc[df['close'] > df['R2'], 'Score'] += 0.5   # Au-dessus de R2 = très bullish
-        df.loc[df['close'] < df['S1'], 'Score'] -= 0.5   # Sous S1 = bearish
-        df.loc[df['close'] < df['S2'], 'Score'] -= 0.5   # Sous S2 = très bearish
+    if 'Pivot' in c:
+        score += 0.5 * (close > c['R1'])   # Au-dessus de R1 = bullish
+        score += 0.5 * (close > c['R2'])   # Au-dessus de R2 = très bullish
+        score -= 0.5 * (close < c['S1'])   # Sous S1 = bearish
+        score -= 0.5 * (close < c['S2'])   # Sous S2 = très bearish
     
     # ── Signal global ──
-    df['Signal_strength'] = df['Score'].rolling(3).mean()  # Lissage sur 3 périodes
-    
-    df['Signal'] = 'NEUTRAL'
-    df.loc[df['Signal_strength'] > 3, 'Signal'] = 'STRONG_BUY'
-    df.loc[(df['Signal_strength'] > 1) & (df['Signal_strength'] <= 3), 'Signal'] = 'BUY'
-    df.loc[df['Signal_strength'] < -3, 'Signal'] = 'STRONG_SELL'
-    df.loc[(df['Signal_strength'] < -1) & (df['Signal_strength'] >= -3), 'Signal'] = 'SELL'
-    
-    return df
+    strength = _rolling_mean(score, 3)  # Lissage sur 3 périodes
+    
+    codes = np.select(
+        [strength > 3, strength > 1, strength < -3, strength < -1],
+        [1, 2, 3, 4],
+        default=0,
+    ).astype(np.int8)
+    
+    return {
+        'Score': score,
+        'Signal_strength': strength,
+        'Signal': pd.Categorical.from_codes(codes, categories=SIGNAL_LABELS),
+    }
+
+
+def compute_trading_signals(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Système de signaux composites basé sur des règles mathématiques rigoureuses.
+    Chaque règle génère un score de -2 à +2.
+    Score total détermine le signal global.
+    """
+    return _apply(df, _signals)
 
 
 # ═══════════════════════════════════════════════════════
-# PIPELINE COMPLET
+# REGISTRE & PIPELINE COMPLET
 # ═══════════════════════════════════════════════════════
 
+_SIGNAL_INPUTS = [
+    'RSI', 'MACD', 'MACD_signal', 'MACD_hist', 'EMA_9', 'EMA_21', 'EMA_50', 'EMA_200',
+    'BB_percent', 'BB_width', 'Stoch_K', 'Stoch_D', 'ADX', 'DI_plus', 'DI_minus',
+    'Volume_ratio', 'Divergence', 'Fib_618', 'Fib_382', 'Pivot', 'R1', 'R2', 'S1', 'S2',
+    'close', 'prev_close',
+]
+
+# Étape → colonnes d'entrée / de sortie. L'ordre d'enregistrement est un ordre
+# topologique valide (et l'ordre historique des colonnes de add_all_indicators).
+INDICATORS = {
+    'rsi':        {'func': _rsi,         'inputs': ['close'], 'outputs': ['RSI']},
+    'macd':       {'func': _macd,        'inputs': ['close'], 'outputs': ['MACD', 'MACD_signal', 'MACD_hist']},
+    'bollinger':  {'func': _bollinger,   'inputs': ['close'],
+                   'outputs': ['BB_upper', 'BB_middle', 'BB_lower', 'BB_width', 'BB_percent']},
+    'ema':        {'func': _ema,         'inputs': ['close'], 'outputs': ['EMA_9', 'EMA_21', 'EMA_50', 'EMA_200']},
+    'atr':        {'func': _atr,         'inputs': ['true_range', 'close'], 'outputs': ['ATR', 'ATR_pct']},
+    'volume':     {'func': _volume,      'inputs': ['volume', 'close'], 'outputs': ['Volume_SMA', 'Volume_ratio', 'OBV']},
+    'stochastic': {'func': _stochastic,  'inputs': ['high', 'low', 'close'], 'outputs': ['Stoch_K', 'Stoch_D']},
+    'fibonacci':  {'func': _fibonacci,   'inputs': ['high', 'low'],
+                   'outputs': ['Fib_0', 'Fib_236', 'Fib_382', 'Fib_500', 'Fib_618', 'Fib_786', 'Fib_100']},
+    'pivots':     {'func': _pivots,      'inputs': ['prev_high', 'prev_low', 'prev_close'],
+                   'outputs': ['Pivot', 'R1', 'S1', 'R2', 'S2', 'R3', 'S3']},
+    'ichimoku':   {'func': _ichimoku,    'inputs': ['high', 'low'],
+                   'outputs': ['Ichimoku_tenkan', 'Ichimoku_kijun', 'Ichimoku_senkou_a', 'Ichimoku_senkou_b']},
+    'adx':        {'func': _adx,         'inputs': ['high', 'low', 'prev_high', 'prev_low', 'true_range'],
+                   'outputs': ['ADX', 'DI_plus', 'DI_minus']},
+    'vwap':       {'func': _vwap,        'inputs': ['high', 'low', 'close', 'volume'], 'outputs': ['VWAP']},
+    'divergence': {'func': _divergences, 'inputs': ['close', 'RSI'], 'outputs': ['Divergence']},
+    'signals':    {'func': _signals,     'inputs': _SIGNAL_INPUTS, 'outputs': ['Score', 'Signal_strength', 'Signal']},
+}
+
+_PRODUCERS = {col: name for name, spec in INDICATORS.items() for col in spec['outputs']}
+
+INDICATOR_COLUMNS = list(_PRODUCERS)
+
+
+def resolve_stages(columns) -> list:
+    """Étapes nécessaires (avec leurs dépendances) pour produire `columns`, dans l'ordre d'exécution."""
+    needed = set()
+    pending = list(columns)
+    while pending:
+        col = pending.pop()
+        stage = _PRODUCERS.get(col)
+        if stage is None:
+            if col not in _INTERMEDIATES and col not in OHLCV:
+                raise KeyError(f"Indicateur inconnu: {col}")
+        elif stage not in needed:
+            needed.add(stage)
+            pending.extend(INDICATORS[stage]['inputs'])
+    return [name for name in INDICATORS if name in needed]
+
+
+_LABEL_COLUMNS = {'Divergence', 'Signal'}
+
+
+def compute_indicators(df: pd.DataFrame, columns=None, dtype=np.float64) -> pd.DataFrame:
+    """
+    Calcule les indicateurs demandés (toutes les étapes si columns=None) sur un
+    DataFrame OHLCV ou un OHLCVRingBuffer.
+    Retourne un nouveau DataFrame : colonnes d'origine + sorties des étapes exécutées.
+    
+    Les sorties numériques sont écrites dans un seul buffer 2-D (ordre Fortran :
+    chaque colonne est contiguë) ; dtype=np.float32 divise sa taille par deux,
+    les calculs intermédiaires restant en float64.
+    """
+    stages = list(INDICATORS) if columns is None else resolve_stages(columns)
+    outputs = [col for name in stages for col in INDICATORS[name]['outputs']]
+    if isinstance(df, OHLCVRingBuffer):
+        # Vues du buffer pour les calculs, copie pour le DataFrame retourné
+        cols = _Arrays(df)
+        df = df.to_frame(copy=True)
+    else:
+        # Colonnes déjà calculées (DataFrame passé deux fois) : retirées avant
+        # extraction, pour être recalculées et non lues ni dupliquées
+        df = df.drop(columns=outputs, errors='ignore')
+        cols = _Arrays(df)
+    if not outputs:
+        return df.copy()
+    
+    numeric = [col for col in outputs if col not in _LABEL_COLUMNS]
+    position = {col: j for j, col in enumerate(numeric)}
+    buffer = np.empty((len(df), len(numeric)), dtype=dtype, order='F')
+    labels = {}
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for name in stages:
+            with timed(f"indicators.{name}"):
+                produced = INDICATORS[name]['func'](cols)
+            for col, values in produced.items():
+                if col in _LABEL_COLUMNS:
+                    labels[col] = cols[col] = values
+                    continue
+                buffer[:, position[col]] = values
+                # En float64, les étapes suivantes lisent directement le buffer
+                cols[col] = buffer[:, position[col]] if dtype == np.float64 else values
+    
+    # Assemblage final : vues sur le buffer, entrecoupées des colonnes catégorielles
+    with timed("indicators.assemble"):
+        parts = [df]
+        run = []
+        for col in outputs + [None]:
+            if col is not None and col not in labels:
+                run.append(col)
+                continue
+            if run:
+                parts.append(pd.DataFrame(buffer[:, position[run[0]]:position[run[-1]] + 1],
+                                          index=df.index, columns=run, copy=False))
+                run = []
+            if col is not None:
+                parts.append(pd.DataFrame({col: labels[col]}, index=df.index))
+        return pd.concat(parts, axis=1)
+
+
 def add_all_indicators(df: pd.DataFrame) -> pd.DataFrame:
     """Ajoute TOUS les indicateurs et signaux au DataFrame."""
-    df = df.copy()
-    df = add_rsi(df)
-    df = add_macd(df)
-    df = add_bollinger_bands(df)
-    df = add_ema(df)
-    df = add_atr(df)
-    df = add_volume_analysis(df)
-    df = add_stochastic(df)
-    df = add_fibonacci_levels(df)
-    df = add_pivot_points(df)
-    df = add_ichimoku(df)
-    df = add_adx(df)
-    df = add_vwap(df)
-    df = detect_divergences(df)
-    df = compute_trading_signals(df)
-    return df
+    return compute_indicators(df)
 
 
 def get_indicator_summary(df: pd.DataFrame) -> dict:
@@ -0,0 +1,210 @@
+"""
+Ingestion temps réel des klines Binance (websocket) dans des buffers mémoire.
+Un buffer borné par (symbole, intervalle) de config.SYMBOLS × config.INTERVALS,
+amorcé par REST puis tenu à jour par le flux combiné <symbole>@kline_<intervalle> :
+mise à jour de la bougie en cours, bascule à la clôture (OHLCVRingBuffer,
+data/ringbuffer.py : O(1) par message, fenêtres sans recopie).
+
+Tant que le flux est « chaud » (amorcé, connecté, message récent),
+get_historical_data / get_latest_price lisent ces buffers : aucune requête
+amont sur le chemin critique. Sinon, repli sur le REST habituel.
+URL configurable (config.BINANCE_WS_URL) — data/replay_server.py fournit
+un équivalent local.
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import telemetry
+from data import store
+from data.ringbuffer import OHLCVRingBuffer
+from telemetry import cache_lookup
+
+_messages = telemetry.REGISTRY.counter(
+    "live_messages_total", "Messages kline reçus du websocket", labels=("interval",))
+_reconnects = telemetry.REGISTRY.counter(
+    "live_reconnects_total", "Reconnexions du websocket de klines")
+
+
+def _kline_row(k: dict) -> tuple:
+    """Payload `k` d'un événement kline → ligne KLINE_DTYPE."""
+    return (int(k['t']), int(k['T']), float(k['o']), float(k['h']), float(k['l']),
+            float(k['c']), float(k['v']))
+
+
+class LiveFeed:
+    """
+    Buffers + tâche de connexion (start/stop liés au cycle de vie de l'app).
+    Les lectures (window, latest_price) sont thread-safe : elles peuvent
+    venir du threadpool pendant que l'event loop applique les messages.
+    """
+
+    def __init__(self, symbols: list = None, intervals: list = None, capacity: int = None):
+        self.pairs = symbols or list(config.SYMBOLS.values())
+        self.intervals = intervals or list(config.INTERVALS)
+        self.capacity = capacity or config.LIVE_BUFFER_CAPACITY
+        keys = [(pair, interval) for pair in self.pairs for interval in self.intervals]
+        self._buffers = {key: OHLCVRingBuffer(self.capacity) for key in keys}
+        self._locks = {key: threading.Lock() for key in keys}
+        self._seeded = set()
+        self._pending = {}          # Messages reçus avant la fin de l'amorçage
+        self._connected = False
+        self._last_message = {}     # (paire, intervalle) → dernier message reçu (monotonic)
+        self._task = None
+
+    @property
+    def streams(self) -> list:
+        return [f"{pair.lower()}@kline_{interval}" for pair, interval in self._buffers]
+
+    def status(self) -> dict:
+        return {"connected": self._connected,
+                "warm": sum(self.is_warm(*key) for key in self._buffers), "buffers": len(self._buffers)}
+
+    def is_warm(self, pair: str, interval: str) -> bool:
+        """Amorcé, connecté, et message récent sur CE flux (un flux figé repasse au REST)."""
+        key = (pair, interval)
+        return (key in self._seeded and self._connected
+                and time.monotonic() - self._last_message.get(key, 0.0) < config.LIVE_STALE_SECONDS)
+
+    # ── Lectures ──
+    def _read(self, pair: str, interval: str, start_ms: int, read):
+        """
+        read(buffer, n) sur les n bougies ouvertes à partir de start_ms, ou None
+        si le buffer n'est pas chaud ou ne couvre pas start_ms (repli REST).
+        """
+        key = (pair, interval)
+        hit = None
+        if self.is_warm(pair, interval):
+            with self._locks[key]:
+                buffer = self._buffers[key]
+                if len(buffer) and buffer['open_time'][0] <= start_ms:
+                    hit = read(buffer, buffer.since(start_ms))
+        cache_lookup("live.klines", hit is not None)
+        return hit
+
+    def window(self, pair: str, interval: str, start_ms: int):
+        """Copie (tableau structuré KLINE_DTYPE) des bougies ouvertes à partir de start_ms, ou None."""
+        return self._read(pair, interval, start_ms, OHLCVRingBuffer.to_klines)
+
+    def frame(self, pair: str, interval: str, start_ms: int):
+        """Idem en DataFrame OHLCV (copie du bloc, sans passer par le tableau structuré), ou None."""
+        return self._read(pair, interval, start_ms, lambda buffer, n: buffer.to_frame(n, copy=True))
+
+    def latest_price(self, pair: str):
+        """Close de la bougie en cours de l'intervalle le plus fin chaud, ou None."""
+        from data.cache import interval_seconds
+
+        for interval in sorted(self.intervals, key=interval_seconds):
+            if self.is_warm(pair, interval):
+                with self._locks[(pair, interval)]:
+                    buffer = self._buffers[(pair, interval)]
+                    if len(buffer):
+                        cache_lookup("live.price", True)
+                        return float(buffer['close'][-1])
+        cache_lookup("live.price", False)
+        return None
+
+    # ── Ingestion ──
+    def apply(self, message: dict) -> None:
+        """Applique un message du flux combiné ({"stream": ..., "data": {"e": "kline", ...}})."""
+        data = message.get("data", message)
+        if data.get("e") != "kline":
+            return
+        k = data["k"]
+        key = (data["s"], k["i"])
+        if key not in self._buffers:
+            return
+        self._last_message[key] = time.monotonic()
+        _messages.inc(interval=k["i"])
+        row = _kline_row(k)
+        if key not in self._seeded:
+            self._pending.setdefault(key, deque(maxlen=self.capacity)).append(row)
+            return
+        with self._locks[key]:
+            self._buffers[key].upsert(row)
+
+    async def _seed(self, pair: str, interval: str) -> None:
+        """Amorce (ou complète après une coupure) un buffer par REST."""
+        from data.binance_client import _fetch_klines_async
+        from data.cache import interval_seconds
+
+        key = (pair, interval)
+        with self._locks[key]:
+            current = self._buffers[key]
+            since = (current.last_open_time if len(current)
+                     else int(time.time() * 1000) - self.capacity * interval_seconds(interval) * 1000)
+        raw = await _fetch_klines_async(pair, interval, since)
+        with self._locks[key]:
+            buffer = self._buffers[key]
+            buffer.load(store.merge_klines(buffer.to_klines(), store.klines_to_array(raw)))
+            for row in self._pending.pop(key, ()):
+                buffer.upsert(row)
+            self._seeded.add(key)
+
+    async def _seed_all(self) -> None:
+        """Amorce tous les buffers ; réessaie ceux en erreur (REST indisponible)."""
+        pending = list(self._buffers)
+        while pending:
+            outcomes = await asyncio.gather(*[self._seed(*key) for key in pending], return_exceptions=True)
+            failed = [key for key, outcome in zip(pending, outcomes) if isinstance(outcome, Exception)]
+            if failed:
+                print(f"⚠️ Amorçage flux klines: {len(failed)} buffer(s) en erreur, nouvel essai")
+                await asyncio.sleep(config.LIVE_STALE_SECONDS / 6)
+            pending = failed
+
+    async def _run(self) -> None:
+        import aiohttp
+
+        url = f"{config.BINANCE_WS_URL.rstrip('/')}/stream?streams={'/'.join(self.streams)}"
+        backoff = 1.0
+        while True:
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.ws_connect(url, heartbeat=30) as ws:
+                        self._connected = True
+                        self._last_message = dict.fromkeys(self._buffers, time.monotonic())
+                        # Amorçage après connexion : aucune bougie manquée entre les deux
+                        self._seeded.clear()
+                        self._pending.clear()
+                        seeding = asyncio.create_task(self._seed_all())
+                        try:
+                            async for msg in ws:
+                                if msg.type == aiohttp.WSMsgType.TEXT:
+                                    self.apply(json.loads(msg.data))
+                                    backoff = 1.0
+                                elif msg.type == aiohttp.WSMsgType.ERROR:
+                                    break
+                        finally:
+                            seeding.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Flux klines: {e}")
+            finally:
+                self._connected = False
+            _reconnects.inc()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print(f"📡 Flux klines: {len(self._buffers)} buffers ({config.BINANCE_WS_URL})")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+feed = LiveFeed()
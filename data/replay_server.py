@@ -0,0 +1,496 @@
+"""
+Serveur local de rejeu Binance — tests de charge et de latence hors ligne.
+Implémente le sous-ensemble de l'API publique utilisé par binance_client.py
+(/api/v3/klines, /api/v3/ticker/price, plus ping et time) et le flux websocket
+combiné de klines utilisé par data/live.py (/stream?streams=btcusdt@kline_1h/...),
+avec des bougies synthétiques (data/synthetic.py) ou enregistrées (fichiers
+.npz de data/store.py).
+
+Avec --tick, le marché avance : la bougie en cours suit une marche aléatoire
+et une nouvelle bougie s'ouvre à chaque clôture (--speed accélère l'horloge).
+
+Injection de défauts configurable :
+  - latence fixe + gigue aléatoire par requête
+  - limite de débit (requêtes/seconde) → HTTP 429 + Retry-After, comme Binance
+  - taux d'erreurs serveur (500/502/503)
+Les tirages aléatoires sont seedés : même graine → mêmes bougies, mêmes défauts.
+
+Usage:
+    python data/replay_server.py --port 9100 --latency 50 --jitter 20
+    python data/replay_server.py --source store --data-dir /tmp/crypto_cache --error-rate 0.05
+    python data/replay_server.py --tick 1 --speed 60     # Marché vivant, 1 min simulée par seconde
+    BINANCE_BASE_URL=http://127.0.0.1:9100 BINANCE_WS_URL=ws://127.0.0.1:9100 \
+        DATA_DIR=/tmp/replay_cache uvicorn api.main:app
+"""
+import asyncio
+import os
+import pathlib
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from data import store
+
+DEFAULT_LIMIT = 500   # Valeurs de Binance pour /api/v3/klines
+MAX_LIMIT = 1000
+SOURCES = ('synthetic', 'store')
+
+# Symboles synthétiques servis et leur prix de départ (autres : -1121 Invalid symbol)
+_START_PRICES = {"BTCUSDT": 30000.0, "ETHUSDT": 2000.0, "SOLUSDT": 100.0, "XRPUSDT": 0.5}
+_SERVER_ERRORS = (500, 502, 503)
+# Série synthétique de base d'un symbole : les intervalles plus longs en sont
+# agrégés (mêmes prix sur 1h/4h/1d), son dernier close sert de prix courant
+_BASE_INTERVAL = "1h"
+_DAILY_VOLATILITY = 0.03  # Marche aléatoire de la bougie en cours (--tick)
+_STREAM_PUSH_SECONDS = 2.0  # Cadence des événements kline sans --tick (comme Binance)
+
+
+def _error(status: int, code: int, msg: str, headers: dict = None):
+    """Réponse d'erreur au format Binance ({"code": ..., "msg": ...})."""
+    from aiohttp import web
+    return web.json_response({"code": code, "msg": msg}, status=status, headers=headers)
+
+
+class _BadParameter(ValueError):
+    """Paramètre de requête invalide (code Binance -1100)."""
+
+
+def klines_to_json(klines: np.ndarray) -> list:
+    """Tableau structuré → réponse brute Binance (12 champs, prix en str)."""
+    return [
+        [int(k['open_time']), repr(float(k['open'])), repr(float(k['high'])), repr(float(k['low'])),
+         repr(float(k['close'])), repr(float(k['volume'])), int(k['close_time']),
+         "0", 0, "0", "0", "0"]
+        for k in klines
+    ]
+
+
+def aggregate_klines(klines: np.ndarray, step: int) -> np.ndarray:
+    """
+    Agrège des bougies en bougies de `step` ms alignées sur l'epoch (comme
+    Binance) : open de la première, high/low extrêmes, close de la dernière,
+    volumes sommés. La dernière bougie agrégée est partielle (en cours).
+    """
+    groups = klines['open_time'] // step
+    starts = np.flatnonzero(np.diff(groups, prepend=groups[0] - 1))
+    ends = np.append(starts[1:], len(klines)) - 1
+    out = np.empty(len(starts), dtype=store.KLINE_DTYPE)
+    out['open_time'] = groups[starts] * step
+    out['close_time'] = out['open_time'] + step - 1
+    out['open'] = klines['open'][starts]
+    out['high'] = np.maximum.reduceat(klines['high'], starts)
+    out['low'] = np.minimum.reduceat(klines['low'], starts)
+    out['close'] = klines['close'][ends]
+    out['volume'] = np.add.reduceat(klines['volume'], starts)
+    return out
+
+
+class ReplayMarket:
+    """
+    Bougies servies par (symbole, intervalle), construites à la première demande.
+    En synthétique, une seule marche aléatoire par symbole (_BASE_INTERVAL) ;
+    les intervalles multiples en sont agrégés, les plus fins sont refusés.
+    Les timestamps sont décalés pour que la dernière bougie soit celle en cours
+    à l'horloge du marché (départ: now_ms, défaut: démarrage du serveur) —
+    les lookbacks relatifs ('90 days ago UTC') du client tombent ainsi sur des données.
+    L'horloge avance `speed` fois plus vite que le temps réel ; advance() fait
+    évoluer la bougie en cours et ouvre les suivantes.
+    """
+
+    def __init__(self, source: str = 'synthetic', history_days: int = 400, seed: int = 0,
+                 data_dir=None, now_ms: int = None, speed: float = 1.0):
+        if source not in SOURCES:
+            raise ValueError(f"Source inconnue: {source} (attendu: {', '.join(SOURCES)})")
+        self.source = source
+        self.history_days = history_days
+        self.seed = seed
+        self.data_dir = pathlib.Path(data_dir) if data_dir else config.DATA_DIR
+        self.now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        self.speed = speed
+        self._started = time.monotonic()
+        self._klines = {}
+        self._updated = {}          # Séries parcourues par advance() → horloge du dernier passage
+        self._rng = np.random.default_rng(seed)
+
+    def clock(self) -> int:
+        """Horloge du marché (ms)."""
+        return self.now_ms + int((time.monotonic() - self._started) * 1000 * self.speed)
+
+    def _synthetic(self, symbol: str, step: int) -> np.ndarray:
+        from data.synthetic import synthetic_ohlcv
+
+        n = max(int(self.history_days * 86_400_000 // step), 1)
+        # Graine propre à chaque symbole, stable d'un lancement à l'autre
+        seed = self.seed ^ zlib.crc32(symbol.encode())
+        df = synthetic_ohlcv(n, seed=seed, interval=_BASE_INTERVAL, price=_START_PRICES[symbol])
+        klines = np.empty(n, dtype=store.KLINE_DTYPE)
+        klines['open_time'] = np.arange(n, dtype=np.int64) * step
+        for col in store.OHLCV_COLUMNS:
+            klines[col] = df[col].to_numpy()
+        return klines
+
+    def _recorded(self, symbol: str, interval: str):
+        path = self.data_dir / f"{symbol}_{interval}.npz"
+        try:
+            with np.load(path) as data:
+                return data['klines'].astype(store.KLINE_DTYPE)
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def klines(self, symbol: str, interval: str):
+        """Historique complet du couple, ou None si inconnu."""
+        key = (symbol, interval)
+        if key not in self._klines:
+            from data.cache import interval_seconds
+
+            if not self.symbol_known(symbol):
+                return None
+            try:
+                step = interval_seconds(interval) * 1000
+            except ValueError:
+                return None
+            if self.source == 'synthetic' and interval != _BASE_INTERVAL:
+                base_step = interval_seconds(_BASE_INTERVAL) * 1000
+                if step % base_step:
+                    return None
+                self._klines[key] = aggregate_klines(self.klines(symbol, _BASE_INTERVAL), step)
+                return self._klines[key]
+            klines = (self._synthetic(symbol, step) if self.source == 'synthetic'
+                      else self._recorded(symbol, interval))
+            if klines is None or not len(klines):
+                return None
+            # Dernière bougie = bougie ouverte à l'horloge du marché
+            now = self.clock()
+            klines['open_time'] += (now // step) * step - klines['open_time'][-1]
+            klines['close_time'] = klines['open_time'] + step - 1
+            self._klines[key] = klines
+            self._updated[key] = now
+        return self._klines[key]
+
+    def advance(self) -> None:
+        """
+        Fait avancer les séries déjà servies jusqu'à l'horloge : ouverture des
+        bougies dont l'heure est passée, puis marche aléatoire de la bougie en
+        cours. Les intervalles agrégés sont recalculés depuis leur base.
+        """
+        now = self.clock()
+        for key in list(self._updated):
+            klines = self._klines[key]
+            step = int(klines['close_time'][-1] - klines['open_time'][-1]) + 1
+            elapsed = now - self._updated[key]
+            if elapsed <= 0:
+                continue
+            self._updated[key] = now
+            if now > klines['close_time'][-1]:
+                opened = int((now - klines['close_time'][-1] - 1) // step) + 1
+                new = np.zeros(opened, dtype=store.KLINE_DTYPE)
+                new['open_time'] = klines['open_time'][-1] + step * np.arange(1, opened + 1)
+                new['close_time'] = new['open_time'] + step - 1
+                for col in ('open', 'high', 'low', 'close'):
+                    new[col] = klines['close'][-1]
+                klines = self._klines[key] = np.concatenate([klines, new])
+
+            sigma = _DAILY_VOLATILITY * np.sqrt(elapsed / 86_400_000)
+            last = klines[-1:]
+            last['close'] *= np.exp(self._rng.normal(0.0, sigma))
+            last['high'] = np.maximum(last['high'], last['close'])
+            last['low'] = np.minimum(last['low'], last['close'])
+            last['volume'] += self._rng.lognormal(mean=7.0, sigma=0.5) * min(elapsed / step, 1.0)
+
+        for (symbol, interval), klines in list(self._klines.items()):
+            if (symbol, interval) not in self._updated:
+                step = int(klines['close_time'][-1] - klines['open_time'][-1]) + 1
+                self._klines[symbol, interval] = aggregate_klines(self._klines[symbol, _BASE_INTERVAL], step)
+
+    def query(self, symbol: str, interval: str, start_ms: int = None, end_ms: int = None,
+              limit: int = DEFAULT_LIMIT):
+        """Même sémantique que Binance : depuis start_ms, sinon les `limit` plus récentes."""
+        klines = self.klines(symbol, interval)
+        if klines is None:
+            return None
+        times = klines['open_time']
+        lo = 0 if start_ms is None else np.searchsorted(times, start_ms, side='left')
+        hi = len(klines) if end_ms is None else np.searchsorted(times, end_ms, side='right')
+        if start_ms is None:
+            lo = max(lo, hi - limit)
+        return klines[lo:min(hi, lo + limit)]
+
+    def _intervals(self, symbol: str) -> list:
+        if self.source == 'synthetic':
+            return [_BASE_INTERVAL] if symbol in _START_PRICES else []
+        return [path.stem[len(symbol) + 1:] for path in self.data_dir.glob(f"{symbol}_*.npz")]
+
+    def symbol_known(self, symbol: str) -> bool:
+        return bool(self._intervals(symbol))
+
+    def last_price(self, symbol: str):
+        """Dernier close (bougie en cours) — intervalle le plus fin disponible."""
+        from data.cache import interval_seconds
+
+        for interval in sorted(self._intervals(symbol), key=interval_seconds):
+            klines = self.klines(symbol, interval)
+            if klines is not None:
+                return float(klines['close'][-1])
+        return None
+
+
+class FaultInjector:
+    """Latence, limite de débit et erreurs serveur (tirages seedés)."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, rate_limit: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.rate_limit = rate_limit  # Requêtes/seconde (0 = illimité)
+        self.error_rate = error_rate
+        self._rng = np.random.default_rng(seed)
+        self._tokens = max(float(rate_limit), 1.0)  # Capacité du seau : 1 seconde de débit
+        self._refilled = time.monotonic()
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0}
+
+    def _take_token(self) -> float:
+        """Seau à jetons ; retourne 0 si accepté, sinon le délai avant le prochain jeton."""
+        if self.rate_limit <= 0:
+            return 0.0
+        now = time.monotonic()
+        self._tokens = min(max(self.rate_limit, 1.0), self._tokens + (now - self._refilled) * self.rate_limit)
+        self._refilled = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate_limit
+
+    def draw_error(self) -> bool:
+        """Tirage d'une erreur injectée (comptée dans stats)."""
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return True
+        return False
+
+    async def apply(self):
+        """Retourne une réponse d'erreur à renvoyer, ou None pour servir la requête."""
+        self.stats["requests"] += 1
+        wait = self._take_token()
+        if wait:
+            self.stats["rate_limited"] += 1
+            return _error(429, -1003, "Too many requests; current limit is "
+                          f"{self.rate_limit:g} requests per second.",
+                          headers={"Retry-After": str(max(1, int(np.ceil(wait))))})
+
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self.draw_error():
+            status = int(self._rng.choice(_SERVER_ERRORS))
+            return _error(status, -1000, "An unknown error occurred while processing the request.")
+        return None
+
+
+def kline_event(symbol: str, interval: str, k, closed: bool, event_ms: int) -> dict:
+    """Événement websocket `kline` au format Binance (prix en str, x = bougie clôturée)."""
+    return {
+        "e": "kline", "E": event_ms, "s": symbol,
+        "k": {
+            "t": int(k['open_time']), "T": int(k['close_time']), "s": symbol, "i": interval,
+            "o": repr(float(k['open'])), "c": repr(float(k['close'])), "h": repr(float(k['high'])),
+            "l": repr(float(k['low'])), "v": repr(float(k['volume'])), "x": closed,
+        },
+    }
+
+
+def create_app(market: ReplayMarket = None, faults: FaultInjector = None, tick: float = 0.0):
+    """
+    Application aiohttp du serveur de rejeu.
+    tick > 0 : le marché avance toutes les `tick` secondes (sinon données figées).
+    """
+    from aiohttp import web
+
+    market = market or ReplayMarket()
+    faults = faults or FaultInjector()
+    push_seconds = tick or _STREAM_PUSH_SECONDS
+
+    @web.middleware
+    async def inject_faults(request, handler):
+        if request.path.startswith("/api/"):
+            failure = await faults.apply()
+            if failure is not None:
+                return failure
+        try:
+            return await handler(request)
+        except _BadParameter as e:
+            return _error(400, -1100, f"Illegal characters found in parameter '{e}'.")
+
+    def _int_param(request, name: str, default=None):
+        value = request.query.get(name)
+        try:
+            return default if value is None else int(value)
+        except ValueError:
+            raise _BadParameter(name)
+
+    async def klines(request):
+        symbol, interval = request.query.get("symbol"), request.query.get("interval")
+        if not symbol or not interval:
+            return _error(400, -1102, "Mandatory parameter 'symbol' or 'interval' was not sent.")
+        limit = _int_param(request, "limit", DEFAULT_LIMIT)
+        if not 1 <= limit <= MAX_LIMIT:
+            return _error(400, -1130, "Invalid data sent for a parameter: limit.")
+        if not market.symbol_known(symbol):
+            return _error(400, -1121, "Invalid symbol.")
+        data = market.query(symbol, interval, _int_param(request, "startTime"),
+                            _int_param(request, "endTime"), limit)
+        if data is None:
+            return _error(400, -1120, "Invalid interval.")
+        return web.json_response(klines_to_json(data))
+
+    async def ticker_price(request):
+        symbol = request.query.get("symbol")
+        if not symbol:
+            return _error(400, -1102, "Mandatory parameter 'symbol' was not sent.")
+        price = market.last_price(symbol)
+        if price is None:
+            return _error(400, -1121, "Invalid symbol.")
+        return web.json_response({"symbol": symbol, "price": repr(price)})
+
+    async def ping(request):
+        return web.json_response({})
+
+    async def server_time(request):
+        return web.json_response({"serverTime": market.clock()})
+
+    async def stats(request):
+        return web.json_response(faults.stats)
+
+    async def stream(request):
+        """
+        Flux combiné : {"stream": "btcusdt@kline_1h", "data": <événement kline>}.
+        Une bougie clôturée entre deux envois est émise avec x=true avant la
+        nouvelle bougie en cours. Les erreurs injectées ferment la connexion.
+        """
+        names = [name for name in request.query.get("streams", "").split("/") if "@kline_" in name]
+        if not names:
+            return _error(400, -1102, "Mandatory parameter 'streams' was not sent.")
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        sent = {}  # Flux → open_time de la dernière bougie envoyée
+        try:
+            while not ws.closed:
+                faults.stats["requests"] += 1
+                if faults.draw_error():
+                    await ws.close(code=1011, message=b"Injected error")
+                    break
+                event_ms = market.clock()
+                for name in names:
+                    pair, interval = name.split("@kline_")
+                    symbol = pair.upper()
+                    klines = market.klines(symbol, interval)
+                    if klines is None:
+                        continue
+                    first = (len(klines) - 1 if name not in sent
+                             else int(np.searchsorted(klines['open_time'], sent[name])))
+                    for i in range(first, len(klines)):
+                        closed = i < len(klines) - 1
+                        await ws.send_json({"stream": name,
+                                            "data": kline_event(symbol, interval, klines[i], closed, event_ms)})
+                    sent[name] = int(klines['open_time'][-1])
+                await asyncio.sleep(push_seconds + faults.latency)
+        except ConnectionResetError:
+            pass  # Client déconnecté
+        return ws
+
+    async def run_market(app):
+        async def _loop():
+            while True:
+                await asyncio.sleep(tick)
+                market.advance()
+        task = asyncio.create_task(_loop()) if tick > 0 else None
+        yield
+        if task is not None:
+            task.cancel()
+
+    app = web.Application(middlewares=[inject_faults])
+    app.router.add_get("/api/v3/klines", klines)
+    app.router.add_get("/api/v3/ticker/price", ticker_price)
+    app.router.add_get("/api/v3/ping", ping)
+    app.router.add_get("/api/v3/time", server_time)
+    app.router.add_get("/stream", stream)
+    app.router.add_get("/replay/stats", stats)  # Hors API : compteurs des défauts injectés
+    app.cleanup_ctx.append(run_market)
+    app["market"], app["faults"] = market, faults
+    return app
+
+
+def start_in_thread(app=None, host: str = "127.0.0.1", port: int = 0):
+    """
+    Lance le serveur dans un thread (event loop dédiée), pour les benchmarks
+    de bout en bout. Retourne (url de base, fonction d'arrêt) ; port=0 → port libre.
+    """
+    from aiohttp import web
+
+    app = app or create_app()
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    state = {}
+
+    async def _start():
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        state["runner"] = runner
+        state["port"] = runner.addresses[0][1]
+
+    def _run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(_start())
+        ready.set()
+        loop.run_forever()
+        loop.run_until_complete(state["runner"].cleanup())
+        loop.close()
+
+    thread = threading.Thread(target=_run, name="binance-replay", daemon=True)
+    thread.start()
+    ready.wait()
+
+    def stop():
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+    return f"http://{host}:{state['port']}", stop
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from aiohttp import web
+
+    parser = argparse.ArgumentParser(description="🔁 Serveur local de rejeu de l'API Binance")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--source", choices=SOURCES, default="synthetic",
+                        help="Bougies synthétiques ou enregistrées (fichiers .npz du stockage local)")
+    parser.add_argument("--data-dir", help="Répertoire des enregistrements (défaut: config.DATA_DIR)")
+    parser.add_argument("--history-days", type=int, default=400, help="Historique synthétique en jours")
+    parser.add_argument("--seed", type=int, default=0, help="Graine des bougies et des défauts")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latence fixe par requête (ms)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Gigue aléatoire ajoutée (ms, uniforme)")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="Requêtes/seconde avant HTTP 429 (0 = illimité)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Proportion de réponses 5xx (0.05 = 5%%) ; coupures du websocket")
+    parser.add_argument("--tick", type=float, default=0.0,
+                        help="Période d'avance du marché en secondes (0 = données figées)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Accélération de l'horloge du marché")
+    args = parser.parse_args()
+
+    market = ReplayMarket(args.source, args.history_days, args.seed, args.data_dir, speed=args.speed)
+    faults = FaultInjector(args.latency, args.jitter, args.rate_limit, args.error_rate, args.seed)
+    print(f"🔁 Rejeu Binance ({args.source}) sur http://{args.host}:{args.port}")
+    print(f"   → BINANCE_BASE_URL=http://{args.host}:{args.port}")
+    print(f"   → BINANCE_WS_URL=ws://{args.host}:{args.port}")
+    web.run_app(create_app(market, faults, args.tick), host=args.host, port=args.port, print=None)
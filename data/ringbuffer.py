@@ -0,0 +1,146 @@
+"""
+Buffer circulaire OHLCV de capacité fixe, adossé à des tableaux NumPy.
+Colonnes parallèles (open_time/close_time en int64, OHLCV en float64),
+chacune contiguë en mémoire, et un pointeur de tête : pas de DataFrame
+ni d'objet Python par bougie.
+
+Chaque écriture est doublée (position i et i + capacity) : les n dernières
+bougies forment toujours une tranche contiguë du stockage, d'où des vues
+NumPy sans copie (indicateurs, fenêtres) et un DataFrame construit sur le
+bloc OHLCV existant. Ajout et mise à jour de la dernière bougie en O(1).
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.store import KLINE_DTYPE, OHLCV_COLUMNS
+
+TIME_COLUMNS = ('open_time', 'close_time')
+
+
+class OHLCVRingBuffer:
+    """
+    Les `capacity` dernières bougies, dans l'ordre chronologique.
+    Une ligne est un tuple dans l'ordre de KLINE_DTYPE :
+    (open_time, close_time, open, high, low, close, volume).
+
+    Les vues retournées (buffer['close'], arrays(), to_frame(copy=False))
+    partagent le stockage : valables jusqu'à la prochaine écriture.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError(f"Capacité invalide: {capacity}")
+        self.capacity = capacity
+        self._times = np.zeros((len(TIME_COLUMNS), 2 * capacity), dtype=np.int64)
+        self._values = np.zeros((len(OHLCV_COLUMNS), 2 * capacity), dtype=np.float64)
+        self._head = 0   # Prochaine position d'écriture, dans [0, capacity)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _span(self, n: int = None) -> slice:
+        """Tranche du stockage couvrant les n dernières bougies (toutes par défaut)."""
+        n = self._size if n is None else max(0, min(n, self._size))
+        end = self._head + self.capacity
+        return slice(end - n, end)
+
+    # ── Écriture ──
+    def _write(self, slot: int, row) -> None:
+        for pos in (slot, slot + self.capacity):
+            self._times[:, pos] = row[:2]
+            self._values[:, pos] = row[2:]
+
+    def append(self, row) -> None:
+        """Ajoute une bougie (la plus ancienne est évincée si le buffer est plein)."""
+        self._write(self._head, row)
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def update_last(self, row) -> None:
+        """Remplace la dernière bougie (bougie en cours)."""
+        if not self._size:
+            raise IndexError("Buffer vide")
+        self._write((self._head - 1) % self.capacity, row)
+
+    def upsert(self, row) -> None:
+        """Met à jour la bougie en cours (même open_time) ou ajoute la suivante."""
+        if self._size:
+            last = self.last_open_time
+            if row[0] == last:
+                self.update_last(row)
+                return
+            if row[0] < last:
+                return  # Message en retard sur une bougie déjà remplacée
+        self.append(row)
+
+    def extend(self, klines: np.ndarray) -> None:
+        """Ajoute un tableau structuré KLINE_DTYPE (bougies postérieures à la dernière)."""
+        klines = klines[-self.capacity:]
+        m = len(klines)
+        if not m:
+            return
+        slots = (self._head + np.arange(m)) % self.capacity
+        for positions in (slots, slots + self.capacity):
+            for j, col in enumerate(TIME_COLUMNS):
+                self._times[j, positions] = klines[col]
+            for j, col in enumerate(OHLCV_COLUMNS):
+                self._values[j, positions] = klines[col]
+        self._head = (self._head + m) % self.capacity
+        self._size = min(self._size + m, self.capacity)
+
+    def load(self, klines: np.ndarray) -> None:
+        """Remplace le contenu (les `capacity` dernières bougies sont gardées)."""
+        self.clear()
+        self.extend(klines)
+
+    def clear(self) -> None:
+        self._head = self._size = 0
+
+    # ── Lecture ──
+    @property
+    def last_open_time(self) -> int:
+        return int(self._times[0, self._head + self.capacity - 1])
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        """Vue sans copie d'une colonne (mêmes noms que KLINE_DTYPE)."""
+        if column in TIME_COLUMNS:
+            return self._times[TIME_COLUMNS.index(column), self._span()]
+        return self._values[OHLCV_COLUMNS.index(column), self._span()]
+
+    def since(self, start_ms: int) -> int:
+        """Nombre de bougies ouvertes à partir de start_ms (même sémantique que store.window)."""
+        times = self['open_time']
+        return len(times) - int(np.searchsorted(times, start_ms, side='left'))
+
+    def arrays(self, n: int = None) -> dict:
+        """Colonnes OHLCV des n dernières bougies : vues float64 contiguës, sans copie."""
+        span = self._span(n)
+        return {col: self._values[j, span] for j, col in enumerate(OHLCV_COLUMNS)}
+
+    def to_klines(self, n: int = None) -> np.ndarray:
+        """Copie des n dernières bougies en tableau structuré KLINE_DTYPE."""
+        span = self._span(n)
+        out = np.empty(span.stop - span.start, dtype=KLINE_DTYPE)
+        for j, col in enumerate(TIME_COLUMNS):
+            out[col] = self._times[j, span]
+        for j, col in enumerate(OHLCV_COLUMNS):
+            out[col] = self._values[j, span]
+        return out
+
+    def to_frame(self, n: int = None, copy: bool = False) -> pd.DataFrame:
+        """
+        DataFrame OHLCV indexé par timestamp (comme store.klines_to_frame).
+        copy=False : bloc unique construit sur le stockage, sans recopie des
+        prix — à ne pas conserver au-delà de la prochaine écriture.
+        """
+        span = self._span(n)
+        block = self._values[:, span]
+        index = pd.to_datetime(self._times[0, span], unit='ms')
+        index.name = 'timestamp'
+        return pd.DataFrame((block.copy() if copy else block).T, index=index,
+                            columns=list(OHLCV_COLUMNS), copy=False)
@@ -0,0 +1,113 @@
+"""
+Stockage local OHLCV — un fichier NumPy compressé par (symbole, intervalle).
+Les bougies sont conservées dans config.DATA_DIR sous forme de tableau
+structuré (open_time, close_time, open, high, low, close, volume) :
+seules les bougies plus récentes que la dernière stockée sont téléchargées.
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+
+KLINE_DTYPE = np.dtype([
+    ('open_time', '<i8'),
+    ('close_time', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def store_path(symbol: str, interval: str):
+    """Chemin du fichier de stockage pour un couple symbole/intervalle."""
+    return config.DATA_DIR / f"{symbol.upper()}_{interval}.npz"
+
+
+def empty_klines() -> np.ndarray:
+    return np.empty(0, dtype=KLINE_DTYPE)
+
+
+def klines_to_array(klines: list) -> np.ndarray:
+    """
+    Convertit la réponse brute Binance (listes de 12 champs, prix en str)
+    en tableau structuré — seules les colonnes utiles sont conservées.
+    """
+    out = np.empty(len(klines), dtype=KLINE_DTYPE)
+    if not klines:
+        return out
+    out['open_time'] = [k[0] for k in klines]
+    out['close_time'] = [k[6] for k in klines]
+    ohlcv = np.array([k[1:6] for k in klines], dtype=np.float64)
+    for i, col in enumerate(OHLCV_COLUMNS):
+        out[col] = ohlcv[:, i]
+    return out
+
+
+def load_klines(symbol: str, interval: str):
+    """
+    Charge les bougies stockées.
+    Retourne (klines, covered_from) où covered_from est le timestamp (ms)
+    à partir duquel l'historique est complet. Fichier absent ou illisible
+    → tableau vide.
+    """
+    path = store_path(symbol, interval)
+    try:
+        with np.load(path) as data:
+            return data['klines'].astype(KLINE_DTYPE, copy=False), int(data['covered_from'])
+    except (OSError, KeyError, ValueError):
+        return empty_klines(), None
+
+
+def save_klines(symbol: str, interval: str, klines: np.ndarray, covered_from: int) -> None:
+    """Écriture atomique (fichier temporaire + rename) pour les accès concurrents."""
+    path = store_path(symbol, interval)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, klines=klines, covered_from=np.int64(covered_from))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def merge_klines(stored: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """
+    Fusionne les nouvelles bougies dans l'historique stocké.
+    Une bougie déjà présente (même open_time) est remplacée par la nouvelle
+    version — cas de la dernière bougie encore ouverte lors du fetch précédent.
+    """
+    if len(new) == 0:
+        return stored
+    if len(stored) == 0:
+        return new
+    merged = np.concatenate([stored, new])
+    # Le dernier doublon l'emporte : on inverse avant np.unique (1re occurrence)
+    _, idx = np.unique(merged['open_time'][::-1], return_index=True)
+    return merged[::-1][idx]
+
+
+def window(klines: np.ndarray, start_ms: int) -> np.ndarray:
+    """Bougies dont l'ouverture est >= start_ms (même sémantique que Binance)."""
+    first = np.searchsorted(klines['open_time'], start_ms, side='left')
+    return klines[first:]
+
+
+def klines_to_frame(klines: np.ndarray) -> pd.DataFrame:
+    """Tableau structuré → DataFrame OHLCV indexé par timestamp."""
+    df = pd.DataFrame({col: klines[col] for col in OHLCV_COLUMNS},
+                      index=pd.to_datetime(klines['open_time'], unit='ms'))
+    df.index.name = 'timestamp'
+    return df
@@ -0,0 +1,42 @@
+"""
+Séries OHLCV synthétiques déterministes — benchmarks et tests hors ligne.
+Marche aléatoire géométrique (même graine → mêmes bougies), au format
+de get_historical_data : colonnes open/high/low/close/volume, index
+'timestamp' aligné sur l'intervalle.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.store import OHLCV_COLUMNS
+
+# Volatilité journalière typique d'une crypto majeure
+_DAILY_VOLATILITY = 0.03
+
+
+def synthetic_ohlcv(n: int, seed: int = 0, interval: str = "1d", start: str = "2020-01-01",
+                    price: float = 30000.0) -> pd.DataFrame:
+    """
+    n bougies synthétiques (reproductibles pour une même graine).
+    La volatilité par bougie est mise à l'échelle de l'intervalle.
+    """
+    from data.cache import interval_seconds
+
+    seconds = interval_seconds(interval)
+    sigma = _DAILY_VOLATILITY * np.sqrt(seconds / 86400)
+    rng = np.random.default_rng(seed)
+
+    close = price * np.exp(np.cumsum(rng.normal(0.0, sigma, n)))
+    open_ = np.empty(n)
+    open_[:1] = price
+    open_[1:] = close[:-1]
+    # Mèches : au-delà du corps de la bougie, proportionnelles à la volatilité
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0.0, sigma / 2, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0.0, sigma / 2, n)))
+    volume = rng.lognormal(mean=7.0, sigma=0.5, size=n)
+
+    index = pd.date_range(start, periods=n, freq=pd.Timedelta(seconds=seconds), name='timestamp')
+    return pd.DataFrame(dict(zip(OHLCV_COLUMNS, (open_, high, low, close, volume))), index=index)
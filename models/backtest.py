@@ -0,0 +1,228 @@
+"""
+Backtest vectorisé des signaux de trading (compute_trading_signals).
+Les positions sont déduites de la colonne Signal et exécutées à
+l'ouverture de la bougie suivante, avec frais et slippage.
+Tout est calculé en NumPy, sans boucle par bougie ; les positions peuvent
+être 2-D (bougies × stratégies) pour évaluer plusieurs jeux de paramètres
+en une passe.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from data.cache import interval_seconds
+
+
+# Position cible par signal (NEUTRAL → on conserve la position précédente)
+SIGNAL_POSITIONS = {
+    'STRONG_BUY': 1.0,
+    'BUY': 1.0,
+    'NEUTRAL': np.nan,
+    'SELL': -1.0,
+    'STRONG_SELL': -1.0,
+}
+
+SECONDS_PER_YEAR = 365 * 86400  # Crypto : marché ouvert 24/7
+
+
+def signal_positions(signal, long_only: bool = False) -> np.ndarray:
+    """
+    Signal → position (+1 long, -1 short, 0 flat) décidée à la clôture.
+    NEUTRAL conserve la position précédente ; en long_only, un signal de
+    vente ferme la position au lieu de passer short.
+    """
+    signal = pd.Series(signal, copy=False)
+    if isinstance(signal.dtype, pd.CategoricalDtype):
+        lookup = np.array([SIGNAL_POSITIONS.get(label, np.nan) for label in signal.cat.categories] + [np.nan])
+        target = lookup[signal.cat.codes.to_numpy()]  # Code -1 (manquant) → dernier élément
+    else:
+        target = signal.map(SIGNAL_POSITIONS).to_numpy(dtype=np.float64)
+
+    if long_only:
+        target = np.where(target < 0, 0.0, target)
+    # Forward-fill des NEUTRAL, position nulle avant le premier signal
+    return pd.Series(target).ffill().fillna(0.0).to_numpy()
+
+
+def simulate(open_: np.ndarray, close: np.ndarray, positions: np.ndarray,
+             fee: float = None, slippage: float = None) -> dict:
+    """
+    Simule des positions décidées à la clôture de chaque bougie.
+
+    La position décidée en t est détenue de l'ouverture t+1 à l'ouverture t+2
+    (rendements open-to-open ; la dernière bougie est valorisée à son close).
+    Chaque changement de position coûte |Δposition| × (frais + slippage).
+    positions : (n,) ou (n, k) — k stratégies sur les mêmes prix.
+    """
+    fee = config.BACKTEST_FEE if fee is None else fee
+    slippage = config.BACKTEST_SLIPPAGE if slippage is None else slippage
+
+    open_ = np.asarray(open_, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    positions = np.asarray(positions, dtype=np.float64)
+    one_d = positions.ndim == 1
+    if one_d:
+        positions = positions[:, None]
+
+    n = len(open_)
+    bar_returns = np.empty(n)
+    bar_returns[:-1] = open_[1:] / open_[:-1] - 1
+    bar_returns[-1] = close[-1] / open_[-1] - 1
+
+    # Exécution à la bougie suivante (même disposition mémoire que positions)
+    held = np.zeros_like(positions)
+    held[1:] = positions[:-1]
+    turnover = np.abs(held)
+    turnover[1:] = np.abs(held[1:] - held[:-1])
+
+    returns = held * bar_returns[:, None] - turnover * (fee + slippage)
+    equity = np.cumprod(1 + returns, axis=0)
+    if not one_d and positions.flags.f_contiguous:
+        returns, equity = np.asfortranarray(returns), np.asfortranarray(equity)
+
+    out = {"returns": returns, "equity": equity, "held": held, "turnover": turnover,
+           "bar_returns": bar_returns}
+    if one_d:
+        out = {k: (v[:, 0] if v.ndim == 2 else v) for k, v in out.items()}
+    return out
+
+
+def _trade_returns(held: np.ndarray, equity: np.ndarray):
+    """
+    Rendement de chaque trade (suite de bougies à position constante non nulle) :
+    rapport de l'équité en fin de trade à l'équité juste avant son début.
+    Retourne (rendements des trades, indice de colonne de chaque trade).
+    """
+    n, k = held.shape
+    starts = np.ones_like(held, dtype=bool)
+    starts[1:] = held[1:] != held[:-1]
+
+    # Aplatissement colonne par colonne : chaque colonne commence un segment
+    flat_starts = np.flatnonzero(starts.ravel(order='F'))
+    flat_equity = equity.ravel(order='F')
+    ends = np.append(flat_starts[1:], n * k) - 1
+    before = np.where(flat_starts % n == 0, 1.0, flat_equity[flat_starts - 1])
+
+    in_market = held.ravel(order='F')[flat_starts] != 0
+    trade_returns = flat_equity[ends[in_market]] / before[in_market] - 1
+    return trade_returns, (flat_starts // n)[in_market]
+
+
+def compute_metrics(sim: dict, interval: str = "1d") -> dict:
+    """
+    Métriques de performance. Pour des positions 2-D, chaque métrique est
+    un tableau (une valeur par stratégie).
+    """
+    returns, equity, held = sim["returns"], sim["equity"], sim["held"]
+    one_d = returns.ndim == 1
+    if one_d:
+        returns, equity, held = returns[:, None], equity[:, None], held[:, None]
+
+    n, k = returns.shape
+    periods_per_year = SECONDS_PER_YEAR / interval_seconds(interval)
+
+    mean = returns.mean(axis=0)
+    std = returns.std(axis=0, ddof=1) if n > 1 else np.zeros(k)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), 0.0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+
+    trade_returns, trade_cols = _trade_returns(held, equity)
+    n_trades = np.bincount(trade_cols, minlength=k)
+    wins = np.bincount(trade_cols, weights=trade_returns > 0, minlength=k)
+    trade_sum = np.bincount(trade_cols, weights=trade_returns, minlength=k)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hit_rate = np.where(n_trades > 0, wins / n_trades, 0.0)
+        avg_trade = np.where(n_trades > 0, trade_sum / n_trades, 0.0)
+
+    metrics = {
+        "total_return": equity[-1] - 1,
+        "annual_return": equity[-1] ** (periods_per_year / n) - 1,
+        "sharpe": sharpe,
+        "max_drawdown": drawdown.min(axis=0),
+        "n_trades": n_trades,
+        "hit_rate": hit_rate,
+        "avg_trade": avg_trade,
+        "exposure": (held != 0).mean(axis=0),
+        "turnover": sim["turnover"].reshape(n, -1).sum(axis=0),
+        "buy_hold_return": np.full(k, np.prod(1 + sim["bar_returns"]) - 1),
+    }
+    if one_d:
+        metrics = {key: value[0].item() for key, value in metrics.items()}
+    return metrics
+
+
+def backtest(df: pd.DataFrame, interval: str = "1d", fee: float = None,
+             slippage: float = None, long_only: bool = False) -> dict:
+    """
+    Backtest du Signal d'un DataFrame d'indicateurs (add_all_indicators).
+    Retourne {"metrics": {...}, "equity": pd.Series}.
+    """
+    if 'Signal' not in df.columns:
+        raise ValueError("Colonne 'Signal' absente — appeler add_all_indicators() d'abord")
+    if len(df) < 2:
+        raise ValueError(f"Pas assez de données ({len(df)} lignes)")
+
+    positions = signal_positions(df['Signal'], long_only=long_only)
+    sim = simulate(df['open'].to_numpy(), df['close'].to_numpy(), positions, fee, slippage)
+
+    return {
+        "metrics": compute_metrics(sim, interval),
+        "equity": pd.Series(sim["equity"], index=df.index, name="equity"),
+    }
+
+
+def run_backtests(symbols: list = None, intervals: list = None,
+                  lookback: str = "1095 days ago UTC", long_only: bool = False) -> dict:
+    """
+    Backtest sur plusieurs symboles et intervalles.
+    Les données sont téléchargées en parallèle (stockage local incrémental).
+    Retourne {(symbole, intervalle): métriques}.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from data.binance_client import get_historical_data
+    from data.indicators import add_all_indicators
+
+    symbols = symbols or list(config.SYMBOLS)
+    intervals = intervals or list(config.INTERVALS)
+    jobs = [(symbol, interval) for symbol in symbols for interval in intervals]
+
+    def fetch(job):
+        symbol, interval = job
+        return get_historical_data(config.SYMBOLS[symbol], interval, lookback)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        for job, raw in zip(jobs, pool.map(fetch, jobs)):
+            df = add_all_indicators(raw)
+            results[job] = backtest(df, job[1], long_only=long_only)["metrics"]
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="📈 Backtest des signaux de trading")
+    parser.add_argument("--symbols", nargs="+", choices=list(config.SYMBOLS), default=list(config.SYMBOLS))
+    parser.add_argument("--intervals", nargs="+", choices=list(config.INTERVALS), default=list(config.INTERVALS))
+    parser.add_argument("--lookback", default="1095 days ago UTC", help="Période de lookback")
+    parser.add_argument("--long-only", action="store_true", help="Pas de position short")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    results = run_backtests(args.symbols, args.intervals, args.lookback, args.long_only)
+
+    print(f"\n{'=' * 90}")
+    print(f"{'Symbole':<8}{'Int.':<6}{'Rendement':>11}{'Annuel':>9}{'B&H':>10}{'Sharpe':>8}"
+          f"{'Max DD':>9}{'Trades':>8}{'Hit':>7}{'Expo':>7}")
+    print("=" * 90)
+    for (symbol, interval), m in results.items():
+        print(f"{symbol:<8}{interval:<6}{m['total_return']:>+10.1%} {m['annual_return']:>+8.1%}"
+              f"{m['buy_hold_return']:>+10.1%}{m['sharpe']:>8.2f}{m['max_drawdown']:>9.1%}"
+              f"{m['n_trades']:>8d}{m['hit_rate']:>7.1%}{m['exposure']:>7.1%}")
+    print(f"\n⏱️  {len(results)} backtests en {time.perf_counter() - start_time:.1f}s")
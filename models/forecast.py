@@ -0,0 +1,276 @@
+"""
+Modèles de prévision légers, 100 % NumPy — alternative rapide à Prophet.
+Tous travaillent sur log(close) comme prophet_model (prix toujours positifs,
+variations proportionnelles) :
+
+- holt  : lissage exponentiel à tendance amortie, ETS(A,Ad,N) — paramètres
+          (alpha, beta, phi) choisis sur une grille, évaluée d'un bloc
+- drift : marche aléatoire avec dérive (moyenne des rendements log)
+- ar    : AR(p) sur les rendements log, moindres carrés, p choisi par AIC
+
+Les intervalles de prédiction sont analytiques (variance de l'erreur à h
+pas de chaque modèle, hypothèse gaussienne), pas une marge fixe.
+Chaque ajustement est vectorisé sur un lot de séries (tableau 2-D
+séries × bougies) : une requête ou un screener de centaines de symboles
+coûte quelques millisecondes.
+"""
+import os
+import sys
+from datetime import datetime
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from telemetry import timed
+
+# Largeur des intervalles (80 % : interval_width par défaut de Prophet)
+INTERVAL_WIDTH = 0.8
+MIN_POINTS = 15  # Même minimum que prophet_model.prepare_data
+
+# Grille de recherche de holt — beta > alpha est exclu (tendance plus réactive que le niveau)
+HOLT_ALPHAS = np.linspace(0.05, 0.95, 19)
+HOLT_BETAS = np.array([0.0, 0.01, 0.02, 0.05, 0.1, 0.2, 0.3])
+HOLT_PHIS = np.array([0.8, 0.85, 0.9, 0.95, 0.98, 1.0])
+AR_MAX_ORDER = 5
+
+
+# ═══════════════════════════════════════════════════════
+# MODÈLES (log-prix, lot de séries)
+# Chaque fonction : y (séries, bougies) → (moyenne (séries, h),
+# variance (séries, h), ajusté à un pas (séries, bougies), paramètres)
+# ═══════════════════════════════════════════════════════
+
+def _holt_pass(y: np.ndarray, alpha, beta, phi, keep_fitted: bool = False):
+    """
+    Récursion ETS(A,Ad,N) en forme à correction d'erreur, vectorisée sur la
+    dernière dimension (séries × combinaisons de paramètres) :
+        prévision = l + phi·b ; e = y - prévision
+        l ← prévision + alpha·e ; b ← phi·b + beta·e
+    Retourne (niveau, tendance, SSE, prévisions à un pas ou None).
+    """
+    shape = np.broadcast(y[0], alpha).shape
+    level = np.broadcast_to(y[0], shape).copy()
+    trend = np.broadcast_to(y[1] - y[0], shape).copy()
+    sse = np.zeros(shape)
+    pred, error, scratch = np.empty(shape), np.empty(shape), np.empty(shape)
+    fitted = np.full((len(y),) + shape, np.nan) if keep_fitted else None
+    # Opérations en place : aucun tableau alloué par pas de temps
+    for t in range(1, len(y)):
+        np.multiply(phi, trend, out=pred)
+        pred += level
+        np.subtract(y[t], pred, out=error)
+        if t > 1:  # La 1re erreur ne dépend que de l'initialisation
+            sse += np.square(error, out=scratch)
+        if keep_fitted:
+            fitted[t] = pred
+        np.multiply(alpha, error, out=level)
+        level += pred
+        trend *= phi
+        trend += np.multiply(beta, error, out=scratch)
+    return level, trend, sse, fitted
+
+
+def _fit_holt(y: np.ndarray, horizon: int):
+    alpha, beta, phi = (g.ravel() for g in np.meshgrid(HOLT_ALPHAS, HOLT_BETAS, HOLT_PHIS, indexing='ij'))
+    valid = beta <= alpha
+    alpha, beta, phi = alpha[valid], beta[valid], phi[valid]
+
+    # Toutes les combinaisons en un passage : (bougies, séries, 1) contre (combinaisons,)
+    _, _, sse, _ = _holt_pass(y.T[:, :, None], alpha, beta, phi)
+    best = np.argmin(sse, axis=1)
+    alpha, beta, phi = alpha[best], beta[best], phi[best]
+
+    level, trend, sse, fitted = _holt_pass(y.T, alpha, beta, phi, keep_fitted=True)
+    sigma2 = sse / max(1, y.shape[1] - 2 - 3)
+
+    steps = np.arange(1, horizon + 1)
+    phi_h = np.cumsum(phi[:, None] ** steps, axis=1)          # phi + phi² + … + phi^h
+    mean = level[:, None] + phi_h * trend[:, None]
+    c = alpha[:, None] + beta[:, None] * phi_h[:, :-1]        # Poids des chocs passés
+    variance = sigma2[:, None] * (1 + np.concatenate(
+        [np.zeros((len(y), 1)), np.cumsum(c * c, axis=1)], axis=1))
+    return mean, variance, fitted.T, {"alpha": alpha, "beta": beta, "phi": phi}
+
+
+def _fit_drift(y: np.ndarray, horizon: int):
+    returns = np.diff(y, axis=1)
+    n = returns.shape[1]
+    mu = returns.mean(axis=1)
+    sigma2 = returns.var(axis=1, ddof=1)
+
+    steps = np.arange(1, horizon + 1)
+    mean = y[:, -1:] + mu[:, None] * steps
+    # Incertitude sur la dérive estimée incluse : σ²·h·(1 + h/n)
+    variance = sigma2[:, None] * steps * (1 + steps / n)
+    fitted = np.concatenate([np.full((len(y), 1), np.nan), y[:, :-1] + mu[:, None]], axis=1)
+    return mean, variance, fitted, {"drift": mu}
+
+
+def _fit_ar(y: np.ndarray, horizon: int, max_order: int = AR_MAX_ORDER):
+    returns = np.diff(y, axis=1)
+    n_series, n = returns.shape
+    max_order = max(1, min(max_order, (n - 2) // 3))
+    target = returns[:, max_order:]               # Même échantillon pour tous les ordres (AIC comparables)
+    m = target.shape[1]
+    lags = np.stack([returns[:, max_order - i:n - i] for i in range(1, max_order + 1)], axis=2)
+
+    best_aic = np.full(n_series, np.inf)
+    coefs = np.zeros((n_series, max_order + 1))   # [constante, phi_1 … phi_max]
+    sigma2 = np.zeros(n_series)
+    order = np.zeros(n_series, dtype=int)
+    for p in range(1, max_order + 1):
+        X = np.concatenate([np.ones((n_series, m, 1)), lags[:, :, :p]], axis=2)
+        XtX = X.transpose(0, 2, 1) @ X
+        Xty = X.transpose(0, 2, 1) @ target[:, :, None]
+        beta = np.linalg.solve(XtX + 1e-12 * np.eye(p + 1), Xty)[:, :, 0]
+        resid = target - (X @ beta[:, :, None])[:, :, 0]
+        s2 = (resid * resid).mean(axis=1)
+        aic = m * np.log(s2) + 2 * (p + 1)
+        better = aic < best_aic
+        best_aic = np.where(better, aic, best_aic)
+        coefs[better] = 0.0
+        coefs[better, :p + 1] = beta[better]
+        sigma2 = np.where(better, s2 * m / max(1, m - p - 1), sigma2)
+        order = np.where(better, p, order)
+
+    const, phi = coefs[:, 0], coefs[:, 1:]
+
+    # Rendements ajustés à un pas (échantillon d'estimation) → log-prix ajustés
+    fitted = np.full(y.shape, np.nan)
+    fitted[:, max_order + 1:] = y[:, max_order:-1] + const[:, None] + np.einsum('smk,sk->sm', lags, phi)
+
+    # Prévision récursive des rendements, cumulée en log-prix
+    history = returns[:, ::-1][:, :max_order].copy()    # r_T, r_{T-1}, …
+    forecast_returns = np.empty((n_series, horizon))
+    for h in range(horizon):
+        forecast_returns[:, h] = const + (phi * history).sum(axis=1)
+        history = np.concatenate([forecast_returns[:, h:h + 1], history[:, :-1]], axis=1)
+    mean = y[:, -1:] + np.cumsum(forecast_returns, axis=1)
+
+    # Poids psi (MA(∞)) des rendements ; le log-prix cumule les rendements
+    psi = np.zeros((n_series, horizon))
+    psi[:, 0] = 1.0
+    for j in range(1, horizon):
+        k = min(j, max_order)
+        psi[:, j] = (phi[:, :k] * psi[:, j - 1::-1][:, :k]).sum(axis=1)
+    # Incertitude sur les coefficients estimés et l'ordre choisi : même
+    # correction (1 + h/n) que drift, sans quoi la couverture chute avec h
+    steps = np.arange(1, horizon + 1)
+    variance = sigma2[:, None] * np.cumsum(np.cumsum(psi, axis=1) ** 2, axis=1) * (1 + steps / n)
+    return mean, variance, fitted, {"order": order, "phi": phi, "const": const}
+
+
+# Nom → (libellé du résultat, ajustement)
+MODELS = {
+    "holt": ("Holt", _fit_holt),
+    "drift": ("Drift", _fit_drift),
+    "ar": ("AR", _fit_ar),
+}
+
+
+def forecast(closes, model: str = "holt", horizon: int = 7, width: float = INTERVAL_WIDTH) -> dict:
+    """
+    Prévision de prix pour une série (1-D) ou un lot de séries de même
+    longueur (2-D, une ligne par symbole — screener).
+    Retourne {"predicted", "lower", "upper"} (…, horizon), "fitted"
+    (prévisions à un pas in-sample, NaN au début) et "params" ; mêmes
+    dimensions de lot que l'entrée.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Modèle invalide: {model}. Utilisez {', '.join(MODELS)}.")
+    closes = np.asarray(closes, dtype=np.float64)
+    single = closes.ndim == 1
+    y = np.log(np.atleast_2d(closes))
+    if y.shape[1] < MIN_POINTS:
+        raise ValueError(f"Pas assez de données ({y.shape[1]} lignes)")
+    if not np.isfinite(y).all():
+        raise ValueError("Prix manquants ou négatifs")
+
+    with timed(f"forecast.{model}"):
+        mean, variance, fitted, params = MODELS[model][1](y, horizon)
+    z = NormalDist().inv_cdf(0.5 + width / 2)
+    sd = np.sqrt(variance)
+    out = {
+        "predicted": np.exp(mean),
+        "lower": np.exp(mean - z * sd),
+        "upper": np.exp(mean + z * sd),
+        "fitted": np.exp(fitted),
+    }
+    if single:
+        out = {key: values[0] for key, values in out.items()}
+        params = {key: values[0] for key, values in params.items()}
+    out["params"] = params
+    return out
+
+
+# ═══════════════════════════════════════════════════════
+# API — même schéma de résultat que train_prophet
+# ═══════════════════════════════════════════════════════
+
+def _future_dates(index: pd.DatetimeIndex, days: int, per_day: int) -> list:
+    last = index[-1]
+    fmt = "%Y-%m-%d" if per_day == 1 else "%Y-%m-%d %H:%M"
+    return [(last + pd.Timedelta(days=d)).strftime(fmt) for d in range(1, days + 1)]
+
+
+def train_forecast(df: pd.DataFrame, symbol: str = "BTC", prediction_days: int = None,
+                   refit: bool = False, interval: str = "1d", model: str = "holt") -> dict:
+    """
+    Prévision `model` (holt, drift, ar) sur les données historiques, au format
+    de train_prophet. Ajustement complet à chaque appel (quelques ms) : pas de
+    registre de modèles, refit est accepté pour la compatibilité.
+    Sur un intervalle infra-journalier, la prévision est faite bougie par
+    bougie et un point par jour est retourné (comme les prédictions Prophet).
+    Métriques in-sample sur les derniers 20 % (prévisions à un pas).
+    """
+    from data.cache import interval_seconds
+
+    if prediction_days is None:
+        prediction_days = config.PREDICTION_DAYS
+
+    closes = df['close'].dropna()
+    per_day = max(1, 86400 // interval_seconds(interval))
+    result = forecast(closes.to_numpy(dtype=np.float64), model, prediction_days * per_day)
+
+    actual = closes.to_numpy()
+    eval_size = max(1, int(len(actual) * 0.2))
+    actual, predicted = actual[-eval_size:], result["fitted"][-eval_size:]
+    mae = float(np.mean(np.abs(actual - predicted)))
+    rmse = float(np.sqrt(np.mean((actual - predicted) ** 2)))
+    mape = float(np.mean(np.abs((actual - predicted) / actual)) * 100)
+
+    daily = slice(per_day - 1, None, per_day)
+    predictions = [
+        {
+            "date": date,
+            "predicted_price": round(float(p), 2),
+            "lower_bound": round(float(lo), 2),
+            "upper_bound": round(float(up), 2),
+        }
+        for date, p, lo, up in zip(_future_dates(closes.index, prediction_days, per_day),
+                                   result["predicted"][daily], result["lower"][daily], result["upper"][daily])
+    ]
+
+    current_price = float(df['close'].iloc[-1])
+    predicted_end = predictions[-1]['predicted_price'] if predictions else current_price
+    change_pct = ((predicted_end - current_price) / current_price) * 100
+
+    # Même borne que train_prophet (max ±50% sur la période, ~5% par jour)
+    max_change = min(50, prediction_days * 5)
+    change_pct = max(-max_change, min(max_change, change_pct))
+
+    return {
+        "model": MODELS[model][0],
+        "symbol": symbol,
+        "current_price": round(current_price, 2),
+        "predictions": predictions,
+        "predicted_change_pct": round(change_pct, 2),
+        "direction": "UP" if change_pct > 0 else "DOWN",
+        "metrics": {"mae": round(mae, 2), "rmse": round(rmse, 2), "mape": round(mape, 2)},
+        "trained_on": len(closes),
+        "prediction_days": prediction_days,
+        "timestamp": datetime.now().isoformat(),
+    }
@@ -5,33 +5,32 @@ et éviter les extrapolations aberrantes.
 """
 import os
 import sys
+import threading
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import joblib
+from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from telemetry import cache_lookup, timed
 
 
-def train_prophet(df: pd.DataFrame, symbol: str = "BTC", prediction_days: int = None) -> dict:
-    """
-    Entraîne un modèle Prophet sur les données historiques.
-    
-    Utilise log(close) pour:
-    - Garantir que les prédictions sont toujours positives
-    - Mieux modéliser les variations proportionnelles (%)
-    - Éviter les tendances linéaires aberrantes sur des prix élevés
-    
-    PAS de regressors externes (RSI, MACD) car ils causent
-    des extrapolations folles quand on les fixe à une constante.
-    """
-    from prophet import Prophet
-    
-    if prediction_days is None:
-        prediction_days = config.PREDICTION_DAYS
-    
-    # Préparer les données — transformation LOG
+# Paramètres du modèle — adaptés aux cryptos & optimisés pour Serverless (Vercel).
+# Stockés avec le modèle : un changement ici invalide les modèles sauvegardés.
+PROPHET_PARAMS = dict(
+    daily_seasonality=False,       # Pas de saisonnalité journalière sur du daily
+    weekly_seasonality=True,       # Effet jour de la semaine
+    yearly_seasonality=True,       # Cycles annuels
+    changepoint_prior_scale=0.1,   # Flexibilité modérée
+    seasonality_prior_scale=5,     # Régularisation saisonnalité
+    changepoint_range=0.9,         # Changepoints sur 90% des données
+    growth='linear',
+    uncertainty_samples=0,         # CRITICAL: 0 pour éviter timeout sur Vercel (1000 par défaut = trop lent)
+)
+
+
+def prepare_data(df: pd.DataFrame) -> pd.DataFrame:
+    """Données Prophet (ds, y) — transformation LOG du close."""
     prophet_df = pd.DataFrame({
         'ds': df.index,
         'y': np.log(df['close'].values),  # LOG transform
@@ -41,59 +40,65 @@ def train_prophet(df: pd.DataFrame, symbol: str = "BTC", prediction_days: int =
     
     if len(prophet_df) < 15:
         raise ValueError(f"Pas assez de données ({len(prophet_df)} lignes)")
+    return prophet_df
+
+
+def _data_key(prophet_df: pd.DataFrame) -> tuple:
+    """
+    Identifie la fenêtre d'entraînement : (première date, dernière date, nb lignes).
+    Le close de la bougie en cours varie dans la journée mais ne déclenche
+    pas de ré-entraînement : seule une nouvelle bougie en déclenche un.
+    """
+    return (prophet_df['ds'].iloc[0].isoformat(), prophet_df['ds'].iloc[-1].isoformat(), len(prophet_df))
+
+
+# Prophet/cmdstanpy ne supportent pas les entraînements concurrents dans
+# un même processus (chargement du backend Stan) : un seul fit à la fois
+_FIT_LOCK = threading.Lock()
+
+
+def _import_prophet():
+    """Importe Prophet (≈1 s : cmdstanpy, holidays…) en coupant ses logs."""
+    from prophet import Prophet
     
     # Supprimer les logs Prophet
     import logging
     logging.getLogger('prophet').setLevel(logging.WARNING)
     logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+    return Prophet
+
+
+def preload() -> None:
+    """
+    Charge Prophet et son backend Stan compilé (chargé à la première
+    instanciation puis réutilisé) : le premier fit n'en paie plus le coût.
+    Appelé en tâche de fond au démarrage de l'API si config.PRELOAD.
+    """
+    Prophet = _import_prophet()
+    with _FIT_LOCK, timed("prophet.preload"):
+        Prophet(**PROPHET_PARAMS)
+
+
+def fit_model(prophet_df: pd.DataFrame):
+    """Entraîne un modèle Prophet (PROPHET_PARAMS) sur des données (ds, y)."""
+    Prophet = _import_prophet()
     
-    # Modèle Prophet — paramètres adaptés aux cryptos & optimisés pour Serverless (Vercel)
-    model = Prophet(
-        daily_seasonality=False,       # Pas de saisonnalité journalière sur du daily
-        weekly_seasonality=True,       # Effet jour de la semaine
-        yearly_seasonality=True,       # Cycles annuels
-        changepoint_prior_scale=0.1,   # Flexibilité modérée
-        seasonality_prior_scale=5,     # Régularisation saisonnalité
-        changepoint_range=0.9,         # Changepoints sur 90% des données
-        growth='linear',
-        uncertainty_samples=0,         # CRITICAL: 0 pour éviter timeout sur Vercel (1000 par défaut = trop lent)
-    )
-    
-    model.fit(prophet_df)
-    
-    # Prédictions futures
-    future = model.make_future_dataframe(periods=prediction_days)
-    forecast = model.predict(future)
-    
-    # Extraire prédictions futures
-    last_known_date = prophet_df['ds'].max()
-    future_preds = forecast[forecast['ds'] > last_known_date].copy()
+    with _FIT_LOCK, timed("prophet.fit"):  # Attente du verrou exclue
+        model = Prophet(**PROPHET_PARAMS)
+        model.fit(prophet_df)
+    return model
+
+
+def _fit(prophet_df: pd.DataFrame) -> dict:
+    """Entraîne Prophet et calcule les métriques in-sample (derniers 20%)."""
+    model = fit_model(prophet_df)
     
-    # Inverse LOG → prix réels
-    predictions = []
-    for _, row in future_preds.iterrows():
-        pred_price = np.exp(row['yhat'])
-        
-        # Avec uncertainty_samples=0, yhat_lower/upper n'existent pas ou sont égaux à yhat
-        # On simule une marge d'erreur de 5% pour l'affichage
-        lower = np.exp(row.get('yhat_lower', row['yhat']))
-        upper = np.exp(row.get('yhat_upper', row['yhat']))
-        
-        if lower == pred_price:
-            lower = pred_price * 0.95
-            upper = pred_price * 1.05
-            
-        predictions.append({
-            "date": row['ds'].strftime("%Y-%m-%d"),
-            "predicted_price": round(float(pred_price), 2),
-            "lower_bound": round(float(lower), 2),
-            "upper_bound": round(float(upper), 2),
-        })
-    
-    # Métriques in-sample (derniers 20%)
+    # Métriques in-sample (derniers 20%) — prédiction sur ces seules dates,
+    # identique à la prédiction sur tout l'historique (sans échantillonnage)
     eval_size = max(1, int(len(prophet_df) * 0.2))
     eval_data = prophet_df.iloc[-eval_size:]
-    eval_forecast = forecast[forecast['ds'].isin(eval_data['ds'])]
+    with timed("prophet.evaluate"):
+        eval_forecast = model.predict(eval_data[['ds']])
     
     if len(eval_forecast) > 0:
         # Comparer en prix réels (pas en log)
@@ -106,11 +111,159 @@ def train_prophet(df: pd.DataFrame, symbol: str = "BTC", prediction_days: int =
     else:
         mae = rmse = mape = 0
     
-    # Sauvegarder
-    model_path = config.MODEL_DIR / f"prophet_{symbol}.pkl"
-    joblib.dump(model, model_path)
+    return {
+        "model": model,
+        "key": _data_key(prophet_df),
+        "params": PROPHET_PARAMS,
+        "metrics": {"mae": mae, "rmse": rmse, "mape": mape},
+        "trained_on": len(prophet_df),
+        "fitted_at": datetime.now().isoformat(),
+    }
+
+
+def _forecast(entry: dict, prediction_days: int) -> list:
+    """Prédictions futures à partir d'un modèle entraîné (sans ré-entraînement)."""
+    model = entry["model"]
+    with timed("prophet.predict"):
+        future = model.make_future_dataframe(periods=prediction_days, include_history=False)
+        forecast = model.predict(future)
+    
+    # Inverse LOG → prix réels
+    yhat = np.exp(forecast['yhat'].to_numpy())
+    # Avec uncertainty_samples=0, yhat_lower/upper n'existent pas ou sont égaux à yhat
+    # On simule une marge d'erreur de 5% pour l'affichage
+    lower = np.exp(forecast['yhat_lower'].to_numpy()) if 'yhat_lower' in forecast else yhat
+    upper = np.exp(forecast['yhat_upper'].to_numpy()) if 'yhat_upper' in forecast else yhat
+    flat = lower == yhat
+    lower = np.where(flat, yhat * 0.95, lower)
+    upper = np.where(flat, yhat * 1.05, upper)
     
-    # Résultats
+    dates = forecast['ds'].dt.strftime("%Y-%m-%d").tolist()
+    return [
+        {
+            "date": date,
+            "predicted_price": round(float(p), 2),
+            "lower_bound": round(float(lo), 2),
+            "upper_bound": round(float(up), 2),
+        }
+        for date, p, lo, up in zip(dates, yhat, lower, upper)
+    ]
+
+
+# ── Registre des modèles ─────────────────────────────
+class ProphetRegistry:
+    """
+    Modèles Prophet entraînés, par nom (symbole_intervalle) — en mémoire et sur disque
+    (config.MODEL_DIR/prophet_{name}.pkl, modèle + métadonnées).
+    Un modèle est réutilisé tant que sa fenêtre d'entraînement correspond
+    aux données courantes ; les prévisions sont mémoïsées par
+    (nom, horizon) pour ce modèle.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._forecasts = {}
+        self._lock = threading.Lock()
+        self._name_locks = {}
+        self.fits = 0
+
+    def _name_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._name_locks.setdefault(name, threading.Lock())
+
+    def _load(self, name: str):
+        """Modèle sauvegardé sur disque, ou None (absent, illisible ou ancien format)."""
+        import joblib
+        try:
+            entry = joblib.load(config.MODEL_DIR / f"prophet_{name}.pkl")
+        except Exception:
+            return None
+        return entry if isinstance(entry, dict) and "key" in entry else None
+
+    def _save(self, name: str, entry: dict) -> None:
+        """Écriture atomique : plusieurs processus peuvent entraîner en parallèle."""
+        import joblib
+        path = config.MODEL_DIR / f"prophet_{name}.pkl"
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            joblib.dump(entry, tmp)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"⚠️ Sauvegarde du modèle {name} impossible: {e}")
+            if tmp.exists():
+                tmp.unlink()
+
+    def get_model(self, name: str, prophet_df: pd.DataFrame, refit: bool = False) -> dict:
+        """Modèle valide pour ces données — chargé, ou entraîné si nécessaire."""
+        key = _data_key(prophet_df)
+        with self._name_lock(name):
+            if not refit:
+                entry = self._models.get(name)
+                if entry is None or entry["key"] != key:
+                    entry = self._load(name)
+                if entry is not None and entry["key"] == key and entry["params"] == PROPHET_PARAMS:
+                    self._models[name] = entry
+                    cache_lookup("prophet.model", True)
+                    return entry
+            cache_lookup("prophet.model", False)
+            
+            entry = _fit(prophet_df)
+            self.fits += 1
+            self._models[name] = entry
+            with self._lock:
+                self._forecasts = {k: v for k, v in self._forecasts.items() if k[0] != name}
+            self._save(name, entry)
+            return entry
+
+    def predict(self, name: str, prophet_df: pd.DataFrame, prediction_days: int,
+                refit: bool = False):
+        """(modèle, prédictions) — prévision mémoïsée si le modèle n'a pas changé."""
+        entry = self.get_model(name, prophet_df, refit=refit)
+        memo_key = (name, prediction_days, entry["key"])
+        with self._lock:
+            predictions = self._forecasts.get(memo_key)
+        cache_lookup("prophet.forecast", predictions is not None)
+        if predictions is None:
+            predictions = _forecast(entry, prediction_days)
+            with self._lock:
+                self._forecasts[memo_key] = predictions
+        return entry, predictions
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._forecasts.clear()
+
+
+registry = ProphetRegistry()
+
+
+def train_prophet(df: pd.DataFrame, symbol: str = "BTC", prediction_days: int = None,
+                  refit: bool = False, interval: str = "1d") -> dict:
+    """
+    Prédiction Prophet sur les données historiques.
+    Un modèle est conservé par (symbole, intervalle) ; il n'est ré-entraîné
+    que si une nouvelle bougie est arrivée depuis le dernier entraînement
+    (ou si refit=True).
+    
+    Utilise log(close) pour:
+    - Garantir que les prédictions sont toujours positives
+    - Mieux modéliser les variations proportionnelles (%)
+    - Éviter les tendances linéaires aberrantes sur des prix élevés
+    
+    PAS de regressors externes (RSI, MACD) car ils causent
+    des extrapolations folles quand on les fixe à une constante.
+    """
+    if prediction_days is None:
+        prediction_days = config.PREDICTION_DAYS
+    
+    prophet_df = prepare_data(df)
+    fits = registry.fits
+    entry, predictions = registry.predict(f"{symbol}_{interval}", prophet_df, prediction_days, refit=refit)
+    metrics = entry["metrics"]
+    
+    # Résultats — le prix courant suit la bougie en cours, même si le modèle est réutilisé
     current_price = float(df['close'].iloc[-1])
     predicted_end = predictions[-1]['predicted_price'] if predictions else current_price
     change_pct = ((predicted_end - current_price) / current_price) * 100
@@ -127,18 +280,19 @@ def train_prophet(df: pd.DataFrame, symbol: str = "BTC", prediction_days: int =
         "predicted_change_pct": round(change_pct, 2),
         "direction": "UP" if change_pct > 0 else "DOWN",
         "metrics": {
-            "mae": round(mae, 2),
-            "rmse": round(rmse, 2),
-            "mape": round(mape, 2),
+            "mae": round(metrics["mae"], 2),
+            "rmse": round(metrics["rmse"], 2),
+            "mape": round(metrics["mape"], 2),
         },
-        "trained_on": len(prophet_df),
+        "trained_on": entry["trained_on"],
         "prediction_days": prediction_days,
         "timestamp": datetime.now().isoformat(),
     }
     
-    print(f"✅ Prophet {symbol}: {result['direction']} {abs(change_pct):.2f}%")
-    print(f"   ${current_price:,.2f} → ${predicted_end:,.2f}")
-    print(f"   RMSE: ${rmse:.2f} | MAE: ${mae:.2f} | MAPE: {mape:.2f}%")
+    if registry.fits != fits:
+        print(f"✅ Prophet {symbol}: {result['direction']} {abs(change_pct):.2f}%")
+        print(f"   ${current_price:,.2f} → ${predicted_end:,.2f}")
+        print(f"   RMSE: ${metrics['rmse']:.2f} | MAE: ${metrics['mae']:.2f} | MAPE: {metrics['mape']:.2f}%")
     
     return result
 
@@ -147,17 +301,15 @@ def load_and_predict(symbol: str = "BTC", df: pd.DataFrame = None) -> dict:
     """Charge les données et lance une prédiction."""
     if df is None:
         from data.binance_client import get_historical_data
-        from data.indicators import add_all_indicators
         binance_symbol = config.SYMBOLS.get(symbol, f"{symbol}USDT")
+        # Prophet n'utilise que le close : pas besoin des indicateurs
         df = get_historical_data(binance_symbol, "1d", config.DEFAULT_LOOKBACK)
-        df = add_all_indicators(df)
     
     return train_prophet(df, symbol)
 
 
 if __name__ == "__main__":
     from data.binance_client import get_historical_data
-    from data.indicators import add_all_indicators
     
     for sym, bsym in config.SYMBOLS.items():
         print(f"\n{'='*60}")
@@ -165,7 +317,6 @@ if __name__ == "__main__":
         print('='*60)
         
         df = get_historical_data(bsym, "1d", "365 days ago UTC")
-        df = add_all_indicators(df)
         
         result = train_prophet(df, sym, prediction_days=21)
         
@@ -0,0 +1,234 @@
+"""
+Balayage vectorisé des paramètres d'indicateurs et des seuils de signaux.
+Au lieu de relancer le pipeline pandas pour chaque combinaison, les règles
+paramétrables de compute_trading_signals (RSI, MACD, Bollinger, Stochastique,
+seuils du signal) sont évaluées en tableaux 2-D (bougies × combinaisons) :
+la contribution de chaque règle n'est calculée qu'une fois par jeu de
+paramètres unique, puis toutes les combinaisons sont backtestées en une
+passe (models/backtest.py).
+"""
+import itertools
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data.indicators import (
+    _Arrays, _bollinger, _macd, _rolling_mean, _rsi, _signals, _stochastic, compute_indicators,
+)
+from models.backtest import compute_metrics, simulate
+
+
+# Grille par défaut — les valeurs du pipeline sont incluses
+DEFAULT_GRID = {
+    'rsi_period': [7, 14, 21],
+    'rsi_oversold': [25, 30, 35],          # Survente (très survendu = seuil - 10)
+    'rsi_overbought': [65, 70, 75],        # Surachat (très suracheté = seuil + 10)
+    'macd_fast': [8, 12],
+    'macd_slow': [26],
+    'macd_signal': [9],
+    'bb_period': [20],
+    'bb_std': [1.5, 2.0, 2.5],
+    'stoch_k': [14],
+    'stoch_d': [3],
+    'signal_threshold': [0.5, 1.0, 1.5],   # |Signal_strength| > seuil → BUY/SELL
+}
+
+# Valeurs du pipeline (add_all_indicators / compute_trading_signals)
+DEFAULT_PARAMS = {
+    'rsi_period': 14, 'rsi_oversold': 30, 'rsi_overbought': 70,
+    'macd_fast': 12, 'macd_slow': 26, 'macd_signal': 9,
+    'bb_period': 20, 'bb_std': 2.0,
+    'stoch_k': 14, 'stoch_d': 3,
+    'signal_threshold': 1.0,
+}
+
+# Colonnes dont les règles sont recalculées par le balayage ; les autres
+# règles (EMA, ADX, volume, divergences, Fibonacci, pivots) sont fixes
+_SWEPT_COLUMNS = ['RSI', 'MACD', 'MACD_signal', 'MACD_hist', 'BB_percent', 'BB_width', 'Stoch_K', 'Stoch_D']
+
+
+def parameter_grid(grid: dict = None) -> pd.DataFrame:
+    """Produit cartésien de la grille (paramètres absents → valeur du pipeline)."""
+    grid = {**{k: [v] for k, v in DEFAULT_PARAMS.items()}, **(grid or {})}
+    unknown = set(grid) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise KeyError(f"Paramètres inconnus: {', '.join(sorted(unknown))}")
+    params = pd.DataFrame(list(itertools.product(*grid.values())), columns=list(grid))
+    valid = (params['macd_fast'] < params['macd_slow']) & (params['rsi_oversold'] < params['rsi_overbought'])
+    return params[valid].reset_index(drop=True)
+
+
+def _lag(x: np.ndarray) -> np.ndarray:
+    """Décalage d'une bougie le long de l'axe 0 (1-D ou 2-D)."""
+    out = np.full_like(x, np.nan)
+    out[1:] = x[:-1]
+    return out
+
+
+def _cross_up(a, b):
+    return (a > b) & (_lag(a) <= _lag(b))
+
+
+def _cross_down(a, b):
+    return (a < b) & (_lag(a) >= _lag(b))
+
+
+def _rsi_rule(c, period, oversold, overbought) -> np.ndarray:
+    """Règle 1 : zones RSI."""
+    rsi = _rsi(c, period)['RSI']
+    return (2 * (rsi < oversold - 10) + 1 * (rsi < oversold)
+            - 2 * (rsi > overbought + 10) - 1 * (rsi > overbought))
+
+
+def _macd_rule(c, fast, slow, signal) -> np.ndarray:
+    """Règle 2 : croisements et histogramme MACD."""
+    out = _macd(c, fast, slow, signal)
+    macd, macd_signal, hist = out['MACD'], out['MACD_signal'], out['MACD_hist']
+    return (2 * _cross_up(macd, macd_signal) - 2 * _cross_down(macd, macd_signal)
+            + 0.5 * (hist > 0) - 0.5 * (hist < 0))
+
+
+def _bollinger_rule(c, period, std_dev) -> np.ndarray:
+    """Règle 4 : rebond sur les bandes et squeeze."""
+    out = _bollinger(c, period, std_dev)
+    percent, width = out['BB_percent'], out['BB_width']
+    return (1.5 * (percent < 0) - 1.5 * (percent > 1)
+            + 0.5 * (width < _rolling_mean(width, 20) * 0.5))
+
+
+def _stochastic_rule(c, k_period, d_period) -> np.ndarray:
+    """Règle 5 : croisements stochastiques en zone extrême."""
+    out = _stochastic(c, k_period, d_period)
+    k, d = out['Stoch_K'], out['Stoch_D']
+    return 2 * (_cross_up(k, d) & (k < 20)) - 2 * (_cross_down(k, d) & (k > 80))
+
+
+# Règle → (fonction, paramètres) ; compute_trading_signals avec les valeurs par défaut
+_RULES = {
+    'rsi': (_rsi_rule, ['rsi_period', 'rsi_oversold', 'rsi_overbought']),
+    'macd': (_macd_rule, ['macd_fast', 'macd_slow', 'macd_signal']),
+    'bollinger': (_bollinger_rule, ['bb_period', 'bb_std']),
+    'stochastic': (_stochastic_rule, ['stoch_k', 'stoch_d']),
+}
+
+
+def _rule_scores(cols, params: pd.DataFrame):
+    """
+    Contribution de chaque règle, calculée une fois par jeu de paramètres
+    unique : {règle: (matrice uniques × bougies, indice de ligne par combinaison)}.
+    """
+    out = {}
+    for name, (func, keys) in _RULES.items():
+        unique, inverse = np.unique(params[keys].to_numpy(float), axis=0, return_inverse=True)
+        matrix = np.vstack([
+            func(cols, *[int(v) if v.is_integer() and key != 'bb_std' else v for key, v in zip(keys, row)])
+            for row in unique
+        ])
+        # Scores multiples de 0.5 : entiers exacts en demi-points (int16)
+        matrix = (2 * matrix).astype(np.int16)
+        out[name] = (matrix, inverse.ravel())
+    return out
+
+
+def _signal_sums(rules: dict, index: np.ndarray, base_score: np.ndarray) -> np.ndarray:
+    """
+    6 × Signal_strength (combinaisons `index` × bougies), en entiers exacts :
+    somme sur 3 bougies des scores en demi-points. Les 2 premières bougies
+    (lissage incomplet) valent 0, soit NEUTRAL comme le NaN du pipeline.
+    """
+    score = np.repeat((2 * base_score).astype(np.int16)[None, :], len(index), axis=0)
+    for matrix, inverse in rules.values():
+        score += matrix[inverse[index]]
+
+    # Lissage sur 3 périodes, comme compute_trading_signals
+    sums = np.zeros_like(score)
+    sums[:, 2:] = score[:, :-2] + score[:, 1:-1] + score[:, 2:]
+    return sums
+
+
+def _positions(sums: np.ndarray, threshold: np.ndarray, long_only: bool) -> np.ndarray:
+    """
+    BUY/STRONG_BUY → +1, SELL/STRONG_SELL → -1 (0 en long_only), NEUTRAL conserve.
+    Entrée (combinaisons × bougies) ; sortie (bougies × combinaisons) en ordre
+    Fortran, chaque série temporelle contiguë pour le backtest.
+    """
+    limit = (6 * threshold)[:, None]  # strength > seuil ⇔ sums > 6 × seuil
+    buy, sell = sums > limit, sums < -limit
+    target = buy.astype(np.int8) - (0 if long_only else sell)
+    # Forward-fill des NEUTRAL : indice de la dernière bougie avec un signal
+    last = np.where(buy | sell, np.arange(sums.shape[1], dtype=np.int32), 0)
+    np.maximum.accumulate(last, axis=1, out=last)
+    filled = np.take_along_axis(target, last, axis=1)  # Avant tout signal : target[0] = 0
+    return filled.T
+
+
+def sweep(df: pd.DataFrame, grid: dict = None, interval: str = "1d", metric: str = "sharpe",
+          fee: float = None, slippage: float = None, long_only: bool = False,
+          chunk_size: int = 64, workers: int = None) -> pd.DataFrame:
+    """
+    Backtest de toutes les combinaisons de la grille sur un DataFrame OHLCV.
+    Les combinaisons sont traitées par blocs de chunk_size colonnes (mémoire
+    bornée, données en cache CPU), répartis sur `workers` threads — NumPy
+    libère le GIL (défaut: nb de coeurs). Retourne une ligne par combinaison
+    (paramètres + métriques), triée par `metric` décroissant.
+    """
+    params = parameter_grid(grid if grid is not None else DEFAULT_GRID)
+    if params.empty:
+        raise ValueError("Grille vide (vérifier macd_fast < macd_slow et rsi_oversold < rsi_overbought)")
+
+    # Règles fixes : score du pipeline sans les colonnes balayées
+    full = compute_indicators(df)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        base_score = _signals(_Arrays(full.drop(columns=_SWEPT_COLUMNS)))['Score']
+
+    cols = _Arrays(df)
+    open_, close = cols['open'], cols['close']
+
+    thresholds = params['signal_threshold'].to_numpy(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rules = _rule_scores(cols, params)
+
+    def run_chunk(start):
+        index = np.arange(start, min(start + chunk_size, len(params)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            positions = _positions(_signal_sums(rules, index, base_score), thresholds[index], long_only)
+            sim = simulate(open_, close, positions, fee, slippage)
+            return pd.DataFrame(compute_metrics(sim, interval), index=index)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        metrics = list(pool.map(run_chunk, range(0, len(params), chunk_size)))
+
+    result = pd.concat([params, pd.concat(metrics)], axis=1)
+    if metric not in result.columns:
+        raise KeyError(f"Métrique inconnue: {metric}")
+    return result.sort_values(metric, ascending=False, kind='stable').reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import config
+    from data.binance_client import get_historical_data
+
+    parser = argparse.ArgumentParser(description="🧪 Balayage des paramètres des signaux")
+    parser.add_argument("--symbol", choices=list(config.SYMBOLS), default="BTC")
+    parser.add_argument("--interval", choices=list(config.INTERVALS), default="1d")
+    parser.add_argument("--lookback", default="1095 days ago UTC", help="Période de lookback")
+    parser.add_argument("--metric", default="sharpe", help="Métrique de classement")
+    parser.add_argument("--top", type=int, default=10, help="Combinaisons affichées")
+    parser.add_argument("--long-only", action="store_true", help="Pas de position short")
+    args = parser.parse_args()
+
+    df = get_historical_data(config.SYMBOLS[args.symbol], args.interval, args.lookback)
+    start_time = time.perf_counter()
+    ranked = sweep(df, interval=args.interval, metric=args.metric, long_only=args.long_only)
+    elapsed = time.perf_counter() - start_time
+
+    shown = list(DEFAULT_GRID) + ['total_return', 'sharpe', 'max_drawdown', 'n_trades', 'hit_rate']
+    print(ranked[shown].head(args.top).to_string())
+    print(f"\n⏱️  {len(ranked)} combinaisons × {len(df)} bougies en {elapsed:.1f}s")
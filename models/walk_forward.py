@@ -0,0 +1,114 @@
+"""
+Évaluation walk-forward des modèles de prévision (Prophet ou models/forecast.py).
+Le modèle est ré-entraîné à de nombreuses dates de coupure (cutoffs) et
+chaque prévision est comparée aux prix réels qui ont suivi : des métriques
+hors échantillon par horizon (1 à 30 jours), contrairement aux métriques
+in-sample de train_prophet. Les cutoffs Prophet sont répartis sur un pool
+de processus ; les modèles NumPy (quelques ms par fit) tournent en place.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+def _cutoff_job(symbol: str, train: pd.DataFrame, test: pd.DataFrame, model: str = "prophet") -> pd.DataFrame:
+    """Un fit + une prévision hors échantillon (dans un processus du pool pour Prophet)."""
+    if model == "prophet":
+        from models.prophet_model import fit_model
+
+        predicted = np.exp(fit_model(train).predict(test[['ds']])['yhat'].to_numpy())
+    else:
+        from models.forecast import forecast
+
+        # Prévision à 1…len(test) bougies (données journalières consécutives)
+        predicted = forecast(np.exp(train['y'].to_numpy()), model, len(test))["predicted"]
+
+    last_ds = train['ds'].iloc[-1]
+    return pd.DataFrame({
+        'symbol': symbol,
+        'cutoff': last_ds,
+        'horizon': (test['ds'] - last_ds).dt.days.to_numpy(),
+        'base': np.exp(train['y'].iloc[-1]),
+        'actual': np.exp(test['y'].to_numpy()),
+        'predicted': predicted,
+    })
+
+
+def make_cutoffs(n: int, initial: int, horizon: int, step: int) -> list:
+    """
+    Indices de coupure : le modèle voit les lignes [.., cutoff) et prédit
+    [cutoff, cutoff + horizon). Le premier cutoff laisse `initial` lignes
+    d'entraînement, le dernier laisse `horizon` lignes de test.
+    """
+    return list(range(n - horizon, initial - 1, -step))[::-1]
+
+
+def _jobs(symbol: str, df: pd.DataFrame, initial: int, horizon: int, step: int, window: int):
+    from models.prophet_model import prepare_data
+
+    prophet_df = prepare_data(df)
+    for cutoff in make_cutoffs(len(prophet_df), initial, horizon, step):
+        start = 0 if window is None else max(0, cutoff - window)
+        yield symbol, prophet_df.iloc[start:cutoff], prophet_df.iloc[cutoff:cutoff + horizon]
+
+
+def summarize(forecasts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Métriques par (symbole, horizon) : MAE, RMSE, MAPE et précision
+    directionnelle (sens de la variation depuis le cutoff bien prédit).
+    """
+    error = forecasts['predicted'] - forecasts['actual']
+    scored = forecasts.assign(
+        abs_error=error.abs(),
+        sq_error=error ** 2,
+        ape=(error / forecasts['actual']).abs() * 100,
+        hit=np.sign(forecasts['predicted'] - forecasts['base']) == np.sign(forecasts['actual'] - forecasts['base']),
+    )
+    table = scored.groupby(['symbol', 'horizon']).agg(
+        n=('actual', 'size'),
+        mae=('abs_error', 'mean'),
+        rmse=('sq_error', 'mean'),
+        mape=('ape', 'mean'),
+        direction=('hit', 'mean'),
+    )
+    table['rmse'] = np.sqrt(table['rmse'])
+    table['direction'] *= 100
+    return table
+
+
+def walk_forward(data: dict, horizon: int = 30, initial: int = 90, step: int = 7,
+                 window: int = 90, workers: int = None, model: str = "prophet") -> tuple:
+    """
+    Évaluation walk-forward sur plusieurs symboles.
+
+    data    : {symbole: DataFrame OHLCV journalier}
+    horizon : jours prédits après chaque cutoff (1 à horizon)
+    initial : lignes d'entraînement minimum avant le premier cutoff
+    step    : jours entre deux cutoffs
+    window  : fenêtre d'entraînement glissante (90 jours comme l'API) ;
+              None = fenêtre croissante depuis le début
+    workers : processus (défaut: nb de coeurs) — Prophet uniquement
+    model   : prophet, ou holt / drift / ar (models/forecast.py)
+
+    Retourne (table par (symbole, horizon), prévisions brutes).
+    """
+    jobs = [job for symbol, df in data.items()
+            for job in _jobs(symbol, df, initial, horizon, step, window)]
+    if not jobs:
+        raise ValueError("Pas assez de données pour un seul cutoff")
+
+    if model != "prophet":
+        results = [_cutoff_job(*job, model) for job in jobs]
+    else:
+        # spawn : état Stan/cmdstanpy propre dans chaque processus
+        context = multiprocessing.get_context("spawn")
+        workers = workers or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            results = list(pool.map(_cutoff_job, *zip(*jobs), chunksize=chunksize))
+
+    forecasts = pd.concat(results, ignore_index=True)
+    return summarize(forecasts), forecasts
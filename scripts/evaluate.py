@@ -0,0 +1,76 @@
+"""
+Évaluation walk-forward (hors échantillon) des modèles de prévision.
+Usage:
+    python scripts/evaluate.py                                # Tous les symboles, horizons 1-30
+    python scripts/evaluate.py --model holt                   # Modèle NumPy (models/forecast.py)
+    python scripts/evaluate.py --symbols BTC ETH --step 3 --workers 8
+    python scripts/evaluate.py --window 0 --output resultats.csv   # Fenêtre croissante
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="📏 Évaluation walk-forward des modèles de prévision")
+    parser.add_argument("--model", choices=config.PREDICTION_MODELS, default="prophet",
+                        help="Modèle évalué (défaut: prophet)")
+    parser.add_argument("--symbols", nargs="+", choices=list(config.SYMBOLS), default=list(config.SYMBOLS),
+                        help="Symboles crypto (défaut: tous)")
+    parser.add_argument("--lookback", default="730 days ago UTC", help="Période de lookback")
+    parser.add_argument("--horizon", type=int, default=30, help="Horizon max en jours")
+    parser.add_argument("--initial", type=int, default=90, help="Jours d'entraînement avant le 1er cutoff")
+    parser.add_argument("--step", type=int, default=7, help="Jours entre deux cutoffs")
+    parser.add_argument("--window", type=int, default=90,
+                        help="Fenêtre d'entraînement glissante en jours (0 = croissante)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Processus d'entraînement (défaut: nb de coeurs)")
+    parser.add_argument("--show", type=int, nargs="+", default=[1, 3, 7, 14, 30],
+                        help="Horizons affichés dans le tableau")
+    parser.add_argument("--output", help="Fichier CSV pour le tableau complet")
+
+    args = parser.parse_args()
+
+    from data.binance_client import get_historical_data
+    from models.walk_forward import walk_forward
+
+    print("=" * 70)
+    print(f"📏 WALK-FORWARD — {args.model.upper()}")
+    print("=" * 70)
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(args.symbols)) as fetchers:
+        frames = fetchers.map(lambda s: get_historical_data(config.SYMBOLS[s], "1d", args.lookback), args.symbols)
+        data = dict(zip(args.symbols, frames))
+
+    table, forecasts = walk_forward(data, horizon=args.horizon, initial=args.initial, step=args.step,
+                                    window=args.window or None, workers=args.workers, model=args.model)
+    elapsed = time.perf_counter() - start_time
+    n_fits = forecasts.groupby(['symbol', 'cutoff']).ngroups
+
+    shown = table[table.index.get_level_values('horizon').isin(args.show)]
+    print(f"\n{'Symbole':<8}{'Horizon':>8}{'N':>6}{'MAE':>12}{'RMSE':>12}{'MAPE':>8}{'Direction':>11}")
+    print("─" * 65)
+    for (symbol, horizon), row in shown.iterrows():
+        print(f"{symbol:<8}{horizon:>7}j{int(row['n']):>6}{row['mae']:>12,.2f}{row['rmse']:>12,.2f}"
+              f"{row['mape']:>7.2f}%{row['direction']:>10.1f}%")
+
+    if args.output:
+        table.to_csv(args.output)
+        print(f"\n💾 Tableau complet: {args.output}")
+
+    workers = f"{args.workers} processus" if args.model == "prophet" else "1 processus"
+    print(f"\n⏱️  {n_fits} fits sur {workers} en {elapsed:.1f}s")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Profil du démarrage à froid — temps d'import par paquet et par module
+(python -X importtime), et latence des premières requêtes.
+Chaque mesure est faite dans un processus Python neuf, comme une
+instance serverless qui démarre (VERCEL=1 par défaut : ni pré-calcul,
+ni flux websocket, ni préchargement).
+
+Usage:
+    python scripts/import_profile.py                              # Imports de api.main
+    python scripts/import_profile.py --module models.prophet_model --top 30
+    python scripts/import_profile.py --endpoint /health --endpoint /api/prices/BTC
+    python scripts/import_profile.py --endpoint /health --server  # Config serveur (PRELOAD…)
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# Exécuté dans un processus neuf : import de l'app, démarrage, 1re et 2e requête
+_ENDPOINT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import api.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(api.main.app) as client:
+    ready = time.perf_counter()
+    first = client.get(sys.argv[1])
+    done = time.perf_counter()
+    client.get(sys.argv[1])
+    again = time.perf_counter() - done
+print(json.dumps({"import": imported - start, "startup": ready - imported,
+                  "first": done - ready, "second": again, "status": first.status_code,
+                  "modules": len(sys.modules)}))
+"""
+
+
+def _env(server: bool) -> dict:
+    env = dict(os.environ)
+    if not server:
+        env.setdefault("VERCEL", "1")
+    return env
+
+
+def import_times(module: str, server: bool = False) -> list:
+    """
+    Importe `module` sous -X importtime.
+    Retourne [(module, self µs, cumulé µs, profondeur)] dans l'ordre de la sortie.
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT_DIR, env=_env(server), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "échec")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def by_package(rows: list) -> list:
+    """Temps propre cumulé par paquet de premier niveau (pandas, numpy…), décroissant."""
+    totals = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+def endpoint_latency(path: str, server: bool = False) -> dict:
+    """Import + démarrage de l'app + 1re/2e requête sur `path`, dans un processus neuf."""
+    proc = subprocess.run([sys.executable, "-c", _ENDPOINT_PROBE, path],
+                          cwd=ROOT_DIR, env=_env(server), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "échec")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="⏱️ Profil du démarrage à froid (imports, premières requêtes)")
+    parser.add_argument("--module", default="api.main", help="Module à importer (défaut: api.main)")
+    parser.add_argument("--top", type=int, default=15, help="Nombre de paquets/modules affichés")
+    parser.add_argument("--endpoint", action="append", default=[],
+                        help="Route à mesurer à froid (répétable), ex. /health")
+    parser.add_argument("--server", action="store_true",
+                        help="Config serveur (sans VERCEL=1) : pré-calcul, flux et préchargement selon config")
+    args = parser.parse_args()
+
+    rows = import_times(args.module, args.server)
+    # Cumulé du module lui-même (hors modules déjà chargés par l'interpréteur)
+    total = next(cumulative for name, _, cumulative, depth in reversed(rows)
+                 if depth == 0 and name == args.module)
+    print("=" * 70)
+    print(f"⏱️  import {args.module} : {total / 1000:.1f} ms, {len(rows)} modules")
+    print("=" * 70)
+    print(f"{'Paquet':<40}{'Temps propre':>16}{'Part':>10}")
+    for package, self_us in by_package(rows)[:args.top]:
+        print(f"{package:<40}{self_us / 1000:>13.1f} ms{self_us / total:>10.1%}")
+
+    print(f"\n{'Module (cumulé)':<52}{'Cumulé':>12}{'Propre':>12}")
+    for name, self_us, cumulative, depth in sorted(rows, key=lambda row: -row[2])[:args.top]:
+        print(f"{'  ' * min(depth, 4) + name:<52}{cumulative / 1000:>9.1f} ms{self_us / 1000:>9.1f} ms")
+
+    for path in args.endpoint:
+        try:
+            result = endpoint_latency(path, args.server)
+        except Exception as e:
+            print(f"\n❌ {path}: {e}")
+            continue
+        print(f"\n📡 {path} (HTTP {result['status']}, {result['modules']} modules chargés)")
+        print(f"  import api.main : {result['import'] * 1000:>9.1f} ms")
+        print(f"  démarrage app   : {result['startup'] * 1000:>9.1f} ms")
+        print(f"  1re requête     : {result['first'] * 1000:>9.1f} ms")
+        print(f"  2e requête      : {result['second'] * 1000:>9.1f} ms")
+        cold = result['import'] + result['startup'] + result['first']
+        print(f"  ➜ démarrage à froid : {cold * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
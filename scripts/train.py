@@ -1,98 +1,153 @@
 """
 Script d'entraînement CLI pour les modèles de prédiction.
+Les jobs (symbole × intervalle × modèle) sont répartis sur un pool de
+processus ; les données sont téléchargées en parallèle (threads) et chaque
+job est lancé dès que ses données sont prêtes.
+
 Usage:
-    python scripts/train.py --model prophet --symbol BTC
-    python scripts/train.py --model lstm --symbol ETH
-    python scripts/train.py --model both --symbol BTC
+    python scripts/train.py                                   # Tous les symboles, 1d, prophet
+    python scripts/train.py --symbols BTC ETH --intervals 1d 4h
+    python scripts/train.py --models prophet --workers 4 --force
+    python scripts/train.py --models holt drift ar            # Modèles NumPy (models/forecast.py)
 """
 import argparse
+import multiprocessing
 import os
 import sys
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 # Ajouter le répertoire racine au path
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, ROOT_DIR)
 
 import config
-from data.binance_client import get_historical_data
-from data.indicators import add_all_indicators
+
+
+# Modèles disponibles : nom → (module, fonction d'entraînement, arguments supplémentaires)
+MODELS = {
+    "prophet": ("models.prophet_model", "train_prophet", {}),
+    "holt": ("models.forecast", "train_forecast", {"model": "holt"}),
+    "drift": ("models.forecast", "train_forecast", {"model": "drift"}),
+    "ar": ("models.forecast", "train_forecast", {"model": "ar"}),
+}
+
+
+def _train_job(model_name: str, symbol: str, interval: str, df, days: int, refit: bool):
+    """Exécuté dans un processus du pool — retourne (résultat, durée en s)."""
+    import importlib
+
+    module_name, func_name, kwargs = MODELS[model_name]
+    train = getattr(importlib.import_module(module_name), func_name)
+
+    start_time = time.perf_counter()
+    result = train(df, symbol, days, refit=refit, interval=interval, **kwargs)
+    return result, time.perf_counter() - start_time
+
+
+def _fetch(symbol: str, interval: str, lookback: str):
+    from data.binance_client import get_historical_data
+
+    start_time = time.perf_counter()
+    df = get_historical_data(config.SYMBOLS[symbol], interval, lookback)
+    return df, time.perf_counter() - start_time
 
 
 def main():
     parser = argparse.ArgumentParser(description="🔮 Entraîner les modèles de prédiction crypto")
-    parser.add_argument("--model", choices=["prophet", "lstm", "both"], default="prophet",
-                        help="Modèle à entraîner")
-    parser.add_argument("--symbol", choices=["BTC", "ETH", "both"], default="both",
-                        help="Symbole crypto")
-    parser.add_argument("--interval", default="1d", help="Intervalle des données")
+    parser.add_argument("--models", "--model", nargs="+", choices=list(MODELS), default=["prophet"],
+                        help="Modèles à entraîner")
+    parser.add_argument("--symbols", "--symbol", nargs="+", choices=list(config.SYMBOLS) + ["all"],
+                        default=["all"], help="Symboles crypto (défaut: tous)")
+    parser.add_argument("--intervals", "--interval", nargs="+", choices=list(config.INTERVALS),
+                        default=["1d"], help="Intervalles des données")
     parser.add_argument("--lookback", default="365 days ago UTC", help="Période de lookback")
     parser.add_argument("--days", type=int, default=7, help="Jours de prédiction")
-    
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Processus d'entraînement (défaut: nb de coeurs)")
+    parser.add_argument("--force", action="store_true",
+                        help="Ré-entraîner même si un modèle à jour existe")
+
     args = parser.parse_args()
-    
-    symbols = ["BTC", "ETH"] if args.symbol == "both" else [args.symbol]
-    models = ["prophet", "lstm"] if args.model == "both" else [args.model]
-    
+
+    symbols = list(config.SYMBOLS) if "all" in args.symbols else list(dict.fromkeys(args.symbols))
+    intervals = list(dict.fromkeys(args.intervals))
+    models = list(dict.fromkeys(args.models))
+    n_jobs = len(symbols) * len(intervals) * len(models)
+
     print("=" * 70)
     print("🚀 CRYPTO PREDICTION - TRAINING PIPELINE")
     print("=" * 70)
-    print(f"  Symboles : {', '.join(symbols)}")
-    print(f"  Modèles  : {', '.join(models)}")
-    print(f"  Intervalle: {args.interval}")
+    print(f"  Symboles  : {', '.join(symbols)}")
+    print(f"  Modèles   : {', '.join(models)}")
+    print(f"  Intervalles: {', '.join(intervals)}")
     print(f"  Lookback  : {args.lookback}")
     print(f"  Prédiction: {args.days} jours")
+    print(f"  Jobs      : {n_jobs} sur {args.workers} processus")
     print("=" * 70)
-    
+
+    total_start = time.perf_counter()
     results = {}
-    
-    for symbol in symbols:
-        print(f"\n{'─' * 50}")
-        print(f"📊 Chargement des données {symbol}...")
-        
-        binance_symbol = config.SYMBOLS.get(symbol, f"{symbol}USDT")
-        df = get_historical_data(binance_symbol, args.interval, args.lookback)
-        df = add_all_indicators(df)
-        
-        print(f"  → {len(df)} points de données avec {len(df.columns)} features")
-        
-        for model_name in models:
-            print(f"\n🔮 Entraînement {model_name.upper()} pour {symbol}...")
-            start_time = time.time()
-            
-            if model_name == "prophet":
-                from models.prophet_model import train_prophet
-                result = train_prophet(df, symbol, args.days)
-            else:
-                from models.lstm_model import train_lstm
-                result = train_lstm(df, symbol, args.days)
-            
-            elapsed = time.time() - start_time
-            
-            results[f"{symbol}_{model_name}"] = result
-            
-            print(f"\n  ⏱️  Temps d'entraînement: {elapsed:.1f}s")
-            print(f"  📈 Direction: {result['direction']} ({result['predicted_change_pct']:+.2f}%)")
-            print(f"  📊 Métriques: {result['metrics']}")
-            
-            if result['predictions']:
-                print(f"\n  🔮 Prédictions {symbol} ({model_name.upper()}):")
-                for pred in result['predictions']:
-                    print(f"    {pred['date']}: ${pred['predicted_price']:>10,.2f}  "
-                          f"[${pred['lower_bound']:>10,.2f} — ${pred['upper_bound']:>10,.2f}]")
-    
+    timings = {}
+    errors = {}
+
+    # spawn : les processus ne doivent pas hériter des threads de téléchargement
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as pool, \
+         ThreadPoolExecutor(max_workers=len(symbols) * len(intervals)) as fetchers:
+
+        downloads = {fetchers.submit(_fetch, symbol, interval, args.lookback): (symbol, interval)
+                     for symbol in symbols for interval in intervals}
+
+        # Chaque job part dès que ses données sont arrivées
+        jobs = {}
+        for future in as_completed(downloads):
+            symbol, interval = downloads[future]
+            try:
+                df, elapsed = future.result()
+            except Exception as e:
+                for model_name in models:
+                    errors[(symbol, interval, model_name)] = str(e)
+                print(f"❌ Données {symbol} {interval}: {e}")
+                continue
+
+            print(f"📊 {symbol} {interval}: {len(df)} bougies en {elapsed:.1f}s")
+            for model_name in models:
+                job = pool.submit(_train_job, model_name, symbol, interval, df, args.days, args.force)
+                jobs[job] = (symbol, interval, model_name)
+
+        for future in as_completed(jobs):
+            key = jobs[future]
+            try:
+                results[key], timings[key] = future.result()
+                print(f"  ✅ {' '.join(key)} en {timings[key]:.1f}s")
+            except Exception as e:
+                errors[key] = str(e)
+                print(f"  ❌ {' '.join(key)}: {e}")
+
+    total_elapsed = time.perf_counter() - total_start
+
     # Résumé final
     print(f"\n{'=' * 70}")
     print("📊 RÉSUMÉ FINAL")
     print("=" * 70)
-    
-    for key, result in results.items():
-        symbol, model = key.split('_')
+
+    for key in sorted(results):
+        symbol, interval, model = key
+        result = results[key]
         arrow = "🟢 ↗" if result['direction'] == 'UP' else "🔴 ↘"
-        print(f"  {arrow} {symbol} ({model.upper()}): {result['predicted_change_pct']:+.2f}% "
-              f"| ${result['current_price']:,.2f} → ${result['predictions'][-1]['predicted_price']:,.2f}")
-    
-    print(f"\n✅ Modèles sauvegardés dans: {config.MODEL_DIR}")
+        end_price = result['predictions'][-1]['predicted_price'] if result['predictions'] else result['current_price']
+        print(f"  {arrow} {symbol} {interval} ({model.upper()}): {result['predicted_change_pct']:+.2f}% "
+              f"| ${result['current_price']:,.2f} → ${end_price:,.2f} "
+              f"| MAPE {result['metrics']['mape']:.2f}% | ⏱️ {timings[key]:.1f}s")
+
+    for key in sorted(errors):
+        print(f"  ❌ {' '.join(key)}: {errors[key]}")
+
+    print(f"\n⏱️  {len(results)}/{n_jobs} jobs en {total_elapsed:.1f}s "
+          f"(somme des jobs: {sum(timings.values()):.1f}s)")
+    if "prophet" in models:  # Les modèles NumPy ne sont pas sauvegardés (ré-ajustés à chaque appel)
+        print(f"✅ Modèles sauvegardés dans: {config.MODEL_DIR}")
     print("=" * 70)
 
 
@@ -0,0 +1,226 @@
+"""
+Instrumentation sans dépendance — histogrammes et compteurs au format Prometheus.
+Durées par étape (fetch Binance, construction du DataFrame, chaque étape
+d'indicateurs, fit/prévision Prophet, sérialisation) et hits/misses des caches,
+exposées par l'endpoint /metrics de l'API.
+
+Les durées d'une requête HTTP peuvent aussi être collectées (contextvars)
+pour l'en-tête Server-Timing : voir collect_timings().
+"""
+import contextvars
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Bornes des histogrammes de durée (secondes) : 0.5 ms → 60 s, ~×2.5 par seau
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Durées de la requête en cours : [(étape, secondes)] ou None hors collecte
+_timings = contextvars.ContextVar("timings", default=None)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Compteur monotone, une série par combinaison de labels (nom en _total)."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(labels[name] for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels[name] for name in self.labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+
+class Histogram:
+    """
+    Histogramme cumulatif (seaux `le`, somme, nombre) comme Prometheus :
+    p50/p99 par étape via histogram_quantile() côté serveur, ou quantile() ici.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DURATION_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels → [comptes par seau (+Inf en dernier), somme]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels[name] for name in self.labels)
+        slot = bisect_left(self.buckets, value)  # Premier seau dont la borne >= value
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(labels[name] for name in self.labels))
+        return sum(series[0]) if series else 0
+
+    def quantile(self, q: float, **labels) -> float:
+        """Quantile estimé par interpolation linéaire dans le seau (même calcul que Prometheus)."""
+        series = self._series.get(tuple(labels[name] for name in self.labels))
+        if not series or not sum(series[0]):
+            return math.nan
+        counts = series[0]
+        rank = q * sum(counts)
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.buckets):  # Seau +Inf : borne connue la plus haute
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}"
+
+
+class Registry:
+    """Métriques du processus, rendues au format texte Prometheus (0.0.4)."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help: str, labels: tuple, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labels, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Métrique {name} déjà déclarée ({metric.kind})")
+            return metric
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = DURATION_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labels, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+stage_seconds = REGISTRY.histogram(
+    "stage_duration_seconds", "Durée des étapes de calcul (fetch, indicateurs, Prophet, sérialisation)",
+    labels=("stage",))
+cache_requests = REGISTRY.counter(
+    "cache_requests_total", "Lectures des caches par résultat (hit/miss)", labels=("cache", "result"))
+
+
+# ── Chronométrage ────────────────────────────────────
+def record(stage: str, seconds: float) -> None:
+    """Enregistre une durée (histogramme + Server-Timing de la requête en cours)."""
+    stage_seconds.observe(seconds, stage=stage)
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def timed(stage: str):
+    """Chronomètre un bloc : `with timed("fetch"): ...` (durée enregistrée même en cas d'erreur)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def timed_function(stage: str):
+    """Décorateur équivalent à `with timed(stage)` autour de la fonction."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    cache_requests.inc(cache=cache, result="hit" if hit else "miss")
+
+
+# ── Server-Timing ────────────────────────────────────
+def collect_timings():
+    """
+    Démarre la collecte des durées pour le contexte courant (une requête).
+    Retourne (liste partagée, jeton pour _timings.reset). Les tâches et
+    threads lancés ensuite (asyncio, run_in_threadpool) copient le contexte
+    et ajoutent à la même liste ; un calcul partagé (single-flight) n'est
+    attribué qu'à la requête qui l'a lancé.
+    """
+    timings = []
+    return timings, _timings.set(timings)
+
+
+def reset_timings(token) -> None:
+    _timings.reset(token)
+
+
+def server_timing_header(timings: list, total: float = None) -> str:
+    """'fetch;dur=12.3, indicators.rsi;dur=0.4, total;dur=20.1' — durées cumulées par étape, en ms."""
+    merged = {}
+    for stage, seconds in timings:
+        merged[stage] = merged.get(stage, 0.0) + seconds
+    if total is not None:
+        merged["total"] = total
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in merged.items())
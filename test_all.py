@@ -18,10 +18,12 @@ print(f"   Prix actuel: ${df['close'].iloc[-1]:,.2f}")
 print("\n2️⃣ Test: Indicateurs Techniques...")
 from data.indicators import add_all_indicators, get_indicator_summary
 df = add_all_indicators(df)
+assert add_all_indicators(df).equals(df), "add_all_indicators n'est pas idempotent"
 summary = get_indicator_summary(df)
 print(f"   ✅ RSI: {summary['rsi']}")
 print(f"   ✅ MACD: {summary['macd']}")
 print(f"   ✅ Signal global: {summary['overall_signal']}")
+print("   ✅ Recalcul idempotent")
 
 # 3. Test sentiment
 print("\n3️⃣ Test: Sentiment Analysis...")